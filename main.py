@@ -1,117 +1,708 @@
+import argparse
 import csv
-from datetime import datetime
-from src.insert_database import InsertDatabase
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from src.backend import create_backend
+from src.cardinality_benchmark import CardinalityBenchmark
+from src.equivalence_check import EquivalenceCheck
 from src.function_query import FunctionQuery
+from src.ingest_scenario import IngestScenario, WeekBatcher
+from src.insert_database import InsertDatabase
+from src.partition_manager import PartitionManager
+from src.profiler import Profiler
+from src.query_database import QueryDatabase
+from src.query_cache import QueryCache
+from src.query_spec import QuerySpec
+from src.regression_check import RegressionCheck
+from src.retention_manager import RetentionManager
+from src.save_data import SaveData
+from src.schema_matrix import SchemaMatrix
 from src.table_manager import TableManager
+from src.trace_replay import TraceReplay
+from src.workload_generator import WorkloadGenerator
 
 BATCH_SIZE = 100000
 ROUND_NUMBER = 50
+# Quanto esperar por linhas atrasadas antes de fechar uma semana
+ALLOWED_LATENESS = timedelta(hours=1)
 
 FILE_INSERTION = 'output/insertion_times.csv'
 HEADER_INSERTION = ['table_name', 'insertion_time', 'current_week', 'round_number', 'ram_usage', 'swap_usage', 'storage']
 FILE_QUERY = 'output/query_times.csv'
-HEADER_QUERY = ['table_name', 'query_time', 'query_type', 'round_number', 'ram_usage', 'swap_usage']
+HEADER_QUERY = ['table_name', 'query_time', 'query_type', 'round_number', 'ram_usage', 'swap_usage', 'cache_status']
+# Equivalência: cada consulta uma vez em cada banco, comparada com o primeiro que responder
+RUN_EQUIVALENCE_CHECK = True
+EQUIVALENCE_QUERY_TYPES = [spec.label for spec in QueryDatabase.DASHBOARD_SPECS]
+FILE_EQUIVALENCE = 'output/query_equivalence.csv'
+FILE_PRUNING = 'output/partition_pruning.csv'
+# Dry-run: mesma inserção contra sumidouros locais que descartam os dados (custo do lado do cliente)
+FILE_DRY_RUN_INSERTION = 'output/dry_run_insertion_times.csv'
+FILE_CLIENT_OVERHEAD = 'output/client_overhead.csv'
+FILE_PROFILE = 'output/ingest_profiles.csv'
+HEADER_PROFILE = ['table_name', 'engine', 'profile', 'load_time', 'index_build_time', 'time_to_queryable', 'storage_bytes']
+# Cenários de desordem: recriam os bancos base e inserem com cada cenário (apaga os dados do benchmark principal)
+RUN_DISORDER_SCENARIOS = False
+DISORDER_SEED = 7
+DISORDER_DATABASES = ["mariadb_innodb", "mariadb_innodb_optimized", "mariadb_myrocks", "influxdb", "sqlite", "columnar_numpy"]
+FILE_DISORDER_INSERTION = 'output/disorder_insertion_times.csv'
+FILE_DISORDER = 'output/disorder_report.csv'
+HEADER_DISORDER = ['table_name', 'scenario', 'rows', 'batches', 'late_batches', 'insertion_time', 'rows_per_second', 'storage_bytes', 'throughput_ratio', 'storage_ratio']
+# Alta cardinalidade: mesmo intervalo de tempo com cada vez mais sensores (apaga os dados do benchmark principal)
+RUN_CARDINALITY = False
+CARDINALITY_LEVELS = [10, 100, 1000, 10000]
+CARDINALITY_START = datetime(2024, 1, 1)
+CARDINALITY_WEEKS = 1
+CARDINALITY_INTERVAL = timedelta(minutes=15)
+CARDINALITY_ROUNDS = 5
+CARDINALITY_DATABASES = ["mariadb_innodb", "mariadb_innodb_optimized", "mariadb_myrocks", "mariadb_columnstore", "mariadb_innodb_compact", "influxdb", "sqlite", "columnar_numpy"]
+FILE_CARDINALITY_INSERTION = 'output/cardinality_insertion_times.csv'
+FILE_CARDINALITY = 'output/cardinality_report.csv'
+HEADER_CARDINALITY = ['table_name', 'sensors', 'rows', 'insertion_time', 'rows_per_second', 'series', 'bytes', 'query_type', 'query_time', 'result_rows']
+# Retenção: apaga as semanas mais antigas depois das consultas (altera os dados do benchmark principal)
+RUN_RETENTION = False
+RETENTION_WEEKS = 4
+RETENTION_DOWNSAMPLE = True
+RETENTION_SETTLE_SECONDS = 60
+RETENTION_ROUNDS = 5
+RETENTION_DATABASES = ["mariadb_innodb", "mariadb_innodb_optimized", "mariadb_myrocks", "mariadb_columnstore", "mariadb_innodb_compact", "influxdb", "sqlite", "columnar_numpy"]
+FILE_RETENTION = 'output/retention_report.csv'
+# Replay de trace: consultas de produção com os intervalos originais entre as chegadas
+RUN_TRACE_REPLAY = False
+REPLAY_TRACE = 'traces/query_trace.csv'
+REPLAY_SPEEDUP = 1.0
+REPLAY_CLIENTS = None  # None: um trabalhador por cliente do trace
+REPLAY_DATABASES = ["mariadb_innodb", "mariadb_innodb_optimized", "mariadb_myrocks", "influxdb", "sqlite", "columnar_numpy"]
+FILE_REPLAY = 'output/trace_replay.csv'
+# Comparação com uma linha de base (subcomando compare): testes por banco, consulta e semana
+REGRESSION_BASELINE = 'baselines/latest'
+REGRESSION_ALPHA = 0.05
+REGRESSION_THRESHOLD = 0.10
+REGRESSION_MIN_SAMPLES = 5
+FILE_REGRESSION = 'output/regression_report.csv'
+FILE_ENCODING = 'output/encoding_stats.csv'
+HEADER_ENCODING = ['table_name', 'points', 'series', 'bytes', 'bytes_per_point']
+FILE_CACHE = 'output/cache_stats.csv'
+HEADER_CACHE = ['cache_name', 'hits', 'misses', 'evictions', 'invalidations', 'entries', 'bytes']
+# Perfis do cliente (None, "cprofile" ou "sampling"): leitura do CSV, cada semana inserida e cada consulta
+PROFILE_MODE = None
+PROFILE_DIR = 'output/profiles'
+PROFILE_INTERVAL = 0.005
+
+# Matriz de índices: recria os bancos estruturados com cada conjunto de índices (apaga os dados do benchmark principal)
+RUN_INDEX_MATRIX = False
+INDEX_MATRIX_ROUNDS = 5
+FILE_MATRIX_INSERTION = 'output/matrix_insertion_times.csv'
+FILE_INDEX_MATRIX = 'output/index_matrix.csv'
+FILE_INDEX_REPORT = 'output/index_report.csv'
+
+# Matriz de compressão: recria os bancos com cada configuração de compressão (apaga os dados do benchmark principal)
+RUN_COMPRESSION_MATRIX = False
+COMPRESSION_ROUNDS = 5
+COMPRESSION_DATABASES = ["mariadb_innodb", "mariadb_innodb_optimized", "mariadb_myrocks", "mariadb_columnstore"]
+FILE_COMPRESSION_INSERTION = 'output/compression_insertion_times.csv'
+FILE_COMPRESSION_MATRIX = 'output/compression_matrix.csv'
+FILE_COMPRESSION_REPORT = 'output/compression_report.csv'
+
+# Carga de consultas: intervalos e sensores sorteados por rodada, reproduzíveis pela semente
+WORKLOAD_SEED = 42
+DATA_START = datetime(2022, 1, 1)
+DATA_STOP = datetime(2024, 1, 1)
+SENSORS = ['Sensor A', 'Sensor B']
+
+# Cache de resultados compartilhado: as inserções publicam as semanas alteradas e invalidam as entradas afetadas
+QUERY_CACHE = QueryCache(max_entries=256, max_bytes=256 * 1024 ** 2)
 
 DATABASES = [
-    {"name": "mariadb_innodb", "type": "InnoDB", "port": 3308, "function": InsertDatabase.insert_mariadb},
-    {"name": "mariadb_innodb_optimized", "type": "InnoDB", "port": 3309, "function": InsertDatabase.insert_mariadb_structured},
-    {"name": "mariadb_myrocks", "type": "ROCKSDB", "port": 3310, "function": InsertDatabase.insert_mariadb_structured},
-    {"name": "mariadb_columnstore", "type": "ColumnStore", "port": 3307, "function": InsertDatabase.insert_mariadb},
-    {"name": "influxdb", "type": "InfluxDB", "function": InsertDatabase.insert_influxdb},
+    {"name": "mariadb_innodb", "type": "InnoDB", "port": 3308, "backend": "mariadb"},
+    {"name": "mariadb_innodb_optimized", "type": "InnoDB", "port": 3309, "backend": "mariadb_structured", "partitioning": "month"},
+    {"name": "mariadb_myrocks", "type": "ROCKSDB", "port": 3310, "backend": "mariadb_structured", "partitioning": "month"},
+    # Perfil de carga em massa: sem índices secundários durante a carga, criados uma vez no final
+    {"name": "mariadb_innodb_optimized_bulk", "type": "InnoDB", "port": 3309, "backend": "mariadb_structured", "partitioning": "month", "profile": "bulk"},
+    {"name": "mariadb_myrocks_bulk", "type": "ROCKSDB", "port": 3310, "backend": "mariadb_structured", "partitioning": "month", "profile": "bulk"},
+    {"name": "mariadb_columnstore", "type": "ColumnStore", "port": 3307, "backend": "mariadb"},
+    {"name": "influxdb", "type": "InfluxDB", "backend": "influxdb"},
+    {"name": "sqlite", "type": "SQLite", "backend": "sqlite"},
+    {"name": "columnar_numpy", "type": "Columnar", "backend": "columnar"},
+    # Codificações compactas: sensor como SMALLINT com dicionário e timestamp inteiro; semana fora das tags do InfluxDB
+    {"name": "mariadb_innodb_compact", "type": "InnoDB", "port": 3308, "backend": "mariadb_compact"},
+    {"name": "mariadb_myrocks_compact", "type": "ROCKSDB", "port": 3310, "backend": "mariadb_compact"},
+    {"name": "influxdb_week_field", "type": "InfluxDB", "backend": "influxdb", "bucket": "sensor_data_week_field", "week_tag": "field"},
+    {"name": "influxdb_no_week", "type": "InfluxDB", "backend": "influxdb", "bucket": "sensor_data_no_week", "week_tag": "drop"},
+    # Variantes com rollups: rodam depois da base e medem só o custo extra de ingestão
+    {"name": "mariadb_innodb_rollup", "type": "InnoDB", "port": 3308, "backend": "mariadb_rollup"},
+    {"name": "mariadb_myrocks_rollup", "type": "ROCKSDB", "port": 3310, "backend": "mariadb_rollup", "structured": True},
+    {"name": "influxdb_rollup", "type": "InfluxDB", "backend": "influxdb_rollup"},
 ]
 
-def create_tables() -> None:
+# Bancos que também rodam as consultas fixas de painel pelo cache de resultados
+CACHED_DATABASES = ["mariadb_innodb", "mariadb_innodb_optimized", "mariadb_myrocks", "mariadb_columnstore", "influxdb", "sqlite", "columnar_numpy"]
+
+def select_databases(names: list = None) -> list:
+    """
+    Entradas de DATABASES selecionadas pelo nome, na ordem de DATABASES (todas quando names é None).
+    """
+    if names is None:
+        return DATABASES
+    return [db for db in DATABASES if db["name"] in names]
+
+def result_table_names(databases: list) -> list:
+    """
+    Nomes com que os bancos selecionados gravam nos CSVs de resultado, ou None na execução com todos.
+
+    Com None os CSVs são recriados; numa execução parcial só as linhas desses bancos são trocadas
+    (ver SaveData.reset_csv), então os resultados dos outros bancos continuam valendo.
+    """
+    if databases is DATABASES:
+        return None
+    return sorted({db["name"] for db in databases} | {insertion_table_name(db) for db in databases})
+
+def create_tables(databases: list = DATABASES) -> None:
     """
     Cria todas as tabelas necessárias no banco de dados.
+
+    :param databases: Entradas de DATABASES a criar.
     """
-    table_manager = TableManager()
-    table_manager.create_all_tables()
+    SaveData.reset_csv(FILE_INSERTION, HEADER_INSERTION, result_table_names(databases))
+
+    for db in databases:
+        create_backend(db).create_schema()
     print("Tabelas criadas.")
 
-def process_insertion() -> None:
+def process_insertion(databases: list = DATABASES, weeks: tuple = None) -> None:
     """
     Processa a inserção de dados em todos os bancos de dados configurados.
+
+    :param databases: Entradas de DATABASES a inserir.
+    :param weeks: Primeira e última semana ISO ((ano, semana), (ano, semana)) a inserir; None insere todas.
     """
     print("Iniciando inserção de dados...")
-    for db in DATABASES:
+    if not os.path.exists(FILE_INSERTION):
+        with open(FILE_INSERTION, mode='w', newline='') as file:
+            csv.writer(file).writerow(HEADER_INSERTION)
+    SaveData.reset_csv(FILE_PROFILE, HEADER_PROFILE, result_table_names(databases))
+
+    for db in databases:
         print(f"Processando inserção para: {db['name']} ({db['type']})")
-        insert_data(db)
+        backend = create_backend(db)
+        insert_data(backend, weeks=weeks)
+        index_build_time = backend.finish_ingest()
         print(f"Finalizada inserção para: {db['name']}\n")
 
-def insert_data(db: dict) -> None:
+        # Perfis incremental x carga em massa dos bancos estruturados
+        if db["backend"] == "mariadb_structured":
+            load_time = SchemaMatrix.ingest_time(FILE_INSERTION, db["name"], 0)
+            SaveData.save_ingest_profile_to_csv(
+                db["name"], db["type"], backend.profile(), load_time, index_build_time, backend.table_size_bytes(), FILE_PROFILE
+            )
+
+def process_dry_run(databases: list = DATABASES, weeks: tuple = None) -> None:
     """
-    Insere os dados no banco de dados especificado.
-    
-    :param db: Dicionário contendo informações do banco de dados (nome, tipo, porta, função de inserção).
+    Repete a inserção dos bancos em rede contra o NullSink e compara com os tempos reais de FILE_INSERTION.
+
+    O código de inserção é o mesmo (montagem dos lotes, escape do pymysql, Point do InfluxDB); só o
+    servidor é trocado por um que descarta os dados. SQLite e o motor colunar ficam de fora, pois
+    rodam no próprio processo.
+
+    :param databases: Entradas de DATABASES a inserir.
+    :param weeks: Primeira e última semana ISO a inserir; None insere todas.
     """
-    data_to_insert_maria, data_to_insert_influx = [], []
-    current_week = None
+    from src.null_sink import NullSink  # http.server só é carregado no dry-run
+    print("Iniciando dry-run contra o sumidouro local...")
+    with open(FILE_DRY_RUN_INSERTION, mode='w', newline='') as file:
+        csv.writer(file).writerow(HEADER_INSERTION)
+    with open(FILE_CLIENT_OVERHEAD, mode='w', newline='') as file:
+        csv.writer(file).writerow(NullSink.HEADER_OVERHEAD)
+
+    with NullSink() as sink:
+        InsertDatabase.ENDPOINT_OVERRIDES = sink.config_overrides()
+        try:
+            for db in sink.databases(databases):
+                print(f"Dry-run de inserção para: {db['name']} ({db['type']})")
+                backend = create_backend(db)
+                start_time = time.time()
+                stats = insert_data(backend, FILE_DRY_RUN_INSERTION, weeks=weeks)
+                backend.finish_ingest()
+                wall_time = time.time() - start_time
+
+                result = NullSink.overhead_report(
+                    db["name"], insertion_table_name(db), stats["rows"], wall_time,
+                    FILE_INSERTION, FILE_DRY_RUN_INSERTION, FILE_CLIENT_OVERHEAD
+                )
+                if result["client_share"] is not None:
+                    print(f"{db['name']}: {result['client_share']:.1%} do tempo de inserção é do cliente")
+        finally:
+            InsertDatabase.ENDPOINT_OVERRIDES = {}
+        print(f"Recebido pelo sumidouro: {sink.stats()}")
+
+def insert_data(backend, file_name_insertion: str = FILE_INSERTION, scenario=None, weeks: tuple = None) -> dict:
+    """
+    Insere os dados no banco de dados especificado, uma semana por vez.
     
-    with open('data/sensor_data_2_years.csv', newline='') as csvfile:
+    As linhas são agrupadas por semana com marca d'água (WeekBatcher), então a entrada não precisa
+    estar ordenada; linhas que chegam depois da semana fechada viram lotes atrasados.
+
+    :param backend: Backend do banco de dados (ver src.backend.create_backend).
+    :param file_name_insertion: Arquivo CSV onde os tempos de inserção são gravados.
+    :param scenario: Cenário de desordem (IngestScenario) aplicado ao fluxo; None mantém a ordem do CSV.
+    :param weeks: Primeira e última semana ISO a inserir; None insere todas.
+    :return: Linhas inseridas, lotes e lotes atrasados.
+    """
+    batcher = WeekBatcher(ALLOWED_LATENESS)
+    stats = {"rows": 0, "batches": 0}
+
+    def insert_batches(batches):
+        for week, rows in batches:
+            if weeks is not None and not weeks[0] <= week <= weeks[1]:
+                continue
+            insert_to_db(backend, rows, week, file_name_insertion)
+            stats["rows"] += len(rows)
+            stats["batches"] += 1
+
+    # Com perfis ativos, "parse" mede a leitura e o agrupamento; cada semana inserida tem a própria seção
+    with Profiler.profile(backend.name, "parse"), open('data/sensor_data_2_years.csv', newline='') as csvfile:
         reader = csv.reader(csvfile)
         next(reader)  # Skip header
-        
-        for row in reader:
-            row_date = datetime.strptime(row[0], "%Y-%m-%d %H:%M:%S")
-            year_week = row_date.isocalendar()[:2]  # (year, week)
-            
-            if current_week and current_week != year_week:
-                insert_to_db(db, data_to_insert_maria, data_to_insert_influx, current_week)
-                data_to_insert_maria, data_to_insert_influx = [], []
-            
-            current_week = year_week
-            data_to_insert_maria.append(row)
-            
-            data_to_insert_influx.append({
-                "measurement": "sensor_data",
-                "tags": {"sensor_name": row[2]},
-                "time": row[0] if row[0].endswith("Z") else row_date.isoformat() + "Z",
-                "fields": {"temperature": float(row[1])}
-            })
-    
-    if data_to_insert_maria:
-        insert_to_db(db, data_to_insert_maria, data_to_insert_influx, current_week)
 
-def insert_to_db(db: dict, data_to_insert_maria: list, data_to_insert_influx: list, current_week: tuple) -> None:
+        events = ((datetime.strptime(row[0], "%Y-%m-%d %H:%M:%S"), row) for row in reader)
+        if scenario is not None:
+            events = scenario.apply(events)
+
+        for row_date, row in events:
+            insert_batches(batcher.add(row_date, row))
+
+        insert_batches(batcher.flush())
+    stats["late_batches"] = batcher.late_batches
+    return stats
+
+def insert_to_db(backend, data_to_insert: list, current_week: tuple, file_name_insertion: str = FILE_INSERTION) -> None:
     """
     Executa a inserção de dados no banco de dados correspondente.
     
-    :param db: Dicionário contendo informações do banco de dados.
-    :param data_to_insert_maria: Lista de dados a serem inseridos no MariaDB.
-    :param data_to_insert_influx: Lista de dados a serem inseridos no InfluxDB.
+    :param backend: Backend do banco de dados.
+    :param data_to_insert: Linhas do CSV (timestamp, temperatura, sensor) da semana.
     :param current_week: Tupla contendo o ano e a semana correspondente aos dados.
+    :param file_name_insertion: Arquivo CSV onde os tempos de inserção são gravados.
     """
     print(f"Inserindo dados da semana {current_week}...")
-    if db["type"] == "InfluxDB":
-        db["function"](ROUND_NUMBER, BATCH_SIZE, data_to_insert_influx, current_week, FILE_INSERTION)
-    else:
-        db["function"](db["name"], db["type"], ROUND_NUMBER, BATCH_SIZE, data_to_insert_maria, current_week, FILE_INSERTION, db["port"])
+    with Profiler.profile(backend.name, f"insert_{current_week[0]}-{current_week[1]:02d}"):
+        backend.ingest_week(data_to_insert, current_week, ROUND_NUMBER, BATCH_SIZE, file_name_insertion)
+
+def report_encoding(databases: list = DATABASES) -> None:
+    """
+    Salva a cardinalidade de séries e os bytes por ponto de cada banco depois da inserção.
+    """
+    print("Calculando cardinalidade e bytes por ponto...")
+    SaveData.reset_csv(FILE_ENCODING, HEADER_ENCODING, result_table_names(databases))
+
+    for db in databases:
+        stats = create_backend(db).encoding_stats()
+        if stats is not None:
+            SaveData.save_encoding_stats_to_csv(db["name"], stats, FILE_ENCODING)
+            print(f"{db['name']}: {stats['series']} séries, {stats['bytes'] / max(stats['points'], 1):.2f} bytes/ponto")
+
+def check_partition_pruning(databases: list = DATABASES) -> None:
+    """
+    Confere a poda de partições das consultas de referência nos bancos particionados.
+    """
+    print("Conferindo poda de partições...")
+    SaveData.reset_csv(FILE_PRUNING, PartitionManager.HEADER_PRUNING, result_table_names(databases))
 
-def process_queries() -> None:
+    for db in databases:
+        if db["backend"] == "mariadb_structured":
+            create_backend(db).explain_pruning(QueryDatabase.SPECS, FILE_PRUNING)
+
+def process_queries(databases: list = DATABASES, query_types: list = None, rounds: int = ROUND_NUMBER - 1) -> None:
     """
     Processa as consultas nos bancos de dados e armazena os tempos de execução.
+
+    :param databases: Entradas de DATABASES a consultar.
+    :param query_types: Rótulos das consultas a rodar; None roda todas.
+    :param rounds: Número de rodadas.
     """
     print("Iniciando consultas...")
-    with open(FILE_QUERY, mode='w', newline='') as file:
-        writer = csv.writer(file)
-        writer.writerow(HEADER_QUERY)
-    
-    for round_number in range(1, ROUND_NUMBER):
-        FunctionQuery.query_mariadb("mariadb_innodb", 3308, round_number, FILE_QUERY)
-        FunctionQuery.query_mariadb_structured("mariadb_innodb_optimized", 3309, round_number, FILE_QUERY)
-        FunctionQuery.query_mariadb_structured("mariadb_myrocks", 3310, round_number, FILE_QUERY)
-        FunctionQuery.query_mariadb("mariadb_columnstore", 3307, round_number, FILE_QUERY)
-        FunctionQuery.query_influxdb(round_number, FILE_QUERY)
+    SaveData.reset_csv(FILE_QUERY, HEADER_QUERY, result_table_names(databases))
+
+    def selected(specs):
+        return [spec for spec in specs if query_types is None or spec.label in query_types]
+
+    backends = [create_backend(db) for db in databases]
+    workload = WorkloadGenerator(WORKLOAD_SEED, DATA_START, DATA_STOP, SENSORS)
+    for round_number in range(1, rounds + 1):
+        # A carga é sorteada com todas as consultas e filtrada depois, para manter os mesmos intervalos
+        specs = selected(workload.specs_for_round(round_number))
+        for backend in backends:
+            FunctionQuery.query_backend(backend, round_number, FILE_QUERY, specs=specs)
+
+        # Consultas fixas de painel passando pelo cache de resultados (linhas marcadas como hit/miss)
+        for backend in backends:
+            if backend.name in CACHED_DATABASES:
+                FunctionQuery.query_backend(backend, round_number, FILE_QUERY, cache=QUERY_CACHE, specs=selected(QueryDatabase.SPECS))
+
+    with open(FILE_CACHE, mode='w', newline='') as file:
+        csv.writer(file).writerow(HEADER_CACHE)
+    SaveData.save_cache_stats_to_csv("query_cache", QUERY_CACHE.stats(), FILE_CACHE)
+    print(f"Estatísticas do cache: {QUERY_CACHE.stats()}")
 
-def main() -> None:
+def check_equivalence(databases: list = DATABASES, query_types: list = EQUIVALENCE_QUERY_TYPES) -> None:
     """
-    Função principal para execução do script.
+    Confere se os bancos devolvem o mesmo resultado para as consultas de painel (QueryDatabase.DASHBOARD_SPECS).
+
+    :param databases: Entradas de DATABASES a comparar; o primeiro banco que responder é a referência.
+    :param query_types: Rótulos das consultas; por padrão, todas as de painel.
+    """
+    print("Conferindo equivalência dos resultados...")
+    with open(FILE_EQUIVALENCE, mode='w', newline='') as file:
+        csv.writer(file).writerow(EquivalenceCheck.HEADER_EQUIVALENCE)
+
+    specs = [spec for spec in QueryDatabase.SPECS if query_types is None or spec.label in query_types]
+    report = EquivalenceCheck.run([create_backend(db) for db in databases], specs, FILE_EQUIVALENCE)
+    print(f"{sum(row['equivalent'] for row in report)} de {len(report)} resultados equivalentes")
+
+def process_index_matrix() -> None:
+    """
+    Roda ingestão e consultas em cada variante de índices dos bancos estruturados e gera o relatório por índice.
+    """
+    print("Iniciando matriz de índices...")
+    with open(FILE_MATRIX_INSERTION, mode='w', newline='') as file:
+        csv.writer(file).writerow(HEADER_INSERTION)
+    with open(FILE_INDEX_MATRIX, mode='w', newline='') as file:
+        csv.writer(file).writerow(SchemaMatrix.HEADER_MATRIX)
+    with open(FILE_INDEX_REPORT, mode='w', newline='') as file:
+        csv.writer(file).writerow(SchemaMatrix.HEADER_INDEX_REPORT)
+
+    for db in DATABASES:
+        if db["backend"] != "mariadb_structured" or db.get("profile", "incremental") != "incremental":
+            continue
+        variants = [(name, schema) for name, _, schema in TableManager.index_variants(db["type"])]
+        results = SchemaMatrix.run(db, variants, insert_data, QueryDatabase.SPECS, INDEX_MATRIX_ROUNDS, FILE_INDEX_MATRIX, FILE_MATRIX_INSERTION)
+        SchemaMatrix.index_report(db["name"], results, FILE_INDEX_REPORT)
+
+def process_compression_matrix() -> None:
+    """
+    Roda ingestão e consultas em cada configuração de compressão e gera a tabela armazenamento x ingestão x latência.
+    """
+    print("Iniciando matriz de compressão...")
+    with open(FILE_COMPRESSION_INSERTION, mode='w', newline='') as file:
+        csv.writer(file).writerow(HEADER_INSERTION)
+    with open(FILE_COMPRESSION_MATRIX, mode='w', newline='') as file:
+        csv.writer(file).writerow(SchemaMatrix.HEADER_MATRIX)
+    with open(FILE_COMPRESSION_REPORT, mode='w', newline='') as file:
+        csv.writer(file).writerow(SchemaMatrix.HEADER_TRADEOFF)
+
+    for db in DATABASES:
+        if db["name"] not in COMPRESSION_DATABASES:
+            continue
+        variants = TableManager.compression_variants(db["type"], structured=db["backend"] == "mariadb_structured")
+        results = SchemaMatrix.run(db, variants, insert_data, QueryDatabase.SPECS, COMPRESSION_ROUNDS, FILE_COMPRESSION_MATRIX, FILE_COMPRESSION_INSERTION)
+        SchemaMatrix.tradeoff_report(db["name"], results, FILE_COMPRESSION_REPORT)
+
+def insertion_table_name(db: dict) -> str:
+    """
+    Nome com que o banco grava no CSV de inserção (o InfluxDB principal grava "InfluxDB").
+    """
+    return "InfluxDB" if db["name"] == "influxdb" else db["name"]
+
+def process_cardinality() -> None:
+    """
+    Insere dados sintéticos com cada nível de cardinalidade e mede ingestão, armazenamento e consultas por sensor.
+    """
+    print("Iniciando níveis de cardinalidade...")
+    with open(FILE_CARDINALITY_INSERTION, mode='w', newline='') as file:
+        csv.writer(file).writerow(HEADER_INSERTION)
+    with open(FILE_CARDINALITY, mode='w', newline='') as file:
+        csv.writer(file).writerow(HEADER_CARDINALITY)
+
+    for sensor_count in CARDINALITY_LEVELS:
+        benchmark = CardinalityBenchmark(sensor_count, CARDINALITY_START, CARDINALITY_WEEKS, CARDINALITY_INTERVAL, WORKLOAD_SEED)
+        for db in DATABASES:
+            if db["name"] not in CARDINALITY_DATABASES:
+                continue
+            print(f"{sensor_count} sensores em {db['name']}")
+            backend = create_backend(db)
+            backend.create_schema()
+
+            skip_rows = SchemaMatrix.count_rows(FILE_CARDINALITY_INSERTION)
+            row_count = 0
+            for week, rows in benchmark.weeks():
+                backend.ingest_week(rows, week, ROUND_NUMBER, BATCH_SIZE, FILE_CARDINALITY_INSERTION)
+                row_count += len(rows)
+            insertion_time = SchemaMatrix.ingest_time(FILE_CARDINALITY_INSERTION, insertion_table_name(db), skip_rows) + backend.finish_ingest()
+            stats = backend.encoding_stats() or {"series": None, "bytes": None}
+
+            for query_type, query_time, result_rows in CardinalityBenchmark.run_queries(backend, benchmark.specs(), CARDINALITY_ROUNDS):
+                SaveData.save_cardinality_result_to_csv(
+                    db["name"], sensor_count, row_count, insertion_time, stats["series"], stats["bytes"],
+                    query_type, query_time, result_rows, FILE_CARDINALITY
+                )
+
+def process_disorder_scenarios() -> None:
+    """
+    Insere os dados com cada cenário de desordem e compara vazão e armazenamento com a entrada ordenada.
+    """
+    print("Iniciando cenários de desordem...")
+    with open(FILE_DISORDER_INSERTION, mode='w', newline='') as file:
+        csv.writer(file).writerow(HEADER_INSERTION)
+    with open(FILE_DISORDER, mode='w', newline='') as file:
+        csv.writer(file).writerow(HEADER_DISORDER)
+
+    for db in DATABASES:
+        if db["name"] not in DISORDER_DATABASES:
+            continue
+        baseline = None
+        for scenario_name in IngestScenario.SCENARIOS:
+            print(f"Cenário {scenario_name} em {db['name']}")
+            backend = create_backend(db)
+            backend.create_schema()
+
+            skip_rows = SchemaMatrix.count_rows(FILE_DISORDER_INSERTION)
+            stats = insert_data(backend, FILE_DISORDER_INSERTION, IngestScenario.from_name(scenario_name, DISORDER_SEED))
+            insertion_time = SchemaMatrix.ingest_time(FILE_DISORDER_INSERTION, insertion_table_name(db), skip_rows) + backend.finish_ingest()
+            # Backends sem estatísticas de codificação ficam sem armazenamento (e sem razão) no CSV
+            storage_bytes = (backend.encoding_stats() or {"bytes": None})["bytes"]
+
+            rows_per_second = stats["rows"] / insertion_time if insertion_time else 0
+            if baseline is None:
+                baseline = (rows_per_second, storage_bytes)
+            SaveData.save_scenario_result_to_csv(
+                db["name"], scenario_name, stats, insertion_time, rows_per_second, storage_bytes,
+                rows_per_second / baseline[0] if baseline[0] else 0,
+                storage_bytes / baseline[1] if storage_bytes is not None and baseline[1] else None,
+                FILE_DISORDER
+            )
+
+def process_retention() -> None:
+    """
+    Expira as semanas mais antigas de cada banco e mede o delete, o espaço recuperado e o efeito nas consultas.
+    """
+    print("Iniciando retenção...")
+    with open(FILE_RETENTION, mode='w', newline='') as file:
+        csv.writer(file).writerow(RetentionManager.HEADER_RETENTION)
+
+    databases = [db for db in DATABASES if db["name"] in RETENTION_DATABASES]
+    # Limite na fronteira das partições, para o DROP PARTITION apagar partições inteiras
+    granularities = [
+        db.get("partitioning", PartitionManager.DEFAULT_GRANULARITY) for db in databases if db["backend"] == "mariadb_structured"
+    ]
+    cutoff = RetentionManager.cutoff(DATA_START, RETENTION_WEEKS, granularities)
+    weeks = RetentionManager.weeks_before(DATA_START, cutoff)
+    # Consulta de referência na última semana, fora do intervalo apagado
+    spec = QuerySpec("retention_last_week_mean_15min", "mean", None, DATA_STOP - timedelta(weeks=1), DATA_STOP, "15min")
+    for db in databases:
+        RetentionManager.run(
+            db, weeks, cutoff, spec, RETENTION_ROUNDS, RETENTION_DOWNSAMPLE, RETENTION_SETTLE_SECONDS, FILE_RETENTION
+        )
+
+def replay_trace(databases: list = None, trace_file: str = REPLAY_TRACE, speedup: float = REPLAY_SPEEDUP, clients: int = REPLAY_CLIENTS) -> None:
+    """
+    Reenvia o trace de consultas a cada banco, um depois do outro, e grava uma linha por requisição.
+
+    :param databases: Entradas de DATABASES; por padrão, as de REPLAY_DATABASES.
+    :param trace_file: CSV do trace (formato em TraceReplay).
+    :param speedup: Fator de aceleração dos intervalos entre as chegadas.
+    :param clients: Trabalhadores concorrentes; None usa um por cliente do trace.
+    """
+    if databases is None:
+        databases = [db for db in DATABASES if db["name"] in REPLAY_DATABASES]
+    requests = TraceReplay.load(trace_file)
+    print(f"Replay de {trace_file}: {len(requests)} requisições")
+    with open(FILE_REPLAY, mode='w', newline='') as file:
+        csv.writer(file).writerow(TraceReplay.HEADER_REPLAY)
+    for db in databases:
+        TraceReplay.run(db, requests, speedup, clients, FILE_REPLAY)
+
+def compare_runs(
+        table_names: list = None,
+        baseline: str = REGRESSION_BASELINE,
+        current: str = None,
+        alpha: float = REGRESSION_ALPHA,
+        threshold: float = REGRESSION_THRESHOLD,
+        min_samples: int = REGRESSION_MIN_SAMPLES,
+        allow_missing: bool = False
+    ) -> int:
+    """
+    Compara os tempos de inserção e consulta da execução atual com os da linha de base.
+
+    :param table_names: Nomes dos bancos nos CSVs (ver insertion_table_name), ou None para todos.
+    :param baseline: Diretório da linha de base (gravado com `compare --save`).
+    :param current: Diretório da execução atual; por padrão, o de FILE_QUERY.
+    :param alpha: Nível de significância.
+    :param threshold: Variação relativa mínima da mediana para apontar regressão ou melhoria.
+    :param min_samples: Amostras mínimas de cada lado para testar um grupo.
+    :param allow_missing: Não falha quando um grupo da linha de base some da execução atual.
+    :return: 2 se faltar a linha de base ou um CSV de alguma das execuções; 1 se houver alguma regressão
+        (ou grupo ausente, sem allow_missing); senão 0.
+    """
+    current = current or os.path.dirname(FILE_QUERY)
+    print(f"Comparando {current} com a linha de base {baseline}...")
+    try:
+        rows = RegressionCheck.run(baseline, current, FILE_REGRESSION, alpha, threshold, min_samples, table_names)
+    except FileNotFoundError as e:
+        print(f"Erro: {e}")
+        return 2
+    failing = {"regression"} if allow_missing else {"regression", "missing"}
+    return 1 if any(row["verdict"] in failing for row in rows) else 0
+
+def parse_week(text: str) -> tuple:
+    """
+    Converte "AAAA-SS" em (ano, semana ISO).
+    """
+    try:
+        year, week = text.split("-")
+        return int(year), int(week)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"semana inválida: {text} (use AAAA-SS, ex.: 2023-05)")
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Linha de comando: fases (create, insert, query, report, check, replay, compare) com seletores de banco, consulta, rodadas e semanas.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark de bancos de séries temporais.")
+    parser.add_argument("--profile", choices=Profiler.MODES, default=PROFILE_MODE,
+                        help="Grava perfis do cliente por banco, semana e consulta (antes do subcomando).")
+    parser.add_argument("--profile-dir", default=PROFILE_DIR, help="Diretório dos perfis e pilhas colapsadas.")
+    parser.add_argument("--profile-interval", type=float, default=PROFILE_INTERVAL,
+                        help="Intervalo de amostragem em segundos (modo sampling).")
+    subparsers = parser.add_subparsers(dest="command")
+
+    database_names = [db["name"] for db in DATABASES]
+    query_types = [spec.label for spec in QueryDatabase.SPECS]
+    commands = {
+        "all": "Roda o benchmark completo (padrão sem subcomando).",
+        "create": "Cria (ou recria) os bancos.",
+        "insert": "Insere o conjunto de dados.",
+        "query": "Roda as rodadas de consultas.",
+        "report": "Gera o relatório de codificação e confere a poda de partições.",
+        "check": "Confere se os bancos devolvem o mesmo resultado para as consultas.",
+        "replay": "Reenvia um trace de consultas com os intervalos originais entre as chegadas.",
+        "compare": "Compara a execução atual com uma linha de base; sai com código 1 se houver regressão e 2 se faltar um CSV.",
+    }
+    for command, help_text in commands.items():
+        subparser = subparsers.add_parser(command, help=help_text)
+        if command == "all":
+            # O benchmark completo sempre roda em todos os bancos (e recria todos os CSVs)
+            continue
+        subparser.add_argument("-b", "--backend", action="append", choices=database_names, metavar="NOME",
+                               help="Banco de DATABASES (pode repetir); padrão: todos.")
+        if command == "insert":
+            subparser.add_argument("--week-start", type=parse_week, metavar="AAAA-SS", help="Primeira semana ISO a inserir.")
+            subparser.add_argument("--week-stop", type=parse_week, metavar="AAAA-SS", help="Última semana ISO a inserir (inclusiva).")
+            subparser.add_argument("--dry-run", action="store_true",
+                                   help="Insere contra um sumidouro local e mede só o custo do lado do cliente.")
+        if command == "query":
+            subparser.add_argument("-q", "--query-type", action="append", choices=query_types, metavar="ROTULO",
+                                   help="Consulta de QueryDatabase.SPECS (pode repetir); padrão: todas.")
+        if command == "check":
+            # As consultas do estudo rotulam semanas e meses de forma diferente em cada banco (e o Flux
+            # marca as janelas pelo fim), então só as de painel têm resultados comparáveis
+            subparser.add_argument("-q", "--query-type", action="append", choices=EQUIVALENCE_QUERY_TYPES, metavar="ROTULO",
+                                   help="Consulta de QueryDatabase.DASHBOARD_SPECS (pode repetir); padrão: todas.")
+        if command == "query":
+            subparser.add_argument("-r", "--rounds", type=int, default=ROUND_NUMBER - 1, help="Número de rodadas.")
+        if command == "replay":
+            subparser.add_argument("-t", "--trace", default=REPLAY_TRACE, help="CSV do trace (timestamp, client_id, spec ou language e query).")
+            subparser.add_argument("-s", "--speedup", type=float, default=REPLAY_SPEEDUP, help="Fator de aceleração dos intervalos.")
+            subparser.add_argument("-c", "--clients", type=int, default=REPLAY_CLIENTS,
+                                   help="Trabalhadores concorrentes; padrão: um por cliente do trace.")
+        if command == "compare":
+            subparser.add_argument("--baseline", default=REGRESSION_BASELINE, help="Diretório da linha de base.")
+            subparser.add_argument("--current", help="Diretório da execução atual; padrão: output.")
+            subparser.add_argument("--alpha", type=float, default=REGRESSION_ALPHA, help="Nível de significância.")
+            subparser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                                   help="Variação relativa mínima da mediana (0.1 = 10%%).")
+            subparser.add_argument("--min-samples", type=int, default=REGRESSION_MIN_SAMPLES,
+                                   help="Amostras mínimas de cada lado para testar um grupo.")
+            subparser.add_argument("--allow-missing", action="store_true",
+                                   help="Não falha quando um grupo da linha de base some da execução atual.")
+            subparser.add_argument("--save", action="store_true",
+                                   help="Grava a execução atual como linha de base em vez de comparar.")
+    return parser
+
+def run_all() -> None:
+    """
+    Executa o benchmark completo: todas as fases em todos os bancos.
     """
     print("Start")
     create_tables()
     process_insertion()
+    report_encoding()
+    check_partition_pruning()
     process_queries()
+    if RUN_EQUIVALENCE_CHECK:
+        check_equivalence()
+    if RUN_INDEX_MATRIX:
+        process_index_matrix()
+    if RUN_COMPRESSION_MATRIX:
+        process_compression_matrix()
+    if RUN_DISORDER_SCENARIOS:
+        process_disorder_scenarios()
+    if RUN_RETENTION:
+        process_retention()
+    if RUN_CARDINALITY:
+        process_cardinality()
+    if RUN_TRACE_REPLAY:
+        replay_trace()
+    print("Processo finalizado.")
+
+def main(argv: list = None) -> int:
+    """
+    Função principal para execução do script.
+
+    Os clientes de cada banco só são importados pelos backends selecionados, então fases curtas em um
+    único banco não carregam as bibliotecas dos outros.
+    """
+    args = build_parser().parse_args(argv)
+    Profiler.configure(args.profile, args.profile_dir, args.profile_interval)
+    try:
+        return run_command(args)
+    finally:
+        Profiler.save()
+
+def run_command(args: argparse.Namespace) -> int:
+    """
+    Executa o subcomando escolhido na linha de comando.
+
+    :return: Código de saída do processo (diferente de 0 só no compare; ver compare_runs).
+    """
+    command = args.command or "all"
+    if command == "all":
+        run_all()
+        return 0
+
+    databases = select_databases(args.backend)
+    exit_code = 0
+    if command == "create":
+        create_tables(databases)
+    elif command == "insert":
+        weeks = None
+        if args.week_start is not None or args.week_stop is not None:
+            weeks = (args.week_start or (1, 1), args.week_stop or (9999, 53))
+        if args.dry_run:
+            process_dry_run(databases, weeks)
+        else:
+            process_insertion(databases, weeks)
+    elif command == "query":
+        process_queries(databases, args.query_type, args.rounds)
+    elif command == "report":
+        report_encoding(databases)
+        check_partition_pruning(databases)
+    elif command == "check":
+        check_equivalence(databases, args.query_type or EQUIVALENCE_QUERY_TYPES)
+    elif command == "replay":
+        replay_trace(databases if args.backend else None, args.trace, args.speedup, args.clients)
+    elif command == "compare" and args.save:
+        copied = RegressionCheck.save_baseline(args.current or os.path.dirname(FILE_QUERY), args.baseline)
+        print(f"Linha de base gravada em {args.baseline}: {len(copied)} arquivos")
+    elif command == "compare":
+        # O InfluxDB principal grava a inserção com outro nome (ver insertion_table_name)
+        table_names = None
+        if args.backend:
+            table_names = [db["name"] for db in databases] + [insertion_table_name(db) for db in databases]
+        exit_code = compare_runs(table_names, args.baseline, args.current, args.alpha, args.threshold, args.min_samples,
+                                 args.allow_missing)
     print("Processo finalizado.")
+    return exit_code
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main(sys.argv[1:]))
\ No newline at end of file
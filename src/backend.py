@@ -0,0 +1,146 @@
+import importlib
+
+# Registro dos backends: tipo -> "módulo:Classe". O módulo só é importado quando o tipo é usado.
+BACKENDS = {
+    "mariadb": "src.mariadb_backend:MariaDBBackend",
+    "mariadb_structured": "src.mariadb_backend:MariaDBStructuredBackend",
+    "mariadb_rollup": "src.mariadb_backend:MariaDBRollupBackend",
+    "mariadb_compact": "src.mariadb_backend:MariaDBCompactBackend",
+    "influxdb": "src.influxdb_backend:InfluxDBBackend",
+    "influxdb_rollup": "src.influxdb_backend:InfluxDBRollupBackend",
+    "sqlite": "src.sqlite_backend:SQLiteBackend",
+    "columnar": "src.columnar_backend:ColumnarBackend",
+}
+
+class Backend:
+    """
+    Interface comum dos bancos do benchmark.
+
+    Para adicionar um banco basta implementar uma subclasse e registrá-la com register_backend.
+    """
+
+    # Linguagem das consultas nativas aceitas por run_raw ("mariadb", "sqlite", "flux"), ou None
+    query_language = None
+
+    def __init__(self, name: str, engine: str, port: int = None, **options):
+        """
+        Args:
+            name (str): Nome do banco nos arquivos de resultado.
+            engine (str): Mecanismo de armazenamento (InnoDB, ROCKSDB, InfluxDB, ...).
+            port (int): Porta do container, quando houver.
+            options: Opções específicas do backend (entradas extras de DATABASES).
+        """
+        self.name = name
+        self.engine = engine
+        self.port = port
+        self.options = options
+
+    def create_schema(self) -> None:
+        """Cria (ou recria) o banco e a estrutura de armazenamento."""
+        raise NotImplementedError
+
+    def ingest_week(self, rows: list, current_week: tuple, round_number: int, batch_size: int, file_name_insertion: str) -> None:
+        """
+        Insere o lote de uma semana e salva o tempo de inserção.
+
+        Args:
+            rows (list): Linhas do CSV (timestamp, temperatura, sensor).
+            current_week (tuple): Ano e semana ISO do lote.
+            round_number (int): Número da rodada de inserção.
+            batch_size (int): Tamanho do lote de inserção.
+            file_name_insertion (str): Nome do arquivo CSV para salvar os dados de inserção.
+        """
+        raise NotImplementedError
+
+    def finish_ingest(self) -> float:
+        """
+        Chamado depois da última semana (ex.: cria os índices adiados pela carga em massa).
+
+        Returns:
+            float: Tempo gasto em segundos até os dados estarem prontos para consulta.
+        """
+        return 0.0
+
+    def connect(self) -> None:
+        """Abre a conexão usada pelas consultas."""
+
+    def close(self) -> None:
+        """Fecha a conexão usada pelas consultas."""
+
+    def compile_query(self, spec) -> str:
+        """Compila a QuerySpec para o dialeto do backend (também usado como chave do cache)."""
+        raise NotImplementedError
+
+    def run_query(self, spec, query: str) -> tuple:
+        """
+        Executa a consulta compilada.
+
+        Returns:
+            tuple: (resultados, tempo da consulta em segundos).
+        """
+        raise NotImplementedError
+
+    def run_raw(self, query: str) -> tuple:
+        """
+        Executa uma consulta já escrita na linguagem do banco (query_language), sem passar por QuerySpec.
+
+        Returns:
+            tuple: (resultados, tempo da consulta em segundos).
+        """
+        raise NotImplementedError(f"{self.name} não aceita consultas nativas")
+
+    def storage_size(self) -> str:
+        """Retorna o espaço ocupado pelo banco em formato legível."""
+        raise NotImplementedError
+
+    def encoding_stats(self) -> dict:
+        """
+        Retorna pontos, séries e bytes ocupados pelos dados brutos, ou None se o backend não informa.
+
+        Returns:
+            dict: {"points": int, "series": int, "bytes": int}.
+        """
+        return None
+
+    def downsample_before(self, cutoff) -> bool:
+        """
+        Grava os agregados de 15 minutos dos dados anteriores a `cutoff` (ver RollupManager), antes da retenção.
+
+        Returns:
+            bool: False se o backend não tem onde guardar os agregados.
+        """
+        return False
+
+    def downsample_bytes(self) -> int:
+        """
+        Bytes dos agregados do downsampling que ficam fora dos bytes de encoding_stats.
+
+        É 0 quando os agregados ficam no mesmo banco medido por encoding_stats (MariaDB, SQLite).
+        """
+        return 0
+
+    def expire_before(self, cutoff) -> tuple:
+        """
+        Apaga os dados anteriores a `cutoff` com o mecanismo nativo do banco.
+
+        Returns:
+            tuple: (mecanismo usado, ex.: "delete", "drop_partition" ou "drop_partition+delete"; linhas removidas
+            uma a uma pelo delete, ou None se o banco não informa e todas as removidas contam para o mecanismo).
+            As linhas removidas com partições inteiras são a diferença para o total de pontos removidos.
+        """
+        raise NotImplementedError
+
+def register_backend(kind: str, path: str) -> None:
+    """Registra um backend no formato "módulo:Classe"."""
+    BACKENDS[kind] = path
+
+def create_backend(db: dict) -> Backend:
+    """
+    Instancia o backend de uma entrada de DATABASES.
+
+    :param db: Dicionário com "name", "type", "backend" e, opcionalmente, "port" e opções do backend.
+    """
+    module_name, class_name = BACKENDS[db["backend"]].split(":")
+    backend_class = getattr(importlib.import_module(module_name), class_name)
+    options = {key: value for key, value in db.items() if key not in ("name", "type", "port", "backend")}
+    return backend_class(db["name"], db["type"], db.get("port"), **options)
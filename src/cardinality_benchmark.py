@@ -0,0 +1,92 @@
+import random
+import statistics
+from datetime import datetime, timedelta
+from src.query_spec import QuerySpec
+
+class CardinalityBenchmark:
+    """
+    Modo de alta cardinalidade: dados sintéticos com N sensores num intervalo de tempo fixo.
+
+    O número de sensores varia por nível, enquanto o intervalo e a frequência de amostragem ficam
+    constantes, então o custo medido vem só da dimensão de sensores.
+    """
+
+    def __init__(self, sensor_count: int, start: datetime, weeks: int, interval: timedelta, seed: int):
+        """
+        Args:
+            sensor_count (int): Número de sensores sintéticos.
+            start (datetime): Início dos dados (segunda-feira, para as semanas ficarem completas).
+            weeks (int): Semanas de dados.
+            interval (timedelta): Intervalo entre leituras de cada sensor.
+            seed (int): Semente dos valores e dos sensores sorteados nas consultas.
+        """
+        self.sensor_count = sensor_count
+        self.start = start
+        self.stop = start + timedelta(weeks=weeks)
+        self.interval = interval
+        self.seed = seed
+        # Nomes curtos para caber em VARCHAR(10) e no SMALLINT do schema compacto
+        self.sensors = [f"S{index:05d}" for index in range(sensor_count)]
+
+    def weeks(self):
+        """
+        Gera as linhas (timestamp, temperatura, sensor) de cada semana, ordenadas pelo tempo.
+
+        Cada sensor tem uma temperatura base própria, para que o top-K tenha resposta estável.
+        """
+        import numpy as np
+        rng = np.random.default_rng(self.seed)
+        base = rng.uniform(10.0, 30.0, self.sensor_count)
+        week_start = self.start
+        while week_start < self.stop:
+            week_stop = min(week_start + timedelta(weeks=1), self.stop)
+            rows = []
+            timestamp = week_start
+            while timestamp < week_stop:
+                text = timestamp.strftime("%Y-%m-%d %H:%M:%S")
+                values = base + rng.normal(0.0, 1.0, self.sensor_count)
+                rows.extend(zip([text] * self.sensor_count, np.round(values, 2).astype(str).tolist(), self.sensors))
+                timestamp += self.interval
+            yield week_start.isocalendar()[:2], rows
+            week_start = week_stop
+
+    def specs(self, subset_size: int = 10, top: int = 10) -> list:
+        """
+        Consultas por sensor e entre sensores do nível.
+
+        Returns:
+            list: Último valor por sensor, top-K mais quentes no último dia, média por sensor de um
+            subconjunto sorteado e a leitura bruta de um sensor no último dia.
+        """
+        rng = random.Random(f"{self.seed}-{self.sensor_count}")
+        last_day = self.stop - timedelta(days=1)
+        subset = tuple(sorted(rng.sample(self.sensors, min(subset_size, self.sensor_count))))
+        return [
+            QuerySpec("last_value_per_sensor", "last", per_sensor=True),
+            QuerySpec(f"top_{top}_hottest_day", "max", start=last_day, stop=self.stop, per_sensor=True, top=top),
+            QuerySpec(f"mean_subset_{len(subset)}", "mean", sensors=subset, per_sensor=True),
+            QuerySpec("raw_one_sensor_day", "raw", rng.choice(self.sensors), last_day, self.stop),
+        ]
+
+    @staticmethod
+    def run_queries(backend, specs: list, rounds: int) -> list:
+        """
+        Roda cada consulta `rounds` vezes no backend.
+
+        Returns:
+            list: Tuplas (rótulo, mediana do tempo, linhas retornadas).
+        """
+        measurements = []
+        backend.connect()
+        try:
+            for spec in specs:
+                query = backend.compile_query(spec)
+                times = []
+                for _ in range(rounds):
+                    results, query_time = backend.run_query(spec, query)
+                    times.append(query_time)
+                measurements.append((spec.label, statistics.median(times), len(results)))
+                print(f"{backend.name} {spec.label}: {statistics.median(times):.4f} segundos, {len(results)} linhas")
+        finally:
+            backend.close()
+        return measurements
@@ -0,0 +1,91 @@
+import configparser
+import time
+import numpy as np
+import psutil
+from src.backend import Backend
+from src.columnar_engine import ColumnarEngine
+from src.insert_database import InsertDatabase
+from src.query_cache import QueryCache
+from src.query_database import QueryDatabase
+from src.save_data import SaveData
+
+class ColumnarBackend(Backend):
+    """
+    Backend de referência com o motor colunar NumPy em processo (ver ColumnarEngine).
+
+    Opções:
+        path (str): Diretório dos segmentos (padrão: [columnar] path do config.ini ou output/<nome>).
+        compress (bool): Grava blocos comprimidos em vez de arquivos brutos com memory-map.
+    """
+
+    def __init__(self, name, engine, port=None, **options):
+        super().__init__(name, engine, port, **options)
+        config = configparser.ConfigParser()
+        config.read('config.ini')
+        directory = options.get("path") or config.get("columnar", "path", fallback=f"output/{name}")
+        self.engine_store = ColumnarEngine(directory, compress=options.get("compress", False))
+
+    def create_schema(self) -> None:
+        print(f"----------------------\nCriando {self.name}")
+        self.engine_store.reset()
+        print(f"Diretório de segmentos criado em {self.engine_store.directory}.")
+
+    def ingest_week(self, rows, current_week, round_number, batch_size, file_name_insertion) -> None:
+        if not self.engine_store.loaded:
+            self.engine_store.load()
+        columns = np.array(rows, dtype=object)
+
+        start_time = time.time()
+        for i in range(0, len(columns), batch_size):
+            batch = columns[i:i + batch_size]
+            timestamps = batch[:, 0].astype("datetime64[s]").astype(np.int64)
+            values = batch[:, 1].astype(np.float32)
+            self.engine_store.append(batch[:, 2].astype(str), timestamps, values)
+
+        end_time = time.time()
+        insertion_time = end_time - start_time
+        print(f"Tempo de inserção no {self.name}: {insertion_time} segundos")
+
+        storage = self.storage_size()
+        memory_info = psutil.virtual_memory()
+        swap_info = psutil.swap_memory()
+
+        ram_usage = memory_info.used / (1024 ** 3)  # Converte para GB
+        swap_usage = swap_info.used / (1024 ** 3)  # Converte para GB
+
+        SaveData.save_insertion_time_to_csv(self.name, insertion_time, current_week, round_number, ram_usage, swap_usage, storage, file_name_insertion)
+        QueryCache.publish_week_changed(self.name, {row[2] for row in rows}, current_week)
+
+    def connect(self) -> None:
+        self.engine_store.load()
+
+    def compile_query(self, spec) -> str:
+        # Não há linguagem de consulta; a representação da spec serve de chave do cache
+        return repr(spec)
+
+    def run_query(self, spec, query) -> tuple:
+        start = QueryDatabase.to_epoch(spec.start) if spec.start is not None else None
+        stop = QueryDatabase.to_epoch(spec.stop) if spec.stop is not None else None
+        start_time = time.time()
+        results = self.engine_store.query(spec, start, stop)
+        query_time = time.time() - start_time
+        return results, query_time
+
+    def storage_size(self) -> str:
+        return InsertDatabase.convert_size(self.engine_store.storage_bytes())
+
+    def encoding_stats(self) -> dict:
+        if not self.engine_store.loaded:
+            self.engine_store.load()
+        segments = self.engine_store.segments.values()
+        return {
+            "points": sum(segment.size for segment in segments),
+            "series": len(segments),
+            "bytes": self.engine_store.storage_bytes(),
+        }
+
+    def expire_before(self, cutoff) -> tuple:
+        if not self.engine_store.loaded:
+            self.engine_store.load()
+        removed = self.engine_store.expire_before(QueryDatabase.to_epoch(cutoff))
+        return "segment_trim", removed
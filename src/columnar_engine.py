@@ -0,0 +1,465 @@
+import json
+import os
+from datetime import datetime, timedelta
+import numpy as np
+from src.query_spec import QuerySpec
+
+class SensorSegment:
+    """
+    Série de um sensor: timestamps int64 (segundos desde a época, UTC) ordenados e valores float32.
+
+    Mantém resumos por bloco (min/max/soma/contagem) para responder agregações de intervalo
+    sem percorrer os blocos inteiros.
+    """
+
+    BLOCK_SIZE = 4096
+
+    def __init__(self, timestamps: np.ndarray = None, values: np.ndarray = None):
+        self.timestamps = timestamps if timestamps is not None else np.empty(0, dtype=np.int64)
+        self.values = values if values is not None else np.empty(0, dtype=np.float32)
+        self.size = len(self.timestamps)
+        self.build_summaries(0)
+
+    def append(self, timestamps: np.ndarray, values: np.ndarray) -> bool:
+        """
+        Acrescenta um lote (já ordenado) ao segmento.
+
+        Returns:
+            bool: True se o lote chegou em ordem (apenas anexado), False se o segmento foi reordenado.
+        """
+        in_order = self.size == 0 or timestamps[0] >= self.timestamps[self.size - 1]
+        old_size = self.size
+        new_size = old_size + len(timestamps)
+
+        if new_size > len(self.timestamps) or not self.timestamps.flags.writeable:
+            capacity = max(new_size, 2 * len(self.timestamps), self.BLOCK_SIZE)
+            grown_timestamps = np.empty(capacity, dtype=np.int64)
+            grown_values = np.empty(capacity, dtype=np.float32)
+            grown_timestamps[:old_size] = self.timestamps[:old_size]
+            grown_values[:old_size] = self.values[:old_size]
+            self.timestamps, self.values = grown_timestamps, grown_values
+
+        self.timestamps[old_size:new_size] = timestamps
+        self.values[old_size:new_size] = values
+        self.size = new_size
+
+        if in_order:
+            self.build_summaries(old_size // self.BLOCK_SIZE)
+        else:
+            order = np.argsort(self.timestamps[:new_size], kind="stable")
+            self.timestamps[:new_size] = self.timestamps[:new_size][order]
+            self.values[:new_size] = self.values[:new_size][order]
+            self.build_summaries(0)
+        return in_order
+
+    def build_summaries(self, first_block: int) -> None:
+        """Recalcula os resumos a partir do bloco `first_block` (os anteriores não mudaram)."""
+        values = self.values[:self.size]
+        if first_block == 0 or not hasattr(self, "block_min"):
+            first_block = 0
+            self.block_min = np.empty(0, dtype=np.float32)
+            self.block_max = np.empty(0, dtype=np.float32)
+            self.block_sum = np.empty(0, dtype=np.float64)
+            self.block_count = np.empty(0, dtype=np.int64)
+
+        tail = values[first_block * self.BLOCK_SIZE:]
+        if len(tail) == 0:
+            return
+        starts = np.arange(0, len(tail), self.BLOCK_SIZE)
+        self.block_min = np.concatenate([self.block_min[:first_block], np.minimum.reduceat(tail, starts)])
+        self.block_max = np.concatenate([self.block_max[:first_block], np.maximum.reduceat(tail, starts)])
+        self.block_sum = np.concatenate([self.block_sum[:first_block], np.add.reduceat(tail.astype(np.float64), starts)])
+        counts = np.diff(np.append(starts, len(tail)))
+        self.block_count = np.concatenate([self.block_count[:first_block], counts])
+
+    def range_indexes(self, start: int = None, stop: int = None) -> tuple:
+        """Busca binária do intervalo [start, stop) nos timestamps."""
+        timestamps = self.timestamps[:self.size]
+        lo = 0 if start is None else int(np.searchsorted(timestamps, start, side="left"))
+        hi = self.size if stop is None else int(np.searchsorted(timestamps, stop, side="left"))
+        return lo, hi
+
+    def slice(self, start: int = None, stop: int = None) -> tuple:
+        """Retorna (timestamps, valores) do intervalo."""
+        lo, hi = self.range_indexes(start, stop)
+        return self.timestamps[lo:hi], self.values[lo:hi]
+
+    def summarize(self, start: int = None, stop: int = None) -> tuple:
+        """
+        Retorna (contagem, soma, mínimo, máximo) do intervalo.
+
+        Os blocos totalmente contidos no intervalo usam os resumos; só as bordas são lidas.
+        """
+        lo, hi = self.range_indexes(start, stop)
+        if hi <= lo:
+            return 0, 0.0, np.inf, -np.inf
+
+        first_full = -(-lo // self.BLOCK_SIZE)
+        last_full = hi // self.BLOCK_SIZE
+        if first_full >= last_full:
+            values = self.values[lo:hi]
+            return hi - lo, float(values.sum(dtype=np.float64)), float(values.min()), float(values.max())
+
+        edges = np.concatenate([
+            self.values[lo:first_full * self.BLOCK_SIZE],
+            self.values[last_full * self.BLOCK_SIZE:hi],
+        ])
+        count = int(self.block_count[first_full:last_full].sum()) + len(edges)
+        total = float(self.block_sum[first_full:last_full].sum()) + float(edges.sum(dtype=np.float64))
+        minimum = float(self.block_min[first_full:last_full].min())
+        maximum = float(self.block_max[first_full:last_full].max())
+        if len(edges):
+            minimum = min(minimum, float(edges.min()))
+            maximum = max(maximum, float(edges.max()))
+        return count, total, minimum, maximum
+
+class ColumnarEngine:
+    """
+    Motor colunar em processo, só de acréscimo, usado como referência de limite inferior.
+
+    Os dados ficam em segmentos por sensor; a persistência grava arquivos binários brutos,
+    abertos com memory-map, ou blocos comprimidos (np.savez_compressed) quando `compress=True`.
+    """
+
+    MANIFEST = "manifest.json"
+    # 1970-01-05 foi segunda-feira: base para alinhar semanas ISO
+    MONDAY_OFFSET = 4 * 86400
+    WEEK_SECONDS = 7 * 86400
+    EPOCH = datetime(1970, 1, 1)
+
+    def __init__(self, directory: str, compress: bool = False):
+        self.directory = directory
+        self.compress = compress
+        self.segments = {}
+        self.files = {}
+        self.loaded = False
+
+    def manifest_path(self) -> str:
+        return os.path.join(self.directory, self.MANIFEST)
+
+    def reset(self) -> None:
+        """Apaga os dados persistidos e recria o diretório vazio."""
+        if os.path.isdir(self.directory):
+            for file_name in os.listdir(self.directory):
+                os.remove(os.path.join(self.directory, file_name))
+        os.makedirs(self.directory, exist_ok=True)
+        self.segments, self.files = {}, {}
+        self.loaded = True
+        self.save_manifest()
+
+    def save_manifest(self) -> None:
+        with open(self.manifest_path(), "w") as file:
+            json.dump({"compress": self.compress, "sensors": self.files}, file)
+
+    def load(self) -> None:
+        """Carrega os segmentos do disco (memory-map quando não comprimido)."""
+        with open(self.manifest_path()) as file:
+            manifest = json.load(file)
+        self.compress = manifest["compress"]
+        self.files = manifest["sensors"]
+        self.segments = {}
+        for sensor, stem in self.files.items():
+            timestamps, values = self.read_segment(stem)
+            self.segments[sensor] = SensorSegment(timestamps, values)
+        self.loaded = True
+
+    def read_segment(self, stem: str) -> tuple:
+        path = os.path.join(self.directory, stem)
+        if not self.compress:
+            if not os.path.exists(path + ".ts") or os.path.getsize(path + ".ts") == 0:
+                return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+            return (
+                np.memmap(path + ".ts", dtype=np.int64, mode="r"),
+                np.memmap(path + ".val", dtype=np.float32, mode="r"),
+            )
+
+        chunks = sorted(name for name in os.listdir(self.directory) if name.startswith(stem + "_"))
+        timestamps, values = [], []
+        for chunk in chunks:
+            with np.load(os.path.join(self.directory, chunk)) as data:
+                timestamps.append(np.cumsum(data["ts_delta"]))
+                values.append(data["val"])
+        if not timestamps:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        timestamps, values = np.concatenate(timestamps), np.concatenate(values)
+        if np.any(np.diff(timestamps) < 0):
+            order = np.argsort(timestamps, kind="stable")
+            timestamps, values = timestamps[order], values[order]
+        return timestamps, values
+
+    def append(self, sensors: np.ndarray, timestamps: np.ndarray, values: np.ndarray) -> None:
+        """
+        Acrescenta um lote (de qualquer ordem) e persiste o que mudou.
+
+        Args:
+            sensors (np.ndarray): Nome do sensor de cada amostra.
+            timestamps (np.ndarray): Timestamps int64 em segundos desde a época.
+            values (np.ndarray): Valores float32.
+        """
+        names, inverse = np.unique(sensors, return_inverse=True)
+        for index, sensor in enumerate(names):
+            mask = inverse == index
+            order = np.argsort(timestamps[mask], kind="stable")
+            sensor_timestamps = timestamps[mask][order]
+            sensor_values = values[mask][order]
+
+            sensor = str(sensor)
+            if sensor not in self.segments:
+                self.segments[sensor] = SensorSegment()
+                self.files[sensor] = f"sensor_{len(self.files):05d}"
+                self.save_manifest()
+            in_order = self.segments[sensor].append(sensor_timestamps, sensor_values)
+            self.persist(sensor, sensor_timestamps, sensor_values, in_order)
+
+    def persist(self, sensor: str, timestamps: np.ndarray, values: np.ndarray, in_order: bool) -> None:
+        """Grava o lote: anexa aos arquivos brutos, ou reescreve o segmento se chegou fora de ordem."""
+        path = os.path.join(self.directory, self.files[sensor])
+        if self.compress:
+            chunk = len([name for name in os.listdir(self.directory) if name.startswith(self.files[sensor] + "_")])
+            deltas = np.diff(timestamps, prepend=np.int64(0))
+            np.savez_compressed(f"{path}_{chunk:06d}.npz", ts_delta=deltas, val=values)
+            return
+
+        segment = self.segments[sensor]
+        mode = "ab" if in_order else "wb"
+        if not in_order:
+            timestamps, values = segment.timestamps[:segment.size], segment.values[:segment.size]
+        with open(path + ".ts", mode) as file:
+            file.write(np.ascontiguousarray(timestamps, dtype=np.int64).tobytes())
+        with open(path + ".val", mode) as file:
+            file.write(np.ascontiguousarray(values, dtype=np.float32).tobytes())
+
+    def expire_before(self, cutoff: int) -> int:
+        """
+        Descarta as amostras anteriores a `cutoff` (segundos desde a época) e regrava os segmentos afetados.
+
+        Returns:
+            int: Amostras descartadas.
+        """
+        removed = 0
+        for sensor, segment in self.segments.items():
+            _, first_kept = segment.range_indexes(stop=cutoff)
+            if first_kept == 0:
+                continue
+            timestamps = np.array(segment.timestamps[first_kept:segment.size])
+            values = np.array(segment.values[first_kept:segment.size])
+            self.segments[sensor] = SensorSegment(timestamps, values)
+            self.rewrite(sensor, timestamps, values)
+            removed += first_kept
+        return removed
+
+    def rewrite(self, sensor: str, timestamps: np.ndarray, values: np.ndarray) -> None:
+        """
+        Regrava o segmento inteiro de um sensor.
+
+        Os arquivos brutos são gravados num temporário e trocados com os.replace, então quem já abriu
+        o segmento com memory-map continua lendo a versão anterior.
+        """
+        path = os.path.join(self.directory, self.files[sensor])
+        if self.compress:
+            for name in os.listdir(self.directory):
+                if name.startswith(self.files[sensor] + "_"):
+                    os.remove(os.path.join(self.directory, name))
+            deltas = np.diff(timestamps, prepend=np.int64(0))
+            np.savez_compressed(f"{path}_{0:06d}.npz", ts_delta=deltas, val=values)
+            return
+
+        for suffix, array, dtype in ((".ts", timestamps, np.int64), (".val", values, np.float32)):
+            with open(path + suffix + ".tmp", "wb") as file:
+                file.write(np.ascontiguousarray(array, dtype=dtype).tobytes())
+            os.replace(path + suffix + ".tmp", path + suffix)
+
+    def storage_bytes(self) -> int:
+        """Bytes ocupados no disco."""
+        if not os.path.isdir(self.directory):
+            return 0
+        return sum(os.path.getsize(os.path.join(self.directory, name)) for name in os.listdir(self.directory))
+
+    def selected_segments(self, sensor: str = None, sensors: tuple = None) -> list:
+        if sensor is not None:
+            return [(sensor, self.segments[sensor])] if sensor in self.segments else []
+        if sensors is not None:
+            return [(name, self.segments[name]) for name in sorted(set(sensors)) if name in self.segments]
+        return sorted(self.segments.items())
+
+    @staticmethod
+    def combine(aggregate: str, count: int, total: float, minimum: float, maximum: float) -> tuple:
+        """Linha do resultado de uma agregação sem agrupamento temporal."""
+        if aggregate == "count":
+            return (count,)
+        if aggregate == "max_min":
+            return (maximum, minimum) if count else (None, None)
+        if aggregate == "max":
+            return (maximum,) if count else (None,)
+        if aggregate == "sum":
+            return (total,) if count else (None,)
+        return (total / count,) if count else (None,)
+
+    def query_per_sensor(self, spec, segments: list, start: int = None, stop: int = None) -> list:
+        """Consultas por sensor: último ponto, agregados por sensor e top-K."""
+        rows = []
+        for sensor, segment in segments:
+            if spec.aggregate == "last":
+                lo, hi = segment.range_indexes(start, stop)
+                if hi > lo:
+                    rows.append((sensor, int(segment.timestamps[hi - 1]), float(segment.values[hi - 1])))
+                continue
+            summary = segment.summarize(start, stop)
+            if summary[0]:
+                rows.append((sensor,) + self.combine(spec.aggregate, *summary))
+
+        if spec.top is not None:
+            rows.sort(key=lambda row: row[1], reverse=True)
+            return rows[:spec.top]
+        return rows
+
+    @classmethod
+    def bucket_keys(cls, timestamps: np.ndarray, bucket: str) -> np.ndarray:
+        """Início do intervalo (segundos desde a época) de cada timestamp."""
+        if bucket == "15min":
+            return timestamps // 900 * 900
+        if bucket == "hour":
+            return timestamps // 3600 * 3600
+        if bucket == "week":
+            return (timestamps - cls.MONDAY_OFFSET) // cls.WEEK_SECONDS * cls.WEEK_SECONDS + cls.MONDAY_OFFSET
+        if bucket == "month":
+            months = timestamps.astype("datetime64[s]").astype("datetime64[M]")
+            return months.astype("datetime64[s]").astype(np.int64)
+        raise ValueError(f"Agrupamento desconhecido: {bucket}")
+
+    def query(self, spec, start: int = None, stop: int = None) -> list:
+        """
+        Executa uma QuerySpec com kernels vetorizados.
+
+        Args:
+            spec (QuerySpec): Consulta a executar.
+            start (int): Início do intervalo em segundos desde a época, ou None.
+            stop (int): Fim (exclusivo) do intervalo em segundos desde a época, ou None.
+
+        Returns:
+            list: Linhas do resultado, no mesmo formato das consultas SQL.
+        """
+        if spec.aggregate == "pivot":
+            return self.query_pivot(spec, start, stop)
+        segments = self.selected_segments(spec.sensor, spec.sensors)
+        if spec.per_sensor:
+            return self.query_per_sensor(spec, segments, start, stop)
+        if spec.aggregate in ("moving_mean", "derivative"):
+            return self.query_windows(spec, segments, start, stop)
+
+        if spec.aggregate == "raw":
+            rows = []
+            for sensor, segment in segments:
+                timestamps, values = segment.slice(start, stop)
+                rows.extend(zip(timestamps.tolist(), values.tolist(), [sensor] * len(timestamps)))
+            return rows
+
+        if spec.bucket is None:
+            count, total, minimum, maximum = 0, 0.0, np.inf, -np.inf
+            for _, segment in segments:
+                part = segment.summarize(start, stop)
+                count += part[0]
+                total += part[1]
+                minimum = min(minimum, part[2])
+                maximum = max(maximum, part[3])
+            return [self.combine(spec.aggregate, count, total, minimum, maximum)]
+
+        slices = [segment.slice(start, stop) for _, segment in segments]
+        if not slices or not any(len(timestamps) for timestamps, _ in slices):
+            return self.fill_gaps(np.empty(0, dtype=np.int64), [], spec.bucket, start, stop) if spec.aggregate == "gap_fill" else []
+        timestamps = np.concatenate([timestamps for timestamps, _ in slices])
+        values = np.concatenate([values for _, values in slices]).astype(np.float64)
+
+        keys = self.bucket_keys(timestamps, spec.bucket)
+        if spec.aggregate == "percentile":
+            labels, results = self.bucket_percentiles(keys, values, spec.percentile)
+        elif len(slices) == 1:
+            # Um único sensor já está ordenado: fronteiras dos intervalos por diferença
+            boundaries = np.concatenate([[0], np.flatnonzero(np.diff(keys)) + 1])
+            labels = keys[boundaries]
+            if spec.aggregate == "max":
+                results = np.maximum.reduceat(values, boundaries)
+            else:
+                sums = np.add.reduceat(values, boundaries)
+                counts = np.diff(np.append(boundaries, len(keys)))
+        else:
+            labels, inverse = np.unique(keys, return_inverse=True)
+            if spec.aggregate == "max":
+                results = np.full(len(labels), -np.inf)
+                np.maximum.at(results, inverse, values)
+            else:
+                sums = np.bincount(inverse, weights=values)
+                counts = np.bincount(inverse)
+
+        if spec.aggregate not in ("max", "percentile"):
+            results = sums / counts if spec.aggregate in ("mean", "gap_fill") else sums
+        if spec.aggregate == "gap_fill":
+            return self.fill_gaps(labels, results, spec.bucket, start, stop)
+        return [
+            (self.EPOCH + timedelta(seconds=int(label)), float(result))
+            for label, result in zip(labels, results)
+        ]
+
+    @staticmethod
+    def bucket_percentiles(keys: np.ndarray, values: np.ndarray, percentile: int) -> tuple:
+        """Percentil por intervalo pelo posto mais próximo: posição k = ceil(p * n / 100) entre os valores ordenados."""
+        order = np.lexsort((values, keys))
+        keys, values = keys[order], values[order]
+        boundaries = np.concatenate([[0], np.flatnonzero(np.diff(keys)) + 1])
+        counts = np.diff(np.append(boundaries, len(keys)))
+        ranks = (percentile * counts + 99) // 100
+        return keys[boundaries], values[boundaries + ranks - 1]
+
+    def fill_gaps(self, labels: np.ndarray, results: np.ndarray, bucket: str, start: int, stop: int) -> list:
+        """Todos os intervalos de [início alinhado, fim), repetindo a última média nos vazios (nulos antes do primeiro dado)."""
+        width = QuerySpec.FIXED_BUCKETS[bucket]
+        series = np.arange(start // width * width, stop, width)
+        positions = np.full(len(series), -1)
+        positions[np.searchsorted(series, labels)] = np.arange(len(labels))
+        if len(series):
+            positions = np.maximum.accumulate(positions)
+        return [
+            (self.EPOCH + timedelta(seconds=int(label)), float(results[position]) if position >= 0 else None)
+            for label, position in zip(series, positions)
+        ]
+
+    def query_windows(self, spec, segments: list, start: int = None, stop: int = None) -> list:
+        """Média móvel (a partir do ponto que completa a janela) ou derivada por segundo, por sensor."""
+        rows = []
+        for sensor, segment in segments:
+            timestamps, values = segment.slice(start, stop)
+            values = values.astype(np.float64)
+            if spec.aggregate == "moving_mean":
+                if len(values) < spec.window:
+                    continue
+                sums = np.cumsum(np.concatenate([[0.0], values]))
+                results = (sums[spec.window:] - sums[:-spec.window]) / spec.window
+                timestamps = timestamps[spec.window - 1:]
+            else:
+                if len(values) < 2:
+                    continue
+                results = np.diff(values) / np.diff(timestamps)
+                timestamps = timestamps[1:]
+            rows.extend(zip([sensor] * len(timestamps), timestamps.tolist(), results.tolist()))
+        return rows
+
+    def query_pivot(self, spec, start: int = None, stop: int = None) -> list:
+        """Média por intervalo de cada sensor de spec.sensors, um sensor por coluna (nulo sem dados)."""
+        columns = {}
+        for sensor in spec.sensors:
+            segment = self.segments.get(sensor)
+            if segment is None:
+                continue
+            timestamps, values = segment.slice(start, stop)
+            if len(timestamps) == 0:
+                continue
+            keys = self.bucket_keys(timestamps, spec.bucket)
+            boundaries = np.concatenate([[0], np.flatnonzero(np.diff(keys)) + 1])
+            means = np.add.reduceat(values.astype(np.float64), boundaries) / np.diff(np.append(boundaries, len(keys)))
+            columns[sensor] = dict(zip(keys[boundaries].tolist(), means.tolist()))
+
+        labels = sorted(set().union(*columns.values()))
+        return [
+            (self.EPOCH + timedelta(seconds=int(label)),) + tuple(columns.get(sensor, {}).get(label) for sensor in spec.sensors)
+            for label in labels
+        ]
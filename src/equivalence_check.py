@@ -0,0 +1,143 @@
+import calendar
+import csv
+import math
+from datetime import date, datetime
+from decimal import Decimal
+
+class EquivalenceCheck:
+    """
+    Confere se os bancos devolvem o mesmo resultado para as mesmas consultas.
+
+    Os resultados são normalizados para tuplas comparáveis (timestamps em segundos desde a época,
+    UTC; números como float) e comparados com os do primeiro banco que respondeu, com tolerância
+    para as diferenças de arredondamento (o MariaDB e o motor colunar guardam FLOAT de 4 bytes).
+    Os DATETIME do MariaDB são lidos como UTC, então a sessão do servidor precisa estar em UTC.
+    Só as consultas de painel (QueryDatabase.DASHBOARD_SPECS) são comparáveis: nas do estudo, cada banco
+    rotula semanas e meses de um jeito (YEARWEEK, texto, ano e mês em colunas separadas) e o Flux marca as
+    janelas pelo fim.
+    """
+
+    HEADER_EQUIVALENCE = ["query_type", "table_name", "reference", "rows", "reference_rows", "equivalent", "difference"]
+
+    # Colunas do Flux na ordem das colunas do SQL, por agregação
+    FLUX_COLUMNS = {
+        "raw": ["_time", "_value", "sensor_name"],
+        "last": ["sensor_name", "_time", "_value"],
+        "moving_mean": ["sensor_name", "_time", "_value"],
+        "derivative": ["sensor_name", "_time", "_value"],
+        "percentile": ["_time", "_value"],
+        "gap_fill": ["_time", "_value"],
+    }
+
+    @staticmethod
+    def normalize_value(value):
+        if isinstance(value, datetime):
+            return calendar.timegm(value.utctimetuple() if value.tzinfo else value.timetuple())
+        if isinstance(value, date):
+            return calendar.timegm(value.timetuple())
+        if isinstance(value, (Decimal, float)):
+            return float(value)
+        return value
+
+    @classmethod
+    def rows(cls, spec, results) -> list:
+        """Linhas do resultado como tuplas normalizadas, na ordem de ordenação canônica."""
+        if results and hasattr(results[0], "records"):
+            columns = cls.FLUX_COLUMNS.get(spec.aggregate)
+            if spec.aggregate == "pivot":
+                columns = ["_time"] + list(spec.sensors)
+            if columns is None:
+                raise ValueError(f"{spec.label}: sem mapeamento das colunas do Flux para '{spec.aggregate}'")
+            results = [
+                tuple(record.values.get(column) for column in columns)
+                for table in results for record in table.records
+            ]
+        rows = [tuple(cls.normalize_value(value) for value in row) for row in results]
+        return sorted(rows, key=lambda row: tuple((value is None, value if value is not None else 0) for value in row))
+
+    @staticmethod
+    def same_value(left, right, rel_tol: float, abs_tol: float) -> bool:
+        """Inteiros (timestamps, contagens) comparam exatamente; floats com tolerância."""
+        if isinstance(left, float) or isinstance(right, float):
+            return isinstance(left, (int, float)) and isinstance(right, (int, float)) and \
+                math.isclose(left, right, rel_tol=rel_tol, abs_tol=abs_tol)
+        return left == right
+
+    @classmethod
+    def compare(cls, reference: list, rows: list, rel_tol: float, abs_tol: float) -> str:
+        """
+        Compara duas listas de linhas normalizadas.
+
+        Returns:
+            str: Descrição da primeira diferença, ou None se forem equivalentes.
+        """
+        if len(reference) != len(rows):
+            return f"{len(rows)} linhas, esperado {len(reference)}"
+        for index, (expected, row) in enumerate(zip(reference, rows)):
+            if len(expected) != len(row) or not all(cls.same_value(a, b, rel_tol, abs_tol) for a, b in zip(expected, row)):
+                return f"linha {index}: {row} != {expected}"
+        return None
+
+    @classmethod
+    def run(cls, backends: list, specs: list, file_name_equivalence: str, rel_tol: float = 1e-5, abs_tol: float = 1e-6) -> list:
+        """
+        Executa cada consulta uma vez em cada backend e grava a comparação com a referência.
+
+        Args:
+            backends (list): Backends já instanciados; o primeiro que responder é a referência.
+            specs (list): Consultas (QuerySpec) a conferir.
+            file_name_equivalence (str): Nome do arquivo CSV de saída.
+            rel_tol (float): Tolerância relativa nas comparações de floats.
+            abs_tol (float): Tolerância absoluta, para valores perto de zero (ex.: derivadas de leituras FLOAT).
+
+        Returns:
+            list: Linhas gravadas no CSV.
+        """
+        answers = {}
+        for backend in backends:
+            try:
+                backend.connect()
+            except Exception as e:
+                print(f"Erro ao conectar em {backend.name}: {e}")
+                answers.update({(backend.name, spec.label): e for spec in specs})
+                continue
+            try:
+                for spec in specs:
+                    try:
+                        results, _ = backend.run_query(spec, backend.compile_query(spec))
+                        answers[(backend.name, spec.label)] = cls.rows(spec, results)
+                    except Exception as e:
+                        print(f"Erro em {spec.label} no {backend.name}: {e}")
+                        answers[(backend.name, spec.label)] = e
+            finally:
+                backend.close()
+
+        report = []
+        for spec in specs:
+            reference = next(
+                (backend.name for backend in backends if isinstance(answers.get((backend.name, spec.label)), list)), None
+            )
+            for backend in backends:
+                rows = answers.get((backend.name, spec.label))
+                expected = answers[(reference, spec.label)] if reference is not None else None
+                if isinstance(rows, list):
+                    difference = cls.compare(expected, rows, rel_tol, abs_tol)
+                else:
+                    difference = f"erro: {rows}"
+                report.append({
+                    "query_type": spec.label,
+                    "table_name": backend.name,
+                    "reference": reference,
+                    "rows": len(rows) if isinstance(rows, list) else None,
+                    "reference_rows": len(expected) if expected is not None else None,
+                    "equivalent": difference is None,
+                    "difference": difference,
+                })
+                if difference is not None:
+                    print(f"{spec.label}: {backend.name} difere de {reference} ({difference})")
+
+        with open(file_name_equivalence, mode='a', newline='') as file:
+            writer = csv.writer(file)
+            for row in report:
+                writer.writerow([row[column] for column in cls.HEADER_EQUIVALENCE])
+        return report
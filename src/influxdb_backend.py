@@ -0,0 +1,146 @@
+from datetime import datetime, timedelta
+from influxdb_client import InfluxDBClient
+from src.backend import Backend
+from src.function_query import FunctionQuery
+from src.insert_database import InsertDatabase
+from src.query_database import QueryDatabase
+from src.rollup_manager import RollupManager
+from src.table_manager import TableManager
+
+class InfluxDBBackend(Backend):
+    """
+    Backend InfluxDB (bucket configurado no config.ini).
+
+    Opções:
+        bucket (str): Bucket próprio da variante, criado e apagado junto com o schema.
+        week_tag (str): Como gravar a semana em cada ponto: "tag" (padrão), "field" ou "drop".
+    """
+
+    query_language = "flux"
+
+    @staticmethod
+    def to_influx_records(rows: list) -> list:
+        """Converte as linhas do CSV nos registros usados por InsertDatabase.insert_influxdb."""
+        records = []
+        for row in rows:
+            time = row[0] if row[0].endswith("Z") else datetime.strptime(row[0], "%Y-%m-%d %H:%M:%S").isoformat() + "Z"
+            records.append({
+                "measurement": "sensor_data",
+                "tags": {"sensor_name": row[2]},
+                "time": time,
+                "fields": {"temperature": float(row[1])}
+            })
+        return records
+
+    def create_schema(self) -> None:
+        bucket = self.options.get("bucket")
+        TableManager().create_influx_database([bucket] if bucket else None)
+
+    def ingest_week(self, rows, current_week, round_number, batch_size, file_name_insertion) -> None:
+        # Variantes com bucket próprio gravam com o próprio nome no CSV e no cache
+        bucket = self.options.get("bucket")
+        InsertDatabase.insert_influxdb(
+            round_number, batch_size, self.to_influx_records(rows), current_week, file_name_insertion,
+            bucket=bucket, week_tag=self.options.get("week_tag", "tag"), db_name=self.name if bucket else None
+        )
+
+    def connect(self) -> None:
+        config = InsertDatabase.load_config()
+
+        self.org = config['influxdb']['org']
+        self.bucket = self.options.get("bucket") or config['influxdb']['bucket']
+        self.rollup_bucket = RollupManager.influx_rollup_bucket(config)
+        self.client = InfluxDBClient(url=config['influxdb']['url'], token=config['influxdb']['token'], org=self.org)
+        self.query_api = self.client.query_api()
+
+    def close(self) -> None:
+        if getattr(self, "client", None) is not None:
+            self.client.close()
+            self.client = None
+
+    def compile_query(self, spec) -> str:
+        return QueryDatabase.to_flux(spec, self.bucket)
+
+    def run_query(self, spec, query) -> tuple:
+        return FunctionQuery.execute_query_influx(self.query_api, query, self.org)
+
+    def run_raw(self, query) -> tuple:
+        return FunctionQuery.execute_query_influx(self.query_api, query, self.org)
+
+    def storage_size(self) -> str:
+        return InsertDatabase.get_docker_volume_size_influxdb('influxdb-data')
+
+    def encoding_stats(self) -> dict:
+        self.connect()
+        try:
+            # Cardinalidade conta todas as séries do bucket (sensor e, no modo "tag", semana)
+            series_query = f"""
+        import "influxdata/influxdb"
+        influxdb.cardinality(bucket: "{self.bucket}", start: 0)
+        """
+            points_query = f"""
+        from(bucket: "{self.bucket}")
+        |> range(start: 0)
+        |> filter(fn: (r) => r._measurement == "sensor_data" and r._field == "temperature")
+        |> group()
+        |> count()
+        """
+            series = sum(record.get_value() for table in self.query_api.query(series_query, org=self.org) for record in table.records)
+            points = sum(record.get_value() for table in self.query_api.query(points_query, org=self.org) for record in table.records)
+            bucket_id = self.client.buckets_api().find_bucket_by_name(self.bucket).id
+            return {"points": points, "series": series, "bytes": InsertDatabase.get_influx_bucket_bytes('influxdb-data', bucket_id)}
+        finally:
+            self.close()
+
+    def downsample_before(self, cutoff) -> bool:
+        self.connect()
+        try:
+            query = RollupManager.downsample_flux(self.bucket, self.rollup_bucket, cutoff)
+            self.query_api.query(query, org=self.org)
+        finally:
+            self.close()
+        return True
+
+    def downsample_bytes(self) -> int:
+        # Os agregados ficam no bucket de downsampling, fora do bucket medido por encoding_stats
+        self.connect()
+        try:
+            bucket = self.client.buckets_api().find_bucket_by_name(self.rollup_bucket)
+            return InsertDatabase.get_influx_bucket_bytes('influxdb-data', bucket.id) if bucket else 0
+        finally:
+            self.close()
+
+    def expire_before(self, cutoff) -> tuple:
+        # A retenção do bucket é relativa ao relógio do servidor, posterior a todo o conjunto de dados
+        # (apagaria tudo); a API de delete remove só o intervalo, que é inclusivo nas duas pontas
+        self.connect()
+        try:
+            self.client.delete_api().delete(
+                "1970-01-01T00:00:00Z", (cutoff - timedelta(microseconds=1)).isoformat() + "Z",
+                '_measurement="sensor_data"', bucket=self.bucket, org=self.org
+            )
+        finally:
+            self.close()
+        return "delete_api", None
+
+class InfluxDBRollupBackend(InfluxDBBackend):
+    """Variante que mantém o bucket de downsampling a partir dos dados do backend "influxdb"."""
+
+    def create_schema(self) -> None:
+        # O bucket de downsampling é criado junto com o principal (TableManager.create_influx_database)
+        pass
+
+    def encoding_stats(self) -> dict:
+        # Os pontos brutos são os do backend "influxdb"
+        return None
+
+    def expire_before(self, cutoff) -> tuple:
+        # A retenção é feita no bucket principal; o bucket de downsampling guarda o histórico agregado
+        raise NotImplementedError(f"{self.name}: a retenção é aplicada no backend influxdb")
+
+    def ingest_week(self, rows, current_week, round_number, batch_size, file_name_insertion) -> None:
+        InsertDatabase.insert_influxdb_rollup(self.name, round_number, batch_size, self.to_influx_records(rows), current_week, file_name_insertion)
+
+    def compile_query(self, spec) -> str:
+        query = FunctionQuery.route_query(spec, "flux", self.rollup_bucket)
+        return query if query is not None else super().compile_query(spec)
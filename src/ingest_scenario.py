@@ -0,0 +1,165 @@
+import heapq
+import random
+from datetime import datetime, timedelta
+from src.query_spec import QuerySpec
+
+class IngestScenario:
+    """
+    Aplica desordem controlada e reproduzível ao fluxo de linhas do CSV (ordenado pelo tempo).
+
+    Cada linha recebe um atraso de chegada (jitter limitado e/ou sensores atrasados) e o fluxo é
+    reordenado pela chegada; opcionalmente as linhas são embaralhadas em janelas de tamanho fixo.
+    """
+
+    SCENARIOS = {
+        "ordered": {},
+        "jitter": {"jitter": timedelta(minutes=10)},
+        "late_sensor": {"late_sensors": ["Sensor B"], "delay": timedelta(hours=36)},
+        "shuffled": {"shuffle_window": 100000},
+    }
+
+    def __init__(self,
+            name: str,
+            seed: int,
+            jitter: timedelta = None,
+            late_sensors: list = (),
+            delay: timedelta = None,
+            shuffle_window: int = None
+        ):
+        """
+        Args:
+            name (str): Nome do cenário nos arquivos de resultado.
+            seed (int): Semente do sorteio; a mesma semente gera a mesma ordem de chegada.
+            jitter (timedelta): Atraso máximo sorteado (uniforme) para cada linha.
+            late_sensors (list): Sensores cujas linhas chegam com atraso fixo.
+            delay (timedelta): Atraso dos sensores em late_sensors.
+            shuffle_window (int): Tamanho das janelas (em linhas) embaralhadas por completo.
+        """
+        self.name = name
+        self.jitter = jitter
+        self.late_sensors = set(late_sensors)
+        self.delay = delay
+        self.shuffle_window = shuffle_window
+        self.rng = random.Random(f"{seed}-{name}")
+
+    @classmethod
+    def from_name(cls, name: str, seed: int) -> "IngestScenario":
+        """Cria um cenário de SCENARIOS pelo nome."""
+        return cls(name, seed, **cls.SCENARIOS[name])
+
+    def arrival_delay(self, row: list) -> timedelta:
+        """Atraso de chegada da linha."""
+        delay = timedelta(0)
+        if self.jitter is not None:
+            delay += timedelta(seconds=self.rng.uniform(0, self.jitter.total_seconds()))
+        if self.delay is not None and row[2] in self.late_sensors:
+            delay += self.delay
+        return delay
+
+    def delayed(self, events):
+        """
+        Reordena os eventos (data, linha) pela chegada, mantendo em memória só o que ainda não chegou.
+
+        O relógio é o maior tempo de evento já lido: uma linha é entregue quando a sua chegada passa dele.
+        """
+        pending = []
+        now = None
+        for sequence, (row_date, row) in enumerate(events):
+            heapq.heappush(pending, (row_date + self.arrival_delay(row), sequence, row_date, row))
+            now = row_date if now is None or row_date > now else now
+            while pending and pending[0][0] <= now:
+                _, _, ready_date, ready_row = heapq.heappop(pending)
+                yield ready_date, ready_row
+        while pending:
+            _, _, ready_date, ready_row = heapq.heappop(pending)
+            yield ready_date, ready_row
+
+    def shuffled(self, events):
+        """Embaralha os eventos em janelas de shuffle_window linhas."""
+        window = []
+        for event in events:
+            window.append(event)
+            if len(window) >= self.shuffle_window:
+                self.rng.shuffle(window)
+                yield from window
+                window = []
+        self.rng.shuffle(window)
+        yield from window
+
+    def apply(self, events):
+        """
+        Aplica o cenário a um iterável de (data, linha).
+
+        Returns:
+            Iterador de (data, linha) na ordem de chegada.
+        """
+        if self.jitter is not None or self.delay is not None:
+            events = self.delayed(events)
+        if self.shuffle_window:
+            events = self.shuffled(events)
+        return events
+
+class WeekBatcher:
+    """
+    Agrupa linhas em semanas ISO sem exigir entrada ordenada.
+
+    A marca d'água é o maior tempo visto menos a tolerância de atraso; uma semana é entregue quando a
+    marca d'água passa do seu fim. Linhas de semanas já entregues são acumuladas e entregues como lotes
+    atrasados junto com a próxima semana que fechar (ou no final).
+    """
+
+    def __init__(self, allowed_lateness: timedelta = timedelta(0)):
+        """
+        Args:
+            allowed_lateness (timedelta): Quanto esperar por linhas atrasadas antes de fechar uma semana.
+        """
+        self.allowed_lateness = allowed_lateness
+        self.open_weeks = {}
+        self.week_ends = {}
+        self.late_rows = {}
+        self.closed_weeks = set()
+        self.watermark = None
+        self.late_batches = 0
+
+    def add(self, row_date: datetime, row: list) -> list:
+        """
+        Adiciona uma linha e retorna os lotes prontos.
+
+        Returns:
+            list: Tuplas (semana, linhas) em ordem de semana.
+        """
+        week = row_date.isocalendar()[:2]
+        if week in self.closed_weeks:
+            self.late_rows.setdefault(week, []).append(row)
+        else:
+            if week not in self.open_weeks:
+                self.open_weeks[week] = []
+                self.week_ends[week] = QuerySpec.align(row_date, "week") + timedelta(days=7)
+            self.open_weeks[week].append(row)
+
+        watermark = row_date - self.allowed_lateness
+        if self.watermark is not None and watermark <= self.watermark:
+            return []
+        self.watermark = watermark
+
+        ready = [week for week, week_end in self.week_ends.items() if week_end <= self.watermark]
+        if not ready:
+            return []
+        return self.emit(ready)
+
+    def emit(self, weeks: list) -> list:
+        """Fecha as semanas informadas e entrega junto os lotes atrasados acumulados."""
+        batches = []
+        for week in weeks:
+            batches.append((week, self.open_weeks.pop(week)))
+            del self.week_ends[week]
+            self.closed_weeks.add(week)
+        for week, rows in self.late_rows.items():
+            batches.append((week, rows))
+            self.late_batches += 1
+        self.late_rows = {}
+        return sorted(batches, key=lambda batch: batch[0])
+
+    def flush(self) -> list:
+        """Entrega todas as semanas ainda abertas e os lotes atrasados (fim da entrada)."""
+        return self.emit(list(self.open_weeks))
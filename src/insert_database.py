@@ -1,16 +1,33 @@
 from src.save_data import SaveData
-import pymysql
+from src.rollup_manager import RollupManager
+from src.query_cache import QueryCache
+import calendar
 import time
 from datetime import datetime
 import psutil  
 import subprocess
 import json
 import configparser
-from influxdb_client import InfluxDBClient, Point
+
+# pymysql e influxdb_client são importados nas funções de inserção de cada banco: rodar só um
+# backend não carrega o cliente dos outros
 
 class InsertDatabase:
     """Classe para inserir dados em diferentes bancos de dados e salvar o tempo de inserção em um arquivo CSV."""
 
+    INGEST_PROFILES = ["incremental", "bulk"]
+
+    # Seções do config.ini sobrescritas em tempo de execução (ex.: endereços do NullSink no dry-run)
+    ENDPOINT_OVERRIDES = {}
+
+    @classmethod
+    def load_config(cls) -> configparser.ConfigParser:
+        """Lê o config.ini e aplica ENDPOINT_OVERRIDES por cima."""
+        config = configparser.ConfigParser()
+        config.read('config.ini')
+        config.read_dict(cls.ENDPOINT_OVERRIDES)
+        return config
+
     @classmethod
     def get_docker_volume_size_by_container(cls, container_name: str) -> str:
         """
@@ -105,6 +122,40 @@ class InsertDatabase:
         except Exception as e:
             return f"Erro ao calcular tamanho do volume: {e}"
 
+    @staticmethod
+    def get_influx_bucket_bytes(volume_name: str, bucket_id: str) -> int:
+        """Retorna o tamanho em bytes dos arquivos TSM/WAL de um bucket dentro do volume do InfluxDB."""
+        result = subprocess.run(
+            ["docker", "run", "--rm", "-v", f"{volume_name}:/data", "alpine",
+             "sh", "-c", f"du -sbc /data/engine/data/{bucket_id} /data/engine/wal/{bucket_id} 2>/dev/null | tail -n 1"],
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0 or not result.stdout.strip():
+            raise RuntimeError(f"Erro ao calcular tamanho do bucket {bucket_id}: {result.stderr.strip()}")
+        return int(result.stdout.strip().split()[0])
+
+    @staticmethod
+    def record_insertion(db_name: str, insertion_time: float, current_week, round_number: int, storage,
+                         sensors, file_name_insertion: str, cache_name: str = None) -> None:
+        """
+        Grava o tempo de inserção da semana com o uso de memória e avisa os caches dos sensores alterados.
+
+        Args:
+            db_name (str): Nome do banco no CSV.
+            storage: Tamanho do banco depois da inserção (texto ou bytes, conforme a função de inserção).
+            sensors: Sensores com dados na semana.
+            cache_name (str): Nome do banco nos caches, quando difere do CSV (padrão: db_name).
+        """
+        memory_info = psutil.virtual_memory()
+        swap_info = psutil.swap_memory()
+
+        ram_usage = memory_info.used / (1024 ** 3)  # Converte para GB
+        swap_usage = swap_info.used / (1024 ** 3)  # Converte para GB
+
+        SaveData.save_insertion_time_to_csv(db_name, insertion_time, current_week, round_number, ram_usage, swap_usage, storage, file_name_insertion)
+        QueryCache.publish_week_changed(cache_name or db_name, sensors, current_week)
+
     @classmethod
     def insert_mariadb( cls,
                         db_name: str, 
@@ -118,6 +169,7 @@ class InsertDatabase:
                         ) -> None:
 
         db_config = cls.load_db_config()  # Carregar usuário e senha do config.ini
+        import pymysql
         conn = pymysql.connect(
             host=db_config["host"],
             port=port,
@@ -150,17 +202,40 @@ class InsertDatabase:
         table_size_before = cls.get_docker_volume_size_by_container(db_name)
         print(f"Tamanho da tabela '{table_name}' antes da inserção: {table_size_before} MB")
 
-        memory_info = psutil.virtual_memory()
-        swap_info = psutil.swap_memory()
-
-        ram_usage = memory_info.used / (1024 ** 3)  # Converte para GB
-        swap_usage = swap_info.used / (1024 ** 3)  # Converte para GB
-
-        SaveData.save_insertion_time_to_csv(db_name, insertion_time, current_week, round_number, ram_usage, swap_usage, table_size_before, file_name_insertion)
+        cls.record_insertion(db_name, insertion_time, current_week, round_number, table_size_before, {row[2] for row in data_to_insert}, file_name_insertion)
 
         cursor.close()
         conn.close()
 
+    @staticmethod
+    def apply_bulk_session(cursor, engine: str) -> None:
+        """
+        Ajusta a sessão para carga em massa: sem checagem de unicidade e de chaves estrangeiras e,
+        no MyRocks, gravação direta em SST (rocksdb_bulk_load; aceita chaves fora de ordem).
+        """
+        cursor.execute("SET SESSION unique_checks = 0")
+        cursor.execute("SET SESSION foreign_key_checks = 0")
+        if engine == "ROCKSDB":
+            cursor.execute("SET SESSION rocksdb_bulk_load_allow_unsorted = 1")
+            cursor.execute("SET SESSION rocksdb_bulk_load = 1")
+
+    @staticmethod
+    def build_indexes(cursor, definitions: list) -> float:
+        """
+        Cria os índices secundários adiados pelo perfil "bulk" em um único ALTER TABLE.
+
+        Args:
+            cursor: Cursor conectado ao banco.
+            definitions (list): Definições dos índices (ex.: "INDEX idx_sensor (sensor_name)").
+
+        Returns:
+            float: Tempo de criação dos índices em segundos.
+        """
+        start_time = time.time()
+        if definitions:
+            cursor.execute("ALTER TABLE sensor_data " + ", ".join(f"ADD {definition}" for definition in definitions))
+        return time.time() - start_time
+
     @classmethod
     def insert_mariadb_structured( cls,
                         db_name: str, 
@@ -170,7 +245,8 @@ class InsertDatabase:
                         data_to_insert: list, 
                         current_week: int, 
                         file_name_insertion: str,
-                        port: int
+                        port: int,
+                        profile: str = "incremental"
     ) -> None:
         """
         Insere dados estruturados com informações de mês, ano e semana em um banco de dados MariaDB.
@@ -183,11 +259,15 @@ class InsertDatabase:
             data_to_insert (list): Lista de dados para inserir.
             current_week (int): Semana atual.
             file_name_insertion (str): Nome do arquivo CSV para salvar os dados de inserção.
+            port (int): Porta do container.
+            profile (str): Perfil de ingestão (ver INGEST_PROFILES): "incremental" confirma cada
+                lote; "bulk" usa a sessão de carga em massa e uma transação por semana.
         
         Returns:
             None
         """
         db_config = cls.load_db_config()  # Carregar usuário e senha do config.ini
+        import pymysql
         conn = pymysql.connect(
             host=db_config["host"],
             port=port,
@@ -205,12 +285,24 @@ class InsertDatabase:
             year_number = date_obj.year
             data_with_month_year_week.append((event_timestamp, row[1], row[2], year_number))
 
-        table_size_before = cls.get_docker_volume_size_by_container(db_name)
+        if profile not in cls.INGEST_PROFILES:
+            raise ValueError(f"Perfil de ingestão desconhecido: {profile}")
+
+        # A variante "bulk" divide o container com a incremental, então o tamanho vem do information_schema
+        def table_size():
+            if profile == "bulk":
+                return cls.convert_size(cls.get_table_size_bytes(cursor, db_name))
+            return cls.get_docker_volume_size_by_container(db_name)
+
+        table_size_before = table_size()
         print('*********************')
         print(db_name, table_size_before)
         print('*********************')
 
         start_time = time.time()
+        if profile == "bulk":
+            cls.apply_bulk_session(cursor, engine)
+            conn.begin()
         for i in range(0, len(data_with_month_year_week), batch_size):
             batch = data_with_month_year_week[i:i + batch_size]
             cursor.executemany(
@@ -218,22 +310,102 @@ class InsertDatabase:
                 f"VALUES (%s, %s, %s, %s)", 
                 batch
             )
+            if profile == "incremental":
+                conn.commit()
+        if profile == "bulk":
+            # Uma transação por semana; no MyRocks os SST da carga só ficam visíveis ao desligar o bulk load
             conn.commit()
+            if engine == "ROCKSDB":
+                cursor.execute("SET SESSION rocksdb_bulk_load = 0")
 
         end_time = time.time()
         insertion_time = end_time - start_time
         print(f"Tempo de inserção no {db_name}: {insertion_time} segundos")
 
-        table_size_before = cls.get_docker_volume_size_by_container(db_name)
+        table_size_before = table_size()
         print(f"Tamanho da tabela '{table_name}' antes da inserção: {table_size_before} MB")
 
-        memory_info = psutil.virtual_memory()
-        swap_info = psutil.swap_memory()
+        cls.record_insertion(db_name, insertion_time, current_week, round_number, table_size_before, {row[2] for row in data_to_insert}, file_name_insertion)
 
-        ram_usage = memory_info.used / (1024 ** 3)  # Converte para GB
-        swap_usage = swap_info.used / (1024 ** 3)  # Converte para GB
+        cursor.close()
+        conn.close()
+
+    @staticmethod
+    def get_table_size_bytes(cursor, db_name: str) -> int:
+        """
+        Retorna o tamanho (dados + índices) das tabelas de um banco segundo o information_schema.
 
-        SaveData.save_insertion_time_to_csv(db_name, insertion_time, current_week, round_number, ram_usage, swap_usage, table_size_before, file_name_insertion)
+        Usado quando o banco divide o container com outros e o volume Docker não o isola.
+        """
+        cursor.execute(
+            "SELECT COALESCE(SUM(DATA_LENGTH + INDEX_LENGTH), 0) FROM information_schema.TABLES WHERE TABLE_SCHEMA = %s",
+            (db_name,)
+        )
+        return int(cursor.fetchone()[0])
+
+    @classmethod
+    def insert_mariadb_compact( cls,
+                        db_name: str, 
+                        engine: str, 
+                        round_number: int, 
+                        batch_size: int, 
+                        data_to_insert: list, 
+                        current_week: int, 
+                        file_name_insertion: str,
+                        port: int
+    ) -> None:
+        """
+        Insere dados no schema compacto: o sensor vira um SMALLINT do dicionário e o timestamp, um inteiro.
+        
+        Args:
+            db_name (str): Nome do banco de dados.
+            engine (str): Nome do mecanismo de banco de dados.
+            round_number (int): Número da rodada de inserção.
+            batch_size (int): Tamanho do lote de inserção.
+            data_to_insert (list): Lista de dados para inserir.
+            current_week (int): Semana atual.
+            file_name_insertion (str): Nome do arquivo CSV para salvar os dados de inserção.
+            port (int): Porta do container.
+        
+        Returns:
+            None
+        """
+        db_config = cls.load_db_config()  # Carregar usuário e senha do config.ini
+        import pymysql
+        conn = pymysql.connect(
+            host=db_config["host"],
+            port=port,
+            user=db_config["user"],
+            password=db_config["password"],
+            database=db_name
+        )
+        cursor = conn.cursor()
+
+        start_time = time.time()
+        # A codificação faz parte do custo de ingestão: sensores novos entram no dicionário antes dos dados
+        sensors = sorted({row[2] for row in data_to_insert})
+        cursor.executemany("INSERT IGNORE INTO sensors (sensor_name) VALUES (%s)", sensors)
+        cursor.execute("SELECT sensor_name, sensor_id FROM sensors")
+        sensor_ids = dict(cursor.fetchall())
+
+        data_encoded = [
+            (calendar.timegm(datetime.strptime(row[0], '%Y-%m-%d %H:%M:%S').timetuple()), row[1], sensor_ids[row[2]])
+            for row in data_to_insert
+        ]
+        for i in range(0, len(data_encoded), batch_size):
+            cursor.executemany(
+                "INSERT INTO sensor_data (event_timestamp, temperature, sensor_id) VALUES (%s, %s, %s)",
+                data_encoded[i:i + batch_size]
+            )
+            conn.commit()
+
+        end_time = time.time()
+        insertion_time = end_time - start_time
+        print(f"Tempo de inserção no {db_name}: {insertion_time} segundos")
+
+        table_size = cls.convert_size(cls.get_table_size_bytes(cursor, db_name))
+
+        cls.record_insertion(db_name, insertion_time, current_week, round_number, table_size, set(sensors), file_name_insertion)
 
         cursor.close()
         conn.close()
@@ -244,17 +416,32 @@ class InsertDatabase:
             batch_size: int, 
             data_to_insert: list, 
             current_week: tuple, 
-            file_name_insertion: str
+            file_name_insertion: str,
+            bucket: str = None,
+            week_tag: str = "tag",
+            db_name: str = None
         ) -> None:
+        """
+        Insere os registros da semana no InfluxDB.
 
-        config = configparser.ConfigParser()
-        config.read('config.ini')
+        Args:
+            bucket (str): Bucket de destino (padrão: [influxdb] bucket do config.ini).
+            week_tag (str): Como gravar a semana: "tag" (uma série por sensor e semana), "field"
+                (campo string, sem criar séries) ou "drop" (não grava).
+            db_name (str): Nome usado no CSV e no cache (padrão: InfluxDB / influxdb).
+        """
+        if week_tag not in ("tag", "field", "drop"):
+            raise ValueError(f"Modo de week_tag desconhecido: {week_tag}")
+
+        config = cls.load_config()
 
         influx_url = config.get("influxdb", "url")
         influx_token = config.get("influxdb", "token")
         influx_org = config.get("influxdb", "org")
-        influx_bucket = config.get("influxdb", "bucket")
+        influx_bucket = bucket or config.get("influxdb", "bucket")
+        week = f"{current_week[0]}-{current_week[1]}"
 
+        from influxdb_client import InfluxDBClient, Point
         client = InfluxDBClient(url=influx_url, token=influx_token, org=influx_org)
         write_api = client.write_api()
         start_time = time.time()
@@ -271,9 +458,11 @@ class InsertDatabase:
                         continue  # Pule o registro inválido
 
                     # Criação de um ponto para cada registro no lote
-                    point = Point(record["measurement"]) \
-                        .tag("week", f"{current_week[0]}-{current_week[1]}") \
-                        .time(record["time"])
+                    point = Point(record["measurement"]).time(record["time"])
+                    if week_tag == "tag":
+                        point = point.tag("week", week)
+                    elif week_tag == "field":
+                        point = point.field("week", week)
 
                     # Adiciona as tags
                     for tag_key, tag_value in record.get("tags", {}).items():
@@ -296,13 +485,7 @@ class InsertDatabase:
             print(f"Tempo de inserção no InfluxDB: {insertion_time:.2f} segundos")
 
             bucket_size = cls.get_docker_volume_size_influxdb('influxdb-data')
-            memory_info = psutil.virtual_memory()
-            swap_info = psutil.swap_memory()
-
-            ram_usage = memory_info.used / (1024 ** 3)  # Converte para GB
-            swap_usage = swap_info.used / (1024 ** 3)  # Converte para GB
-            
-            SaveData.save_insertion_time_to_csv('InfluxDB', insertion_time, current_week, round_number, ram_usage, swap_usage, bucket_size, file_name_insertion)
+            cls.record_insertion(db_name or 'InfluxDB', insertion_time, current_week, round_number, bucket_size, {record["tags"]["sensor_name"] for record in data_to_insert}, file_name_insertion, db_name or "influxdb")
 
             client.close()
 
@@ -312,10 +495,121 @@ class InsertDatabase:
         finally:
             write_api.__del__()  # Fecha a conexão com a API de escrita
 
-    @staticmethod
-    def load_db_config():
-        config = configparser.ConfigParser()
-        config.read("config.ini")
+    @classmethod
+    def insert_mariadb_rollup( cls,
+                        db_name: str, 
+                        engine: str, 
+                        round_number: int, 
+                        batch_size: int, 
+                        data_to_insert: list, 
+                        current_week: int, 
+                        file_name_insertion: str,
+                        port: int
+    ) -> None:
+        """
+        Atualiza incrementalmente as tabelas de rollup com os dados da semana.
+
+        Os dados brutos já foram inseridos pela variante base (ver RollupManager.ROLLUP_VARIANTS),
+        então o tempo registrado corresponde apenas ao custo extra de manter os rollups.
+        
+        Args:
+            db_name (str): Nome da variante de rollup.
+            engine (str): Nome do mecanismo de banco de dados.
+            round_number (int): Número da rodada de inserção.
+            batch_size (int): Tamanho do lote de inserção.
+            data_to_insert (list): Lista de dados da semana.
+            current_week (int): Semana atual.
+            file_name_insertion (str): Nome do arquivo CSV para salvar os dados de inserção.
+            port (int): Porta do container da base.
+        
+        Returns:
+            None
+        """
+        base_name = RollupManager.base_of(db_name)
+        db_config = cls.load_db_config()  # Carregar usuário e senha do config.ini
+        import pymysql
+        conn = pymysql.connect(
+            host=db_config["host"],
+            port=port,
+            user=db_config["user"],
+            password=db_config["password"],
+            database=base_name
+        )
+        cursor = conn.cursor()
+
+        start_time = time.time()
+        rollups = RollupManager.compute_rollups(RollupManager.from_mariadb_rows(data_to_insert))
+        RollupManager.update_mariadb(cursor, rollups, batch_size)
+        conn.commit()
+
+        end_time = time.time()
+        insertion_time = end_time - start_time
+        print(f"Tempo de atualização dos rollups no {engine}: {insertion_time} segundos")
+
+        table_size_before = cls.get_docker_volume_size_by_container(base_name)
+
+        cls.record_insertion(db_name, insertion_time, current_week, round_number, table_size_before, {row[2] for row in data_to_insert}, file_name_insertion)
+
+        cursor.close()
+        conn.close()
+
+    @classmethod
+    def insert_influxdb_rollup(cls,
+            db_name: str,
+            round_number: int, 
+            batch_size: int, 
+            data_to_insert: list, 
+            current_week: tuple, 
+            file_name_insertion: str
+        ) -> None:
+        """
+        Atualiza incrementalmente o bucket de downsampling com os dados da semana.
+
+        Os pontos brutos já foram gravados pela variante "influxdb"; aqui só são escritos os
+        agregados, mesclados com os intervalos que já existiam no bucket.
+
+        Args:
+            db_name (str): Nome da variante de rollup, usado no CSV e no cache.
+        """
+        config = cls.load_config()
+
+        influx_url = config.get("influxdb", "url")
+        influx_token = config.get("influxdb", "token")
+        influx_org = config.get("influxdb", "org")
+        rollup_bucket = RollupManager.influx_rollup_bucket(config)
+
+        from influxdb_client import InfluxDBClient
+        from influxdb_client.client.write_api import SYNCHRONOUS
+        client = InfluxDBClient(url=influx_url, token=influx_token, org=influx_org)
+        write_api = client.write_api(write_options=SYNCHRONOUS)
+        start_time = time.time()
+
+        try:
+            rollups = RollupManager.compute_rollups(RollupManager.from_influx_records(data_to_insert))
+            previous = RollupManager.read_influx_rollups(client.query_api(), rollup_bucket, influx_org, rollups)
+            RollupManager.merge_rollups(rollups, previous)
+
+            points = RollupManager.to_influx_points(rollups)
+            for i in range(0, len(points), batch_size):
+                write_api.write(bucket=rollup_bucket, org=influx_org, record=points[i:i + batch_size])
+
+            end_time = time.time()
+            insertion_time = end_time - start_time
+            print(f"Tempo de atualização dos rollups no {db_name}: {insertion_time:.2f} segundos")
+
+            bucket_size = cls.get_docker_volume_size_influxdb('influxdb-data')
+            cls.record_insertion(db_name, insertion_time, current_week, round_number, bucket_size, {record["tags"]["sensor_name"] for record in data_to_insert}, file_name_insertion)
+
+        except Exception as e:
+            print(f"Erro ao atualizar rollups no InfluxDB: {e}")
+
+        finally:
+            write_api.close()
+            client.close()
+
+    @classmethod
+    def load_db_config(cls):
+        config = cls.load_config()
 
         return {
             "host": config.get("database", "host", fallback="localhost"),
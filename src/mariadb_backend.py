@@ -0,0 +1,273 @@
+from datetime import datetime, timedelta
+import pymysql
+from src.backend import Backend
+from src.function_query import FunctionQuery
+from src.insert_database import InsertDatabase
+from src.partition_manager import PartitionManager
+from src.query_database import QueryDatabase
+from src.rollup_manager import RollupManager
+from src.table_manager import TableManager
+
+class MariaDBBackend(Backend):
+    """Backend MariaDB com o schema simples (InnoDB e ColumnStore)."""
+
+    dialect = "plain"
+    query_language = "mariadb"
+
+    def database(self) -> str:
+        """Banco usado pelas conexões."""
+        return self.name
+
+    def create_schema(self) -> None:
+        TableManager().create_table(self.name)
+
+    def ingest_week(self, rows, current_week, round_number, batch_size, file_name_insertion) -> None:
+        InsertDatabase.insert_mariadb(self.name, self.engine, round_number, batch_size, rows, current_week, file_name_insertion, self.port)
+
+    def connect(self) -> None:
+        db_config = InsertDatabase.load_db_config()
+        self.conn = pymysql.connect(
+            host=db_config["host"],
+            port=self.port,
+            user=db_config["user"],
+            password=db_config["password"],
+            database=self.database()
+        )
+        self.cursor = self.conn.cursor()
+        # Prepared statements já criados nesta conexão (consulta com '?' -> nome)
+        self.statements = {}
+
+    def close(self) -> None:
+        if getattr(self, "cursor", None) is not None:
+            self.cursor.close()
+            self.cursor = None
+        if getattr(self, "conn", None) is not None:
+            self.conn.close()
+            self.conn = None
+
+    def compile_query(self, spec) -> str:
+        return QueryDatabase.build_sql(spec, self.dialect)[0]
+
+    def run_query(self, spec, query) -> tuple:
+        template, params = QueryDatabase.build_sql(spec, self.dialect, placeholders=True)
+        return FunctionQuery.execute_prepared(self.cursor, self.statements, template, params)
+
+    def run_raw(self, query) -> tuple:
+        return FunctionQuery.execute_query(self.cursor, query)
+
+    def storage_size(self) -> str:
+        return InsertDatabase.get_docker_volume_size_by_container(self.database())
+
+    def table_size_bytes(self) -> int:
+        """Tamanho das tabelas do banco segundo o information_schema."""
+        self.connect()
+        try:
+            return InsertDatabase.get_table_size_bytes(self.cursor, self.database())
+        finally:
+            self.close()
+
+    def cutoff_param(self, cutoff: datetime):
+        """Limite da retenção no tipo da coluna event_timestamp."""
+        return cutoff.strftime("%Y-%m-%d %H:%M:%S")
+
+    def downsample_before(self, cutoff) -> bool:
+        # ColumnStore não tem chave primária nem ON DUPLICATE KEY; os agregados ficam em InnoDB
+        engine = "InnoDB" if self.engine == "ColumnStore" else self.engine
+        self.connect()
+        try:
+            for schema in RollupManager.get_table_schemas(engine):
+                self.cursor.execute(schema)
+            self.cursor.execute(RollupManager.downsample_sql(self.dialect), (self.cutoff_param(cutoff),))
+            self.conn.commit()
+        finally:
+            self.close()
+        return True
+
+    def expire_before(self, cutoff) -> tuple:
+        self.connect()
+        try:
+            self.cursor.execute("DELETE FROM sensor_data WHERE event_timestamp < %s", (self.cutoff_param(cutoff),))
+            deleted = self.cursor.rowcount
+            self.conn.commit()
+        finally:
+            self.close()
+        return "delete", deleted
+
+    def count_series(self) -> int:
+        """Número de sensores distintos (séries) gravados."""
+        self.cursor.execute("SELECT COUNT(DISTINCT sensor_name) FROM sensor_data")
+        return self.cursor.fetchone()[0]
+
+    def encoding_stats(self) -> dict:
+        self.connect()
+        try:
+            self.cursor.execute("SELECT COUNT(*) FROM sensor_data")
+            points = self.cursor.fetchone()[0]
+            return {
+                "points": points,
+                "series": self.count_series(),
+                "bytes": InsertDatabase.get_table_size_bytes(self.cursor, self.database()),
+            }
+        finally:
+            self.close()
+
+class MariaDBStructuredBackend(MariaDBBackend):
+    """
+    Backend MariaDB com o schema estruturado e particionado (InnoDB otimizado e MyRocks).
+
+    Opções:
+        partitioning (str): Granularidade das partições de tempo, "month" (padrão) ou "week".
+        partition_lookahead (int): Quantas partições criar além da semana que vai ser inserida.
+        profile (str): Perfil de ingestão, "incremental" (padrão) ou "bulk": a tabela nasce sem
+            índices secundários, a carga usa a sessão de carga em massa e os índices são criados
+            uma vez no final (finish_ingest).
+    """
+
+    dialect = "structured"
+
+    def profile(self) -> str:
+        """Perfil de ingestão da variante."""
+        return self.options.get("profile", "incremental")
+
+    def create_schema(self) -> None:
+        if self.profile() == "bulk":
+            schema = TableManager.get_structured_schema(self.engine, TableManager.INDEX_SETS["pk_only"])
+            TableManager().create_table(self.name, schema=schema, port=self.port)
+        else:
+            super().create_schema()
+
+    def ensure_partitions(self, rows) -> None:
+        """Cria as partições que cobrem a semana antes da inserção (fora da medição de tempo)."""
+        timestamps = [row[0] for row in rows]
+        start = datetime.strptime(min(timestamps), "%Y-%m-%d %H:%M:%S")
+        stop = datetime.strptime(max(timestamps), "%Y-%m-%d %H:%M:%S") + timedelta(seconds=1)
+
+        self.connect()
+        try:
+            created = PartitionManager.ensure_partitions(
+                self.cursor, self.database(), start, stop,
+                self.options.get("partitioning", PartitionManager.DEFAULT_GRANULARITY),
+                self.options.get("partition_lookahead", PartitionManager.DEFAULT_LOOKAHEAD)
+            )
+        finally:
+            self.close()
+        if created:
+            print(f"Partições criadas em {self.name}: {', '.join(created)}")
+
+    def ingest_week(self, rows, current_week, round_number, batch_size, file_name_insertion) -> None:
+        self.ensure_partitions(rows)
+        InsertDatabase.insert_mariadb_structured(self.name, self.engine, round_number, batch_size, rows, current_week, file_name_insertion, self.port, self.profile())
+
+    def finish_ingest(self) -> float:
+        if self.profile() != "bulk":
+            return 0.0
+        definitions = [TableManager.STRUCTURED_INDEXES[index] for index in TableManager.INDEX_SETS["full"]]
+        self.connect()
+        try:
+            index_build_time = InsertDatabase.build_indexes(self.cursor, definitions)
+        finally:
+            self.close()
+        print(f"Tempo de criação dos índices no {self.name}: {index_build_time} segundos")
+        return index_build_time
+
+    def storage_size(self) -> str:
+        # A variante "bulk" divide o container com a incremental
+        if self.profile() == "bulk":
+            return InsertDatabase.convert_size(self.table_size_bytes())
+        return super().storage_size()
+
+    def expire_before(self, cutoff) -> tuple:
+        self.connect()
+        try:
+            dropped = PartitionManager.drop_partitions_before(self.cursor, self.database(), cutoff)
+            # O que sobra antes do limite está na partição que o contém (limite fora da fronteira)
+            self.cursor.execute("DELETE FROM sensor_data WHERE event_timestamp < %s", (self.cutoff_param(cutoff),))
+            remainder = self.cursor.rowcount
+            self.conn.commit()
+        finally:
+            self.close()
+        if not dropped:
+            return "delete", remainder
+        print(f"Partições apagadas em {self.name}: {', '.join(dropped)}")
+        return ("drop_partition+delete" if remainder else "drop_partition"), remainder
+
+    def explain_pruning(self, specs: list, file_name_pruning: str) -> None:
+        """Confere com EXPLAIN PARTITIONS se cada consulta lê só as partições do seu intervalo."""
+        self.connect()
+        try:
+            PartitionManager.explain_pruning(self.cursor, self.database(), specs, self.compile_query, file_name_pruning)
+        finally:
+            self.close()
+
+class MariaDBRollupBackend(MariaDBBackend):
+    """
+    Variante que mantém rollups sobre os dados de uma base MariaDB (ver RollupManager.ROLLUP_VARIANTS).
+
+    Opções:
+        structured (bool): A base usa o schema estruturado; afeta as consultas não elegíveis aos rollups.
+    """
+
+    def __init__(self, name, engine, port=None, **options):
+        super().__init__(name, engine, port, **options)
+        self.dialect = "structured" if options.get("structured") else "plain"
+
+    def database(self) -> str:
+        return RollupManager.base_of(self.name)
+
+    def create_schema(self) -> None:
+        # As tabelas de rollup são criadas junto com a base (TableManager.create_table)
+        pass
+
+    def encoding_stats(self) -> dict:
+        # Os dados brutos são os da base
+        return None
+
+    def expire_before(self, cutoff) -> tuple:
+        # A retenção é feita na base; os rollups guardam o histórico agregado
+        raise NotImplementedError(f"{self.name}: a retenção é aplicada na base {self.database()}")
+
+    def ingest_week(self, rows, current_week, round_number, batch_size, file_name_insertion) -> None:
+        InsertDatabase.insert_mariadb_rollup(self.name, self.engine, round_number, batch_size, rows, current_week, file_name_insertion, self.port)
+
+    def compile_query(self, spec) -> str:
+        query = FunctionQuery.route_query(spec, "sql")
+        return query if query is not None else super().compile_query(spec)
+
+    def run_query(self, spec, query) -> tuple:
+        if RollupManager.route(spec, "sql") is not None:
+            return FunctionQuery.execute_query(self.cursor, query)
+        return super().run_query(spec, query)
+
+class MariaDBCompactBackend(MariaDBBackend):
+    """
+    Backend MariaDB com o schema compacto (ver TableManager.get_compact_schemas).
+
+    O banco fica no mesmo container de outra variante, então o armazenamento vem do information_schema.
+    """
+
+    dialect = "compact"
+
+    def create_schema(self) -> None:
+        print(f"----------------------\nCriando {self.name}")
+        db_config = InsertDatabase.load_db_config()
+        with pymysql.connect(host=db_config["host"], port=self.port, user=db_config["user"], password=db_config["password"]) as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(f"DROP DATABASE IF EXISTS {self.name}")
+                cursor.execute(f"CREATE DATABASE {self.name}")
+                cursor.execute(f"USE {self.name}")
+                for schema in TableManager.get_compact_schemas(self.engine):
+                    cursor.execute(schema)
+        print(f"Tabelas 'sensors' e 'sensor_data' criadas em {self.name}.")
+
+    def ingest_week(self, rows, current_week, round_number, batch_size, file_name_insertion) -> None:
+        InsertDatabase.insert_mariadb_compact(self.name, self.engine, round_number, batch_size, rows, current_week, file_name_insertion, self.port)
+
+    def cutoff_param(self, cutoff: datetime):
+        return QueryDatabase.to_epoch(cutoff)
+
+    def count_series(self) -> int:
+        self.cursor.execute("SELECT COUNT(DISTINCT sensor_id) FROM sensor_data")
+        return self.cursor.fetchone()[0]
+
+    def storage_size(self) -> str:
+        return InsertDatabase.convert_size(self.table_size_bytes())
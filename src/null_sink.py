@@ -0,0 +1,305 @@
+import configparser
+import csv
+import os
+import re
+import socketserver
+import struct
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class NullMySQLServer(socketserver.ThreadingTCPServer):
+    """
+    Servidor local que fala o mínimo do protocolo MySQL e descarta tudo o que recebe.
+
+    Aceita qualquer usuário e senha e responde OK a todo comando. Consultas SELECT/SHOW recebem uma
+    linha com "0" (suficiente para os tamanhos e UNIX_TIMESTAMP do código de inserção); as partições
+    vêm vazias e o dicionário de sensores do schema compacto é o único estado guardado.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    SERVER_VERSION = b"5.5.5-10.11.0-NullSink"
+    # CLIENT_LONG_PASSWORD | FOUND_ROWS | LONG_FLAG | CONNECT_WITH_DB | PROTOCOL_41 | TRANSACTIONS |
+    # SECURE_CONNECTION | MULTI_RESULTS | PLUGIN_AUTH
+    CAPABILITIES = 0x0001 | 0x0002 | 0x0004 | 0x0008 | 0x0200 | 0x2000 | 0x8000 | 0x20000 | 0x80000
+    CHARSET_UTF8MB4 = 45
+    STATUS_AUTOCOMMIT = 0x0002
+
+    COM_QUIT = 0x01
+    COM_QUERY = 0x03
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), NullMySQLHandler)
+        self.lock = threading.Lock()
+        self.sensors = {}
+        self.statements = 0
+        self.bytes_received = 0
+
+    def answer(self, query: str) -> list:
+        """
+        Linhas da resposta a uma consulta, ou None para responder só OK.
+
+        Returns:
+            list: Tuplas de strings (uma coluna por posição), ou None.
+        """
+        normalized = query.lstrip().upper()
+        with self.lock:
+            self.statements += 1
+            if normalized.startswith("INSERT IGNORE INTO SENSORS"):
+                for name in re.findall(r"'((?:[^'\\]|\\.)*)'", query):
+                    # Desfaz o escape do pymysql (\' e \\) para devolver o nome como o cliente o conhece
+                    name = re.sub(r"\\(.)", r"\1", name)
+                    self.sensors.setdefault(name, str(len(self.sensors) + 1))
+                return None
+            if not normalized.startswith(("SELECT", "SHOW", "EXPLAIN")):
+                return None
+            if "INFORMATION_SCHEMA.PARTITIONS" in normalized:
+                return []
+            if "FROM SENSORS" in normalized:
+                return list(self.sensors.items())
+        return [("0",)]
+
+class NullMySQLHandler(socketserver.BaseRequestHandler):
+    """Conexão de um cliente com o NullMySQLServer."""
+
+    def setup(self):
+        self.reader = self.request.makefile("rb")
+
+    def read_packet(self) -> tuple:
+        """Lê um pacote (número de sequência, conteúdo); retorna (None, b"") se o cliente fechou."""
+        payload = b""
+        while True:
+            header = self.reader.read(4)
+            if len(header) < 4:
+                return None, b""
+            length = header[0] | header[1] << 8 | header[2] << 16
+            payload += self.reader.read(length)
+            self.server.bytes_received += length + 4
+            if length < 0xFFFFFF:
+                return header[3], payload
+
+    def send(self, sequence: int, packets: list) -> None:
+        """Envia os pacotes numerados a partir de `sequence`."""
+        data = b""
+        for payload in packets:
+            data += struct.pack("<I", len(payload))[:3] + bytes([sequence % 256]) + payload
+            sequence += 1
+        self.request.sendall(data)
+
+    @staticmethod
+    def length_encoded(value: bytes) -> bytes:
+        if len(value) < 251:
+            return bytes([len(value)]) + value
+        return b"\xfc" + struct.pack("<H", len(value)) + value
+
+    def ok_packet(self) -> bytes:
+        return b"\x00\x00\x00" + struct.pack("<HH", NullMySQLServer.STATUS_AUTOCOMMIT, 0)
+
+    def eof_packet(self) -> bytes:
+        return b"\xfe" + struct.pack("<HH", 0, NullMySQLServer.STATUS_AUTOCOMMIT)
+
+    def result_set(self, rows: list) -> list:
+        """Resultado em texto com colunas VAR_STRING."""
+        columns = len(rows[0]) if rows else 1
+        packets = [bytes([columns])]
+        for index in range(columns):
+            name = f"c{index}".encode()
+            packets.append(
+                b"".join(self.length_encoded(part) for part in (b"def", b"", b"", b"", name, name))
+                + b"\x0c" + struct.pack("<HIBHB", NullMySQLServer.CHARSET_UTF8MB4, 255, 0xFD, 0, 0) + b"\x00\x00"
+            )
+        packets.append(self.eof_packet())
+        for row in rows:
+            packets.append(b"".join(self.length_encoded(str(value).encode()) for value in row))
+        packets.append(self.eof_packet())
+        return packets
+
+    def handle(self):
+        salt = b"nullsink" + b"nullsinknull"
+        greeting = (
+            b"\x0a" + NullMySQLServer.SERVER_VERSION + b"\x00"
+            + struct.pack("<I", threading.get_ident() & 0xFFFFFFFF)
+            + salt[:8] + b"\x00"
+            + struct.pack("<H", NullMySQLServer.CAPABILITIES & 0xFFFF)
+            + bytes([NullMySQLServer.CHARSET_UTF8MB4])
+            + struct.pack("<H", NullMySQLServer.STATUS_AUTOCOMMIT)
+            + struct.pack("<H", NullMySQLServer.CAPABILITIES >> 16)
+            + bytes([len(salt) + 1]) + b"\x00" * 10
+            + salt[8:] + b"\x00"
+            + b"mysql_native_password\x00"
+        )
+        self.send(0, [greeting])
+        sequence, _ = self.read_packet()
+        if sequence is None:
+            return
+        self.send(sequence + 1, [self.ok_packet()])
+
+        while True:
+            sequence, payload = self.read_packet()
+            if sequence is None or not payload or payload[0] == NullMySQLServer.COM_QUIT:
+                return
+            rows = None
+            if payload[0] == NullMySQLServer.COM_QUERY:
+                rows = self.server.answer(payload[1:].decode("utf-8", errors="replace"))
+            self.send(sequence + 1, [self.ok_packet()] if rows is None else self.result_set(rows))
+
+class NullHTTPHandler(BaseHTTPRequestHandler):
+    """Responde à API HTTP do InfluxDB sem gravar nada: escrita e delete com 204, consultas sem tabelas."""
+
+    protocol_version = "HTTP/1.1"
+
+    def respond(self, status: int, body: bytes = b"", content_type: str = "application/json") -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        with self.server.lock:
+            self.server.requests += 1
+            self.server.bytes_received += length
+        if self.path.startswith("/api/v2/query"):
+            self.respond(200, content_type="text/csv; charset=utf-8")
+        else:
+            self.respond(204)
+
+    def do_GET(self):
+        self.respond(200, b'{"status": "pass"}')
+
+    def log_message(self, format, *args):
+        pass
+
+class NullSink:
+    """
+    Sumidouros locais para o modo dry-run: um NullMySQLServer e um servidor HTTP no lugar do InfluxDB.
+
+    Os backends rodam o mesmo código de inserção, mas a rede termina num processo que descarta os
+    dados, então o tempo medido é o custo do lado do cliente (montagem dos lotes, escape, Point, envio).
+    """
+
+    HEADER_OVERHEAD = [
+        "table_name", "weeks", "rows", "real_insertion_time", "dry_run_insertion_time", "dry_run_wall_time", "client_share"
+    ]
+
+    # SQLite e o motor colunar rodam no próprio processo: não há camada de rede para trocar
+    NETWORK_BACKENDS = ("mariadb", "mariadb_structured", "mariadb_compact", "mariadb_rollup", "influxdb", "influxdb_rollup")
+
+    def __init__(self, host: str = "127.0.0.1"):
+        self.host = host
+        self.mysql = NullMySQLServer(host)
+        self.http = ThreadingHTTPServer((host, 0), NullHTTPHandler)
+        self.http.daemon_threads = True
+        self.http.lock = threading.Lock()
+        self.http.requests = 0
+        self.http.bytes_received = 0
+
+    @property
+    def mysql_port(self) -> int:
+        return self.mysql.server_address[1]
+
+    @property
+    def influx_url(self) -> str:
+        return f"http://{self.host}:{self.http.server_address[1]}"
+
+    def config_overrides(self) -> dict:
+        """
+        Seções para InsertDatabase.ENDPOINT_OVERRIDES: endereços apontando para os sumidouros.
+
+        Usuário, senha, token, org e bucket vêm do config.ini quando existem (o sumidouro aceita qualquer um).
+        """
+        config = configparser.ConfigParser()
+        config.read('config.ini')
+
+        def get(section, key):
+            return config.get(section, key, fallback="nullsink")
+
+        return {
+            "database": {"host": self.host, "user": get("database", "user"), "password": get("database", "password")},
+            "influxdb": {
+                "url": self.influx_url, "token": get("influxdb", "token"),
+                "org": get("influxdb", "org"), "bucket": get("influxdb", "bucket"),
+            },
+        }
+
+    def databases(self, databases: list) -> list:
+        """Cópias das entradas de DATABASES dos bancos em rede, com a porta do NullMySQLServer."""
+        return [
+            dict(db, port=self.mysql_port) if "port" in db else dict(db)
+            for db in databases
+            if db.get("backend", "mariadb") in self.NETWORK_BACKENDS
+        ]
+
+    def __enter__(self) -> "NullSink":
+        for server in (self.mysql, self.http):
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        for server in (self.mysql, self.http):
+            server.shutdown()
+            server.server_close()
+
+    def stats(self) -> dict:
+        """Comandos e bytes recebidos pelos dois sumidouros."""
+        return {
+            "mysql_statements": self.mysql.statements,
+            "mysql_bytes": self.mysql.bytes_received,
+            "http_requests": self.http.requests,
+            "http_bytes": self.http.bytes_received,
+        }
+
+    @staticmethod
+    def insertion_times(file_name_insertion: str, table_name: str) -> dict:
+        """Tempo de inserção por semana gravado para `table_name` (a última execução de cada semana prevalece)."""
+        if not os.path.exists(file_name_insertion):
+            return {}
+        with open(file_name_insertion, newline='') as file:
+            rows = list(csv.reader(file))[1:]
+        return {row[2]: float(row[1]) for row in rows if row and row[0] == table_name}
+
+    @classmethod
+    def overhead_report(cls,
+            db_name: str,
+            table_name: str,
+            rows: int,
+            wall_time: float,
+            file_name_real: str,
+            file_name_dry_run: str,
+            file_name_overhead: str
+        ) -> dict:
+        """
+        Compara o tempo de inserção real com o do dry-run nas mesmas semanas e grava a fração do lado do cliente.
+
+        Args:
+            db_name (str): Nome do banco em DATABASES.
+            table_name (str): Nome com que o banco grava no CSV de inserção.
+            rows (int): Linhas inseridas no dry-run.
+            wall_time (float): Tempo total do dry-run, incluindo a leitura do CSV e a montagem das semanas.
+            file_name_real (str): CSV de inserção da execução real.
+            file_name_dry_run (str): CSV de inserção do dry-run.
+            file_name_overhead (str): Nome do arquivo CSV de saída.
+
+        Returns:
+            dict: Linha gravada no CSV. Sem execução real de todas as semanas, o tempo real e a fração ficam vazios.
+        """
+        dry_run = cls.insertion_times(file_name_dry_run, table_name)
+        real = cls.insertion_times(file_name_real, table_name)
+        dry_run_time = sum(dry_run.values())
+        real_time = sum(real[week] for week in dry_run) if dry_run and all(week in real for week in dry_run) else None
+
+        result = {
+            "table_name": db_name,
+            "weeks": len(dry_run),
+            "rows": rows,
+            "real_insertion_time": real_time,
+            "dry_run_insertion_time": dry_run_time,
+            "dry_run_wall_time": wall_time,
+            "client_share": dry_run_time / real_time if real_time else None,
+        }
+        with open(file_name_overhead, mode='a', newline='') as file:
+            csv.writer(file).writerow([result[column] for column in cls.HEADER_OVERHEAD])
+        return result
@@ -0,0 +1,191 @@
+import csv
+from datetime import datetime, timedelta
+from src.query_spec import QuerySpec
+
+class PartitionManager:
+    """
+    Classe para manter partições de tempo (mensais ou semanais) no schema estruturado.
+
+    A tabela nasce só com a partição pMax; antes de cada semana ser inserida, as partições que
+    cobrem a semana (mais uma janela à frente) são criadas reorganizando a pMax, que está vazia.
+    """
+
+    GRANULARITIES = ["month", "week"]
+    DEFAULT_GRANULARITY = "month"
+    DEFAULT_LOOKAHEAD = 1
+
+    HEADER_PRUNING = ["table_name", "query_type", "partitions_used", "partitions_expected", "partitions_total", "pruned_ok"]
+
+    @staticmethod
+    def partition_clause() -> str:
+        """Cláusula de particionamento inicial usada por TableManager.get_table_schema."""
+        return """
+                PARTITION BY RANGE (UNIX_TIMESTAMP(event_timestamp)) (
+                    PARTITION pMax VALUES LESS THAN MAXVALUE
+                )"""
+
+    @staticmethod
+    def next_boundary(start: datetime, granularity: str) -> datetime:
+        """Início da partição seguinte."""
+        if granularity == "week":
+            return start + timedelta(days=7)
+        if start.month == 12:
+            return start.replace(year=start.year + 1, month=1)
+        return start.replace(month=start.month + 1)
+
+    @staticmethod
+    def partition_name(start: datetime, granularity: str) -> str:
+        """Nome da partição que começa em `start` (p202301 ou p2023w01)."""
+        if granularity == "week":
+            year, week = start.isocalendar()[:2]
+            return f"p{year}w{week:02d}"
+        return f"p{start:%Y%m}"
+
+    @classmethod
+    def required_partitions(cls, start: datetime, stop: datetime, granularity: str, lookahead: int) -> list:
+        """
+        Partições (nome, início, fim) que cobrem [start, stop) mais `lookahead` partições à frente.
+        """
+        if granularity not in cls.GRANULARITIES:
+            raise ValueError(f"Granularidade de partição desconhecida: {granularity}")
+        partitions = []
+        current = QuerySpec.align(start, granularity)
+        while current < stop or lookahead > 0:
+            if current >= stop:
+                lookahead -= 1
+            following = cls.next_boundary(current, granularity)
+            partitions.append((cls.partition_name(current, granularity), current, following))
+            current = following
+        return partitions
+
+    @staticmethod
+    def existing_partitions(cursor, db_name: str) -> dict:
+        """Partições atuais de sensor_data: {nome: limite superior em segundos desde a época ou None}."""
+        cursor.execute(
+            "SELECT PARTITION_NAME, PARTITION_DESCRIPTION FROM information_schema.PARTITIONS "
+            "WHERE TABLE_SCHEMA = %s AND TABLE_NAME = 'sensor_data' AND PARTITION_NAME IS NOT NULL "
+            "ORDER BY PARTITION_ORDINAL_POSITION",
+            (db_name,)
+        )
+        return {
+            name: None if description == "MAXVALUE" else int(description)
+            for name, description in cursor.fetchall()
+        }
+
+    @classmethod
+    def ensure_partitions(cls,
+            cursor,
+            db_name: str,
+            start: datetime,
+            stop: datetime,
+            granularity: str = DEFAULT_GRANULARITY,
+            lookahead: int = DEFAULT_LOOKAHEAD
+        ) -> list:
+        """
+        Cria as partições que faltam para [start, stop) reorganizando a pMax.
+
+        Só são criadas partições depois da última existente; dados mais antigos caem na
+        primeira partição, cujo limite inferior é aberto.
+
+        Returns:
+            list: Nomes das partições criadas.
+        """
+        existing = cls.existing_partitions(cursor, db_name)
+        bounded = [upper for upper in existing.values() if upper is not None]
+        last_upper = max(bounded) if bounded else None
+
+        missing = []
+        for name, _, partition_stop in cls.required_partitions(start, stop, granularity, lookahead):
+            if name in existing:
+                continue
+            if last_upper is not None:
+                cursor.execute("SELECT UNIX_TIMESTAMP(%s)", (partition_stop.strftime("%Y-%m-%d %H:%M:%S"),))
+                if cursor.fetchone()[0] <= last_upper:
+                    continue
+            missing.append((name, partition_stop))
+
+        if not missing:
+            return []
+
+        definitions = ",\n".join(
+            f"PARTITION {name} VALUES LESS THAN (UNIX_TIMESTAMP('{partition_stop:%Y-%m-%d %H:%M:%S}'))"
+            for name, partition_stop in missing
+        )
+        cursor.execute(
+            f"ALTER TABLE sensor_data REORGANIZE PARTITION pMax INTO (\n"
+            f"{definitions},\nPARTITION pMax VALUES LESS THAN MAXVALUE)"
+        )
+        return [name for name, _ in missing]
+
+    @classmethod
+    def drop_partitions_before(cls, cursor, db_name: str, cutoff: datetime) -> list:
+        """
+        Apaga (ALTER TABLE ... DROP PARTITION) as partições que terminam até `cutoff`.
+
+        Returns:
+            list: Nomes das partições apagadas.
+        """
+        cursor.execute("SELECT UNIX_TIMESTAMP(%s)", (cutoff.strftime("%Y-%m-%d %H:%M:%S"),))
+        limit = int(cursor.fetchone()[0])
+        expired = [
+            name for name, upper in cls.existing_partitions(cursor, db_name).items()
+            if upper is not None and upper <= limit
+        ]
+        if expired:
+            cursor.execute(f"ALTER TABLE sensor_data DROP PARTITION {', '.join(expired)}")
+        return expired
+
+    @classmethod
+    def expected_partitions(cls, cursor, partitions: dict, spec) -> list:
+        """Partições cujo intervalo cruza o intervalo da consulta."""
+        bounds = []
+        for limit in (spec.start, spec.stop):
+            if limit is None:
+                bounds.append(None)
+            else:
+                cursor.execute("SELECT UNIX_TIMESTAMP(%s)", (limit.strftime("%Y-%m-%d %H:%M:%S"),))
+                bounds.append(int(cursor.fetchone()[0]))
+        start, stop = bounds
+
+        expected = []
+        lower = None
+        for name, upper in partitions.items():
+            starts_before_stop = stop is None or lower is None or lower < stop
+            ends_after_start = start is None or upper is None or upper > start
+            if starts_before_stop and ends_after_start:
+                expected.append(name)
+            lower = upper
+        return expected
+
+    @classmethod
+    def explain_pruning(cls, cursor, db_name: str, specs: list, compile_function, file_name_pruning: str) -> None:
+        """
+        Roda EXPLAIN PARTITIONS em cada consulta e confere se só as partições do intervalo são lidas.
+
+        Args:
+            cursor: Cursor conectado ao banco.
+            db_name (str): Nome do banco.
+            specs (list): Consultas (QuerySpec) a verificar.
+            compile_function: Função que compila a spec para o SQL do banco.
+            file_name_pruning (str): Nome do arquivo CSV de saída.
+        """
+        partitions = cls.existing_partitions(cursor, db_name)
+        for spec in specs:
+            cursor.execute("EXPLAIN PARTITIONS " + compile_function(spec))
+            columns = [column[0] for column in cursor.description]
+            used = set()
+            for row in cursor.fetchall():
+                value = row[columns.index("partitions")]
+                if value:
+                    used.update(value.split(","))
+
+            # Partições vazias podem ser descartadas pelo otimizador; basta não ler nada fora do intervalo
+            expected = cls.expected_partitions(cursor, partitions, spec)
+            pruned_ok = used <= set(expected)
+            print(f"{db_name} {spec.label}: {len(used)}/{len(partitions)} partições (esperado {len(expected)}) "
+                  f"{'OK' if pruned_ok else 'SEM PODA'}")
+
+            with open(file_name_pruning, mode='a', newline='') as file:
+                csv.writer(file).writerow([
+                    db_name, spec.label, " ".join(sorted(used)), len(expected), len(partitions), pruned_ok
+                ])
@@ -0,0 +1,233 @@
+import csv
+import os
+import re
+import signal
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+class Profiler:
+    """
+    Perfis opcionais do lado do cliente, por banco e rótulo (leitura do CSV, semana inserida, consulta).
+
+    Modos:
+        cprofile: determinístico (cProfile); grava o .prof e uma pilha colapsada reconstruída do grafo de chamadas.
+        sampling: amostragem por SIGPROF a cada `interval` segundos de CPU, com custo baixo na medição
+            (só Unix, e só as seções abertas na thread principal recebem amostras).
+
+    Seções aninhadas suspendem a seção externa, então cada rótulo mede só o próprio trabalho (a leitura do
+    CSV não inclui as inserções). Seções com a mesma chave se acumulam entre rodadas; os arquivos são
+    gravados por save() em <directory>/<banco>/<rótulo>.collapsed (formato do flamegraph.pl/speedscope).
+    """
+
+    MODES = ["cprofile", "sampling"]
+    HEADER_PROFILE_SUMMARY = ["table_name", "label", "mode", "elapsed_time", "calls", "top_function", "top_function_share"]
+
+    mode = None
+    directory = "output/profiles"
+    interval = 0.005
+
+    _profiles = {}
+    _elapsed = Counter()
+    _calls = Counter()
+    _active = {}
+    _previous_handler = None
+
+    @classmethod
+    def configure(cls, mode: str = None, directory: str = None, interval: float = None) -> None:
+        """
+        Ativa (ou desativa, com mode=None) os perfis.
+
+        Args:
+            mode (str): "cprofile", "sampling" ou None.
+            directory (str): Diretório de saída.
+            interval (float): Intervalo de amostragem em segundos de CPU (modo sampling).
+        """
+        if mode is not None and mode not in cls.MODES:
+            raise ValueError(f"Modo de perfil desconhecido: {mode}")
+        if mode == "sampling" and not hasattr(signal, "setitimer"):
+            raise ValueError("O modo sampling usa signal.setitimer, disponível só em sistemas Unix")
+        cls.mode = mode
+        cls.directory = directory or cls.directory
+        cls.interval = interval or cls.interval
+        cls._profiles = {}
+        cls._elapsed = Counter()
+        cls._calls = Counter()
+        cls._active = {}
+
+    @classmethod
+    @contextmanager
+    def profile(cls, db_name: str, label: str):
+        """Mede o bloco sob a chave (banco, rótulo); não faz nada com os perfis desativados."""
+        if cls.mode is None:
+            yield
+            return
+
+        key = (db_name, label)
+        stack = cls._active.setdefault(threading.get_ident(), [])
+        if key not in cls._profiles:
+            if cls.mode == "cprofile":
+                import cProfile
+                cls._profiles[key] = cProfile.Profile()
+            else:
+                cls._profiles[key] = Counter()
+                cls.start_sampler()
+        profile = cls._profiles[key]
+
+        # Só um perfilador por thread: a seção externa fica suspensa enquanto a interna mede
+        now = time.perf_counter()
+        if stack:
+            cls.suspend(stack[-1], now)
+        section = [key, profile, now]
+        stack.append(section)
+        cls._calls[key] += 1
+        if cls.mode == "cprofile":
+            profile.enable()
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            cls.suspend(section, now)
+            stack.pop()
+            if stack:
+                stack[-1][2] = now
+                if cls.mode == "cprofile":
+                    stack[-1][1].enable()
+
+    @classmethod
+    def suspend(cls, section: list, now: float) -> None:
+        """Acumula o tempo da seção até agora e desliga o cProfile dela."""
+        key, profile, start = section
+        cls._elapsed[key] += now - start
+        if cls.mode == "cprofile":
+            profile.disable()
+
+    @classmethod
+    def start_sampler(cls) -> None:
+        """Liga o temporizador de CPU que dispara as amostras, se ainda não estiver ligado."""
+        if cls._previous_handler is not None:
+            return
+        cls._previous_handler = signal.signal(signal.SIGPROF, cls.sample)
+        signal.setitimer(signal.ITIMER_PROF, cls.interval, cls.interval)
+
+    @classmethod
+    def stop_sampler(cls) -> None:
+        if cls._previous_handler is None:
+            return
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, cls._previous_handler)
+        cls._previous_handler = None
+
+    @classmethod
+    def sample(cls, signum, frame) -> None:
+        """Tratador do SIGPROF: conta a pilha da thread principal na seção mais interna aberta."""
+        stack = cls._active.get(threading.main_thread().ident)
+        if stack and frame is not None:
+            cls._profiles[stack[-1][0]][cls.collapse_frame(frame)] += 1
+
+    @staticmethod
+    def function_name(filename: str, name: str) -> str:
+        """Nome de uma função na pilha colapsada: caminho relativo ao projeto (ou só o arquivo) e nome."""
+        if filename == "~":
+            return name
+        path = os.path.relpath(filename) if filename.startswith(os.getcwd()) else os.path.basename(filename)
+        return f"{path}:{name}"
+
+    @classmethod
+    def collapse_frame(cls, frame) -> str:
+        """Pilha de um frame no formato colapsado (raiz primeiro, separada por ';')."""
+        names = []
+        while frame is not None:
+            names.append(cls.function_name(frame.f_code.co_filename, frame.f_code.co_name))
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    @classmethod
+    def collapse_cprofile(cls, profile, max_depth: int = 64) -> Counter:
+        """
+        Pilhas colapsadas (em microssegundos) reconstruídas das arestas chamador-chamado do cProfile.
+
+        O cProfile só guarda pares de chamadas, então o tempo de cada função é dividido entre os caminhos
+        na proporção do tempo de cada aresta; é uma aproximação, exata quando cada função tem um só chamador.
+        """
+        import pstats
+        stats = pstats.Stats(profile).stats
+        callees = defaultdict(dict)
+        for function, (_, _, _, _, callers) in stats.items():
+            for caller, edge in callers.items():
+                callees[caller][function] = edge[3]
+
+        stacks = Counter()
+
+        def walk(function, path, on_path, scale):
+            own_time = stats[function][2]
+            path = path + [cls.function_name(function[0], function[2])]
+            if own_time * scale >= 1e-6:
+                stacks[";".join(path)] += own_time * scale * 1e6
+            if len(path) >= max_depth:
+                return
+            for callee, edge_time in callees[function].items():
+                callee_total = stats[callee][3]
+                share = scale * edge_time / callee_total if callee_total else 0
+                if callee not in on_path and share * callee_total >= 1e-6:
+                    walk(callee, path, on_path | {callee}, share)
+
+        for function, (_, _, _, _, callers) in stats.items():
+            if not callers:
+                walk(function, [], {function}, 1.0)
+        return Counter({stack: round(value) for stack, value in stacks.items() if round(value) > 0})
+
+    @staticmethod
+    def file_name(label: str) -> str:
+        return re.sub(r"[^A-Za-z0-9_.-]", "_", label)
+
+    @classmethod
+    def save(cls) -> list:
+        """
+        Grava os perfis acumulados e o resumo (tempo total e função com mais tempo próprio por chave).
+
+        Returns:
+            list: Arquivos gravados.
+        """
+        if cls.mode is None or not cls._profiles:
+            return []
+        cls.stop_sampler()
+
+        written = []
+        summary_file = os.path.join(cls.directory, "profile_summary.csv")
+        os.makedirs(cls.directory, exist_ok=True)
+        with open(summary_file, mode='w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(cls.HEADER_PROFILE_SUMMARY)
+
+            for (db_name, label), profile in sorted(cls._profiles.items()):
+                directory = os.path.join(cls.directory, cls.file_name(db_name))
+                os.makedirs(directory, exist_ok=True)
+                base = os.path.join(directory, cls.file_name(label))
+                if cls.mode == "cprofile":
+                    profile.dump_stats(base + ".prof")
+                    written.append(base + ".prof")
+                    stacks = cls.collapse_cprofile(profile)
+                else:
+                    stacks = profile
+
+                with open(base + ".collapsed", mode='w') as file:
+                    for stack, value in sorted(stacks.items()):
+                        file.write(f"{stack} {value}\n")
+                written.append(base + ".collapsed")
+
+                own = Counter()
+                for stack, value in stacks.items():
+                    own[stack.rsplit(";", 1)[-1]] += value
+                total = sum(own.values())
+                top_function, top_value = own.most_common(1)[0] if own else (None, 0)
+                writer.writerow([
+                    db_name, label, cls.mode, cls._elapsed[(db_name, label)], cls._calls[(db_name, label)],
+                    top_function, top_value / total if total else None
+                ])
+
+        written.append(summary_file)
+        print(f"Perfis gravados em {cls.directory} ({len(cls._profiles)} seções)")
+        cls._profiles = {}
+        return written
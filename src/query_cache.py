@@ -0,0 +1,127 @@
+import sys
+import time
+import weakref
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+class QueryCache:
+    """Cache LRU de resultados de consulta, invalidado pelas inserções que cruzam o intervalo de tempo da consulta."""
+
+    # Caches ativos que recebem os eventos de ingestão publicados pelo InsertDatabase; referências fracas,
+    # para um cache descartado não ficar preso aqui
+    _subscribers = weakref.WeakSet()
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 256 * 1024 ** 2):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        QueryCache._subscribers.add(self)
+
+    @staticmethod
+    def make_key(db_name: str, query: str) -> tuple:
+        """Normaliza a consulta (espaços e ';' final) para montar a chave do cache."""
+        return db_name, " ".join(query.split()).rstrip(";").strip()
+
+    @staticmethod
+    def estimate_size(results) -> int:
+        """Estimativa do tamanho em memória do resultado (linhas do MariaDB ou tabelas do InfluxDB)."""
+        size = sys.getsizeof(results)
+        for row in results:
+            if hasattr(row, "records"):
+                size += sum(sys.getsizeof(record.values) for record in row.records)
+            else:
+                size += sys.getsizeof(row)
+        return size
+
+    def get(self, key: tuple):
+        """Retorna o resultado em cache (marcando-o como recente) ou None."""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry["results"]
+
+    def put(self, key: tuple, results, scope: dict) -> None:
+        """
+        Guarda um resultado no cache, removendo os menos usados se passar dos limites.
+
+        Args:
+            key (tuple): Chave montada por make_key.
+            results: Resultado da consulta.
+            scope (dict): Sensor e intervalo [start, stop) lidos pela consulta; None significa sem limite.
+        """
+        size = self.estimate_size(results)
+        if size > self.max_bytes:
+            return
+        if key in self.entries:
+            self.total_bytes -= self.entries.pop(key)["size"]
+
+        self.entries[key] = {"results": results, "size": size, **scope}
+        self.total_bytes += size
+        while len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.total_bytes -= evicted["size"]
+            self.evictions += 1
+
+    def invalidate(self, db_name: str, sensor: str, start: datetime, stop: datetime) -> None:
+        """Remove as entradas do banco cujo sensor e intervalo de tempo cruzam os dados alterados."""
+        for key in list(self.entries):
+            entry = self.entries[key]
+            if key[0] != db_name:
+                continue
+            if entry["sensor"] is not None and entry["sensor"] != sensor:
+                continue
+            if entry["start"] is not None and entry["start"] >= stop:
+                continue
+            if entry["stop"] is not None and entry["stop"] <= start:
+                continue
+            self.total_bytes -= self.entries.pop(key)["size"]
+            self.invalidations += 1
+
+    def execute(self, db_name: str, query: str, scope: dict, execute_function) -> tuple:
+        """
+        Executa a consulta passando pelo cache.
+
+        Returns:
+            tuple: (resultados, tempo da consulta, "hit" ou "miss").
+        """
+        key = self.make_key(db_name, query)
+        start_time = time.time()
+        results = self.get(key)
+        if results is not None:
+            return results, time.time() - start_time, "hit"
+
+        results, query_time = execute_function(query)
+        self.put(key, results, scope)
+        return results, query_time, "miss"
+
+    def stats(self) -> dict:
+        """Retorna os contadores do cache."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "entries": len(self.entries),
+            "bytes": self.total_bytes,
+        }
+
+    @classmethod
+    def publish_week_changed(cls, db_name: str, sensors, current_week: tuple) -> None:
+        """
+        Publica que a semana `current_week` (ano ISO, semana ISO) dos sensores mudou no banco.
+
+        Todos os caches ativos invalidam as entradas que se sobrepõem à semana.
+        """
+        start = datetime.fromisocalendar(current_week[0], current_week[1], 1)
+        stop = start + timedelta(days=7)
+        for cache in list(cls._subscribers):
+            for sensor in sensors:
+                cache.invalidate(db_name, sensor, start, stop)
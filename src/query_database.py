@@ -1,251 +1,431 @@
+import calendar
+from datetime import datetime, timedelta
+from src.query_spec import QuerySpec
+
 class QueryDatabase:
-    """Classe para montar as query."""
+    """Classe para montar as query a partir de especificações declarativas (QuerySpec)."""
 
-    @staticmethod
-    def query_1_year_a():
-        query = f"""
-            SELECT event_timestamp, temperature, sensor_name
-            FROM sensor_data
-            WHERE event_timestamp >= '2023-01-01 00:00:00' 
-            AND event_timestamp < '2024-01-01 00:00:00'
-            AND sensor_name = 'Sensor A';
-        """
-        return query
+    # As sete consultas do estudo; os intervalos são os valores padrão, sorteados pelo WorkloadGenerator
+    STUDY_SPECS = [
+        QuerySpec("1_year_a", "raw", "Sensor A", datetime(2023, 1, 1), datetime(2024, 1, 1)),
+        QuerySpec("1_day_full", "raw", None, datetime(2023, 1, 2), datetime(2023, 1, 3)),
+        QuerySpec("group_mean_6months_week_b", "mean", "Sensor B", datetime(2023, 1, 2), datetime(2023, 6, 1), "week"),
+        QuerySpec("group_sum_month_a", "sum", "Sensor A", bucket="month"),
+        QuerySpec("group_mean_min_a", "mean", "Sensor A", bucket="15min"),
+        QuerySpec("max_min_10days_full", "max_min", None, datetime(2023, 1, 1), datetime(2023, 1, 10)),
+        QuerySpec("count_line_full", "count"),
+    ]
 
-    @staticmethod
-    def query_1_day_full():
-        query = f"""
-            SELECT event_timestamp, temperature, sensor_name
-            FROM sensor_data
-            WHERE event_timestamp >= '2023-01-02 00:00:00' 
-            AND event_timestamp < '2023-01-03 00:00:00';
-        """
-        return query
+    # Consultas de painel, onde bancos relacionais e de séries temporais mais divergem
+    DASHBOARD_SPECS = [
+        QuerySpec("last_point_per_sensor", "last", per_sensor=True),
+        QuerySpec("p95_hour_week_a", "percentile", "Sensor A", datetime(2023, 1, 2), datetime(2023, 1, 9), "hour", percentile=95),
+        QuerySpec("p99_hour_week_a", "percentile", "Sensor A", datetime(2023, 1, 2), datetime(2023, 1, 9), "hour", percentile=99),
+        QuerySpec("moving_mean_day_a", "moving_mean", "Sensor A", datetime(2023, 1, 2), datetime(2023, 1, 3), window=12),
+        QuerySpec("derivative_day_b", "derivative", "Sensor B", datetime(2023, 1, 2), datetime(2023, 1, 3)),
+        QuerySpec("gap_fill_15min_week_a", "gap_fill", "Sensor A", datetime(2023, 1, 2), datetime(2023, 1, 9), "15min"),
+        QuerySpec("pivot_hour_day_full", "pivot", None, datetime(2023, 1, 2), datetime(2023, 1, 3), "hour", sensors=("Sensor A", "Sensor B")),
+    ]
 
-    @staticmethod
-    def query_group_mean_week_b():
-        query = f"""
-        SELECT 
-            YEARWEEK(event_timestamp, 1) AS week_interval,
-            AVG(temperature) AS avg_temp
-            FROM sensor_data
-            WHERE sensor_name = 'Sensor B'
-            AND event_timestamp >= '2023-01-02 00:00:00' 
-            AND event_timestamp < '2023-06-01 00:00:00'
-            GROUP BY week_interval
-            ORDER BY week_interval;
-        """
-        return query
+    SPECS = STUDY_SPECS + DASHBOARD_SPECS
 
-    @staticmethod
-    def query_group_sum_month_a():
-        query = f"""
-            SELECT 
-                DATE_FORMAT(event_timestamp, '%Y-%m') AS month_start, 
-                SUM(temperature) AS sum_temperature
-            FROM sensor_data
-            WHERE sensor_name = 'Sensor A'
-            GROUP BY month_start
-            ORDER BY month_start;
-        """
-        return query
+    AGGREGATES_SQL = {
+        "raw": "event_timestamp, temperature, sensor_name",
+        "mean": "AVG(temperature) AS avg_temp",
+        "sum": "SUM(temperature) AS sum_temperature",
+        "max": "MAX(temperature) AS max_temp",
+        "max_min": "MAX(temperature) AS max_temp, MIN(temperature) AS min_temp",
+        "count": "COUNT(*)",
+    }
+
+    # Coluna usada para ordenar os sensores nas consultas top-K
+    TOP_ORDER_SQL = {"mean": "avg_temp", "sum": "sum_temperature", "max": "max_temp"}
+
+    BUCKETS_SQL = {
+        "15min": ["FROM_UNIXTIME(FLOOR(UNIX_TIMESTAMP(event_timestamp) / (15 * 60)) * (15 * 60)) AS interval_15min"],
+        "hour": ["FROM_UNIXTIME(FLOOR(UNIX_TIMESTAMP(event_timestamp) / 3600) * 3600) AS interval_hour"],
+        "week": ["YEARWEEK(event_timestamp, 1) AS week_interval"],
+        "month": ["DATE_FORMAT(event_timestamp, '%Y-%m') AS month_start"],
+    }
+
+    # No schema estruturado o mês é agrupado pelas colunas de ano e mês
+    BUCKETS_SQL_STRUCTURED = {
+        **BUCKETS_SQL,
+        "month": ["YEAR(event_timestamp) AS year", "MONTH(event_timestamp) AS month"],
+    }
+
+    # No SQLite o timestamp é um inteiro (segundos desde a época, UTC); a semana é rotulada pela segunda-feira
+    BUCKETS_SQLITE = {
+        "15min": ["(event_timestamp / 900) * 900 AS interval_15min"],
+        "hour": ["(event_timestamp / 3600) * 3600 AS interval_hour"],
+        "week": ["date(event_timestamp, 'unixepoch', 'weekday 0', '-6 days') AS week_interval"],
+        "month": ["strftime('%Y-%m', event_timestamp, 'unixepoch') AS month_start"],
+    }
+
+    # No schema compacto o timestamp é um inteiro (UTC) e o sensor vem da tabela de dicionário;
+    # DATE_ADD sobre um DATETIME fixo evita a conversão pelo fuso da sessão
+    BUCKETS_SQL_COMPACT = {
+        "15min": ["event_timestamp DIV 900 * 900 AS interval_15min"],
+        "hour": ["event_timestamp DIV 3600 * 3600 AS interval_hour"],
+        "week": ["DATE(DATE_ADD('1970-01-01', INTERVAL event_timestamp - (event_timestamp + 259200) % 604800 SECOND)) AS week_interval"],
+        "month": ["DATE_FORMAT(DATE_ADD('1970-01-01', INTERVAL event_timestamp SECOND), '%Y-%m') AS month_start"],
+    }
+
+    BUCKETS_FLUX = {"15min": "15m", "hour": "1h", "week": "1w", "month": "1mo"}
+
+    # Segundos desde a época de event_timestamp em cada dialeto (nos inteiros, a própria coluna)
+    EPOCH_SECONDS_SQL = {
+        "plain": "UNIX_TIMESTAMP(event_timestamp)",
+        "structured": "UNIX_TIMESTAMP(event_timestamp)",
+        "compact": "event_timestamp",
+        "sqlite": "event_timestamp",
+    }
+
+    @classmethod
+    def get_spec(cls, label: str) -> QuerySpec:
+        """Retorna a especificação padrão de uma consulta pelo rótulo."""
+        for spec in cls.SPECS:
+            if spec.label == label:
+                return spec
+        raise KeyError(f"Consulta desconhecida: {label}")
 
     @staticmethod
-    def query_group_mean_min_a():
-        query = f"""
-        SELECT 
-            FROM_UNIXTIME(FLOOR(UNIX_TIMESTAMP(event_timestamp) / (15 * 60)) * (15 * 60)) AS interval_15min,
-            AVG(temperature) AS avg_temp
-        FROM sensor_data
-        WHERE sensor_name = 'Sensor A'
-        GROUP BY interval_15min
-        ORDER BY interval_15min;
-        """
-        return query
-    
-    @staticmethod
-    def query_max_min_days_full():
-        query = f"""
-            SELECT 
-                MAX(temperature) AS max_temp, 
-                MIN(temperature) AS min_temp
-            FROM sensor_data
-            WHERE event_timestamp >= '2023-01-01 00:00:00' 
-            AND event_timestamp < '2023-01-10 00:00:00';
-        """
-        return query
-    
+    def format_literal(value) -> str:
+        """Formata um valor como literal SQL."""
+        if isinstance(value, datetime):
+            return f"'{value:%Y-%m-%d %H:%M:%S}'"
+        if isinstance(value, str):
+            return "'" + value.replace("\\", "\\\\").replace("'", "''") + "'"
+        return str(value)
+
     @staticmethod
-    def query_count_line_full():
-        query = f"""
-            SELECT COUNT(*) 
-            FROM sensor_data;
+    def to_epoch(timestamp: datetime) -> int:
+        """Converte um datetime (UTC, sem fuso) em segundos desde a época."""
+        return calendar.timegm(timestamp.timetuple())
+
+    @classmethod
+    def build_sql(cls, spec: QuerySpec, dialect: str = "plain", placeholders: bool = False) -> tuple:
         """
-        return query
+        Compila a especificação para SQL.
 
+        Args:
+            spec (QuerySpec): Consulta a compilar.
+            dialect (str): "plain" (schema simples), "structured" (filtra também year_number, prefixo
+                da chave primária), "compact" (timestamp inteiro e sensor_id com dicionário) ou
+                "sqlite" (timestamp inteiro).
+            placeholders (bool): Troca os literais por '?' para uso em prepared statements.
 
-    @staticmethod
-    def query_1_year_a_structured():
-        query = f"""
-            SELECT event_timestamp, temperature, sensor_name
-            FROM sensor_data
-            WHERE year_number = 2023
-            AND sensor_name = 'Sensor A';
+        Returns:
+            tuple: (consulta SQL, lista de parâmetros; vazia quando placeholders=False).
         """
-        return query
+        params = []
+
+        def value(literal):
+            if dialect in ("sqlite", "compact") and isinstance(literal, datetime):
+                literal = cls.to_epoch(literal)
+            if placeholders:
+                params.append(literal)
+                return "?"
+            return cls.format_literal(literal)
+
+        # Os parâmetros seguem a ordem do texto: as colunas do pivot vêm antes do WHERE
+        pivot_columns = []
+        if spec.aggregate == "pivot":
+            pivot_columns = [
+                f"AVG(CASE WHEN sensor_name = {value(sensor)} THEN temperature END) AS avg_temp_{index}"
+                for index, sensor in enumerate(spec.sensors, start=1)
+            ]
+
+        conditions = []
+        if dialect == "structured" and spec.start is not None and spec.stop is not None:
+            last_year = (spec.stop - timedelta(microseconds=1)).year
+            conditions.append(f"year_number BETWEEN {value(spec.start.year)} AND {value(last_year)}")
+        if spec.sensor is not None:
+            conditions.append(f"sensor_name = {value(spec.sensor)}")
+        if spec.sensors is not None:
+            conditions.append(f"sensor_name IN ({', '.join(value(sensor) for sensor in spec.sensors)})")
+        if spec.start is not None:
+            conditions.append(f"event_timestamp >= {value(spec.start)}")
+        if spec.stop is not None:
+            conditions.append(f"event_timestamp < {value(spec.stop)}")
+        where = "\nWHERE " + "\nAND ".join(conditions) if conditions else ""
+        source = "sensor_data JOIN sensors USING (sensor_id)" if dialect == "compact" else "sensor_data"
+
+        if spec.aggregate == "last":
+            return cls.build_last_sql(dialect, source, where), params
+        if spec.aggregate in ("moving_mean", "derivative"):
+            return cls.build_window_sql(spec, dialect, source, where), params
+        if spec.aggregate == "percentile":
+            return cls.build_percentile_sql(spec, cls.bucket_expressions(dialect, spec.bucket), source, where), params
+        if spec.aggregate == "gap_fill":
+            # O início e o fim da série de intervalos vêm depois do WHERE no texto
+            series = (value(QuerySpec.align(spec.start, spec.bucket)), value(spec.stop))
+            expression = cls.bucket_expressions(dialect, spec.bucket)[0]
+            return cls.build_gap_fill_sql(spec, dialect, expression, series, source, where), params
+
+        columns = pivot_columns or [cls.AGGREGATES_SQL[spec.aggregate]]
+        aliases = []
+        if spec.per_sensor:
+            columns = ["sensor_name"] + columns
+            aliases = ["sensor_name"]
+        if spec.bucket is not None:
+            expressions = cls.bucket_expressions(dialect, spec.bucket)
+            columns = expressions + columns
+            aliases = [cls.alias(expression) for expression in expressions]
+
+        query = f"SELECT {', '.join(columns)}\nFROM {source}{where}"
+        if aliases:
+            query += f"\nGROUP BY {', '.join(aliases)}"
+            if spec.top is not None:
+                query += f"\nORDER BY {cls.TOP_ORDER_SQL[spec.aggregate]} DESC\nLIMIT {int(spec.top)}"
+            else:
+                query += f"\nORDER BY {', '.join(aliases)}"
+        return query, params
+
+    @classmethod
+    def bucket_expressions(cls, dialect: str, bucket: str) -> list:
+        """Expressões (com alias) do agrupamento temporal no dialeto."""
+        buckets = {
+            "plain": cls.BUCKETS_SQL,
+            "structured": cls.BUCKETS_SQL_STRUCTURED,
+            "compact": cls.BUCKETS_SQL_COMPACT,
+            "sqlite": cls.BUCKETS_SQLITE,
+        }[dialect]
+        return buckets[bucket]
 
     @staticmethod
-    def query_1_day_full_structured():
-        query = f"""
-            SELECT event_timestamp, temperature, sensor_name
-            FROM sensor_data
-            WHERE year_number = 2023
-            AND event_timestamp BETWEEN '2023-01-02 00:00:00' AND '2023-01-02 23:59:59';
+    def alias(expression: str) -> str:
+        return expression.rsplit(" AS ", 1)[1]
 
+    @classmethod
+    def build_percentile_sql(cls, spec: QuerySpec, expressions: list, source: str, where: str) -> str:
         """
-        return query
+        Percentil por intervalo pelo posto mais próximo: o menor valor cuja posição ordenada k
+        satisfaz k * 100 >= p * n (mesma definição do PERCENTILE_DISC e do quantile "exact_selector"
+        do Flux). A conta em inteiros evita diferenças de arredondamento entre os bancos; só usa
+        funções de janela, então vale para MariaDB e SQLite.
+        """
+        aliases = ", ".join(cls.alias(expression) for expression in expressions)
+        return f"""SELECT {aliases}, MIN(temperature) AS percentile_temp
+FROM (SELECT {aliases}, temperature,
+ROW_NUMBER() OVER (PARTITION BY {aliases} ORDER BY temperature) AS position,
+COUNT(*) OVER (PARTITION BY {aliases}) AS total
+FROM (SELECT {', '.join(expressions)}, temperature
+FROM {source}{where}) bucketed) ranked
+WHERE position * 100 >= {int(spec.percentile)} * total
+GROUP BY {aliases}
+ORDER BY {aliases}"""
 
-    @staticmethod
-    def query_group_mean_week_b_structured():
-        query = f"""
-        SELECT 
-            YEARWEEK(event_timestamp, 1) AS week_interval,
-            AVG(temperature) AS avg_temp
-        FROM sensor_data
-        WHERE year_number = 2023
-        AND sensor_name = 'Sensor B'
-        AND event_timestamp BETWEEN '2023-01-02 00:00:00' AND '2023-05-31 23:59:59'
-
-        GROUP BY week_interval
-        ORDER BY week_interval;
+    @classmethod
+    def build_window_sql(cls, spec: QuerySpec, dialect: str, source: str, where: str) -> str:
         """
-        return query
+        Média móvel ou derivada por sensor com funções de janela.
 
-    @staticmethod
-    def query_group_sum_month_a_structured():
-        query = f"""
-        SELECT 
-            YEAR(event_timestamp) AS year,
-            MONTH(event_timestamp) AS month, 
-            SUM(temperature) AS sum_temperature
-        FROM sensor_data
-        WHERE sensor_name = 'Sensor A'
-        GROUP BY year, month
-        ORDER BY year, month;
+        Como no movingAverage() e no derivative() do Flux, a média só começa no ponto que completa a
+        janela e a derivada no segundo ponto de cada sensor; a derivada é por segundo.
         """
-        return query
+        window = "OVER (PARTITION BY sensor_name ORDER BY event_timestamp)"
+        if spec.aggregate == "moving_mean":
+            frame = f"ROWS BETWEEN {int(spec.window) - 1} PRECEDING AND CURRENT ROW"
+            value = f"AVG(temperature) OVER (PARTITION BY sensor_name ORDER BY event_timestamp {frame}) AS moving_avg"
+            keep = f"ROW_NUMBER() {window} >= {int(spec.window)} AS complete"
+        else:
+            seconds = cls.EPOCH_SECONDS_SQL[dialect]
+            value = f"(temperature - LAG(temperature) {window}) / ({seconds} - LAG({seconds}) {window}) AS rate"
+            keep = f"ROW_NUMBER() {window} > 1 AS complete"
+        column = cls.alias(value)
+        return f"""SELECT sensor_name, event_timestamp, {column}
+FROM (SELECT sensor_name, event_timestamp, {value}, {keep}
+FROM {source}{where}) windowed
+WHERE complete
+ORDER BY sensor_name, event_timestamp"""
 
-    @staticmethod
-    def query_group_mean_min_a_structured():
-        query = f"""
-        SELECT 
-            FROM_UNIXTIME(FLOOR(UNIX_TIMESTAMP(event_timestamp) / (15 * 60)) * (15 * 60)) AS interval_15min,
-            AVG(temperature) AS avg_temp
-        FROM sensor_data
-        WHERE sensor_name = 'Sensor A'
-        GROUP BY interval_15min
-        ORDER BY interval_15min;
+    @classmethod
+    def build_gap_fill_sql(cls, spec: QuerySpec, dialect: str, expression: str, series: tuple, source: str, where: str) -> str:
         """
-        return query
-    
-    @staticmethod
-    def query_max_min_days_full_structured():
-        query = f"""
-            SELECT 
-                MAX(temperature) AS max_temp, 
-                MIN(temperature) AS min_temp
-            FROM sensor_data
-            WHERE year_number = 2023
-            AND event_timestamp BETWEEN '2023-01-01 00:00:00' AND '2023-01-09 23:59:59';
+        Média por intervalo em todos os intervalos de [início alinhado, fim), inclusive os sem dados.
 
+        Uma CTE recursiva gera os intervalos; os vazios repetem a última média conhecida (como
+        fill(usePrevious: true) no Flux) e os anteriores ao primeiro dado ficam nulos. O contador
+        de médias não nulas define os grupos de preenchimento.
         """
-        return query
-    
+        alias = cls.alias(expression)
+        width = QuerySpec.FIXED_BUCKETS[spec.bucket]
+        if dialect in ("plain", "structured"):
+            first, following = f"CAST({series[0]} AS DATETIME)", f"{alias} + INTERVAL {width} SECOND"
+        elif dialect == "compact":
+            first, following = f"CAST({series[0]} AS SIGNED)", f"{alias} + {width}"
+        else:
+            first, following = series[0], f"{alias} + {width}"
+        return f"""WITH RECURSIVE means AS (
+SELECT {expression}, AVG(temperature) AS avg_temp
+FROM {source}{where}
+GROUP BY {alias}
+), buckets ({alias}) AS (
+SELECT {first}
+UNION ALL
+SELECT {following} FROM buckets WHERE {following} < {series[1]}
+), filled AS (
+SELECT buckets.{alias}, means.avg_temp, COUNT(means.avg_temp) OVER (ORDER BY buckets.{alias}) AS fill_group
+FROM buckets LEFT JOIN means ON means.{alias} = buckets.{alias}
+)
+SELECT {alias}, MAX(avg_temp) OVER (PARTITION BY fill_group) AS avg_temp
+FROM filled
+ORDER BY {alias}"""
+
     @staticmethod
-    def query_count_line_full_structured():
-        query = f"""
-            SELECT COUNT(*) 
-            FROM sensor_data;
+    def build_last_sql(dialect: str, source: str, where: str) -> str:
         """
-        return query
+        Último ponto de cada sensor: máximo do tempo por sensor e junção de volta na tabela
+        (usa o índice (sensor, tempo) em vez de ordenar todas as linhas).
+        """
+        key = "sensor_id" if dialect == "compact" else "sensor_name"
+        query = f"""SELECT {"sensors" if dialect == "compact" else "sensor_data"}.sensor_name, sensor_data.event_timestamp, sensor_data.temperature
+FROM sensor_data
+JOIN (SELECT {key}, MAX(event_timestamp) AS last_timestamp
+FROM {source}{where}
+GROUP BY {key}) last_point
+ON sensor_data.{key} = last_point.{key} AND sensor_data.event_timestamp = last_point.last_timestamp"""
+        if dialect == "compact":
+            query += "\nJOIN sensors ON sensors.sensor_id = sensor_data.sensor_id"
+            return query + "\nORDER BY sensors.sensor_name"
+        return query + "\nORDER BY sensor_data.sensor_name"
+
+    @classmethod
+    def to_sql(cls, spec: QuerySpec) -> str:
+        """Compila a especificação para o SQL do schema simples."""
+        return cls.build_sql(spec)[0]
+
+    @classmethod
+    def to_sql_structured(cls, spec: QuerySpec) -> str:
+        """Compila a especificação para o SQL do schema estruturado/particionado."""
+        return cls.build_sql(spec, "structured")[0]
+
+    @classmethod
+    def to_sql_compact(cls, spec: QuerySpec) -> str:
+        """Compila a especificação para o SQL do schema compacto (dicionário de sensores)."""
+        return cls.build_sql(spec, "compact")[0]
+
+    @classmethod
+    def to_sqlite(cls, spec: QuerySpec) -> str:
+        """Compila a especificação para o SQL do SQLite."""
+        return cls.build_sql(spec, "sqlite")[0]
 
     @staticmethod
-    def query_1_year_a_influx():
-        query = """
-            from(bucket: "influx_bucket")
-            |> range(start: 2023-01-01T00:00:00Z, stop: 2024-01-01T00:00:00Z)
-            |> filter(fn: (r) => r._measurement == "sensor_data")
-            |> filter(fn: (r) => r._field == "temperature")
-            |> filter(fn: (r) => r.sensor_name == "Sensor A")
-            |> keep(columns: ["_time", "_value", "sensor_name"])
-            |> yield(name: "complete_data")
+    def to_flux_per_sensor(spec: QuerySpec) -> str:
+        """Parte final do Flux das consultas por sensor (uma linha por sensor)."""
+        if spec.aggregate == "last":
+            # last() é empurrado para o armazenamento em cada série; depois fica o mais recente por sensor
+            return """
+        |> last()
+        |> group(columns: ["sensor_name"])
+        |> max(column: "_time")
+        |> keep(columns: ["_time", "_value", "sensor_name"])
+        |> group()
+        |> sort(columns: ["sensor_name"])
         """
-        return query
 
-    @staticmethod
-    def query_1_day_full_influx():
         query = """
-            from(bucket: "influx_bucket")
-            |> range(start: 2023-01-02T00:00:00Z, stop: 2023-01-03T00:00:00Z)
-            |> filter(fn: (r) => r._measurement == "sensor_data")
-            |> filter(fn: (r) => r._field == "temperature")
-            |> keep(columns: ["_time", "_value", "sensor_name"])
-            |> yield(name: "complete_data")
+        |> group(columns: ["sensor_name"])
         """
-        return query
+        if spec.aggregate == "max_min":
+            query += """|> reduce(
+            identity: {max: float(v: "-inf"), min: float(v: "inf")},
+            fn: (r, accumulator) => ({
+                max: if r._value > accumulator.max then r._value else accumulator.max,
+                min: if r._value < accumulator.min then r._value else accumulator.min
+            })
+        )
+        |> group()
+        |> sort(columns: ["sensor_name"])
+        """
+            return query
 
-    @staticmethod
-    def query_group_mean_week_b_influx():
-        query = """
-        from(bucket: "influx_bucket")
-        |> range(start: 2023-01-02T00:00:00Z, stop: 2023-06-01T00:00:00Z)  
-        |> filter(fn: (r) => r._measurement == "sensor_data")
-        |> filter(fn: (r) => r.sensor_name == "Sensor B")
-        |> filter(fn: (r) => r._field == "temperature")
-        |> keep(columns: ["_time", "_value", "sensor_name"])
+        query += f"""|> {spec.aggregate}()
+        |> keep(columns: ["_value", "sensor_name"])
+        |> group()
+        """
+        if spec.top is not None:
+            return query + f"""|> top(n: {int(spec.top)})
+        """
+        return query + """|> sort(columns: ["sensor_name"])
+        """
 
+    @classmethod
+    def to_flux_dashboard(cls, spec: QuerySpec) -> str:
+        """
+        Parte final do Flux das consultas de painel, com as mesmas linhas do SQL.
+
+        As séries são separadas também pela tag week, então as janelas por sensor reagrupam e
+        reordenam pelo tempo antes de calcular; os intervalos são rotulados pelo início (timeSrc),
+        como no SQL.
+        """
+        query = '|> keep(columns: ["_time", "_value", "sensor_name"])\n        '
+        if spec.aggregate in ("moving_mean", "derivative"):
+            function = f"movingAverage(n: {int(spec.window)})" if spec.aggregate == "moving_mean" else "derivative(unit: 1s, nonNegative: false)"
+            return query + f"""|> group(columns: ["sensor_name"])
+        |> sort(columns: ["_time"])
+        |> {function}
         |> group()
-        |> aggregateWindow(every: 1w, fn: mean, createEmpty: false) 
+        |> sort(columns: ["sensor_name", "_time"])
+        """
 
+        every = cls.BUCKETS_FLUX[spec.bucket]
+        if spec.aggregate == "percentile":
+            return query + f"""|> group()
+        |> aggregateWindow(
+            every: {every},
+            fn: (column, tables=<-) => tables |> quantile(q: {int(spec.percentile) / 100}, method: "exact_selector", column: column),
+            createEmpty: false,
+            timeSrc: "_start"
+        )
         """
-        return query
-    
-    @staticmethod
-    def query_group_sum_month_a_influx():
-        query = """
-        from(bucket: "influx_bucket")
-        |> range(start: 0)
-        |> filter(fn: (r) => r._measurement == "sensor_data")
-        |> filter(fn: (r) => r.sensor_name == "Sensor A")
-        |> filter(fn: (r) => r._field == "temperature")
-        |> keep(columns: ["_time", "_value", "sensor_name"])
-        |> group() 
-        |> aggregateWindow(every: 1mo, fn: sum, createEmpty: false)
+        if spec.aggregate == "gap_fill":
+            return query + f"""|> group()
+        |> aggregateWindow(every: {every}, fn: mean, createEmpty: true, timeSrc: "_start")
+        |> fill(usePrevious: true)
+        """
+        return query + f"""|> group(columns: ["sensor_name"])
+        |> aggregateWindow(every: {every}, fn: mean, createEmpty: false, timeSrc: "_start")
+        |> pivot(rowKey: ["_time"], columnKey: ["sensor_name"], valueColumn: "_value")
+        |> group()
+        |> sort(columns: ["_time"])
         """
-        return query
 
-    @staticmethod
-    def query_group_mean_min_a_influx():
-        query = """
-        from(bucket: "influx_bucket")
-        |> range(start: 0)
+    @classmethod
+    def to_flux(cls, spec: QuerySpec, bucket: str = "influx_bucket") -> str:
+        """Compila a especificação para Flux (InfluxDB)."""
+        start = f"{spec.start:%Y-%m-%dT%H:%M:%SZ}" if spec.start is not None else "0"
+        stop = f", stop: {spec.stop:%Y-%m-%dT%H:%M:%SZ}" if spec.stop is not None else ""
+        query = f"""
+        from(bucket: "{bucket}")
+        |> range(start: {start}{stop})
         |> filter(fn: (r) => r._measurement == "sensor_data")
-        |> filter(fn: (r) => r.sensor_name == "Sensor A")
         |> filter(fn: (r) => r._field == "temperature")
-        |> aggregateWindow(every: 15m, fn: mean, createEmpty: false) // Agrupar e calcular média
-        |> group(columns: ["_time"])  // Agrupar por intervalo de tempo
-        |> map(fn: (r) => ({ _time: r._time, _value: r._value }))
         """
-        return query
-    
-    @staticmethod
-    def query_max_min_days_full_influx():
-        query = """
-        from(bucket: "influx_bucket")
-        |> range(start: 2023-01-01T00:00:00Z, stop: 2023-01-10T00:00:00Z)
-        |> filter(fn: (r) => r._measurement == "sensor_data")
-        |> filter(fn: (r) => r._field == "temperature")
-        |> keep(columns: ["_time", "_value", "sensor_name"])
+        if spec.sensor is not None:
+            query += f'|> filter(fn: (r) => r.sensor_name == "{spec.sensor}")\n        '
+        if spec.sensors is not None:
+            sensors = ", ".join(f'"{sensor}"' for sensor in spec.sensors)
+            query += f'|> filter(fn: (r) => contains(value: r.sensor_name, set: [{sensors}]))\n        '
+
+        if spec.per_sensor:
+            return query + cls.to_flux_per_sensor(spec)
+        if spec.aggregate in ("percentile", "moving_mean", "derivative", "gap_fill", "pivot"):
+            return query + cls.to_flux_dashboard(spec)
+
+        if spec.aggregate == "count":
+            query += """
+        |> count(column: "_value")
+        |> yield(name: "row_count")
+        """
+            return query
+
+        query += '|> keep(columns: ["_time", "_value", "sensor_name"])\n        '
+        if spec.aggregate == "raw":
+            query += '|> yield(name: "complete_data")\n'
+        elif spec.aggregate == "max_min":
+            query += """
         |> reduce(
             identity: {max: float(v: "-inf"), min: float(v: "inf")},
             fn: (r, accumulator) => ({
@@ -254,16 +434,14 @@ class QueryDatabase:
             })
         )
         """
-        return query
-
-    @staticmethod
-    def query_count_line_full_influx():
-        query = """
-            from(bucket: "influx_bucket")
-            |> range(start: 0)
-            |> filter(fn: (r) => r._measurement == "sensor_data")
-            |> count(column: "_value")  
-            |> yield(name: "row_count")
+        elif spec.bucket is None:
+            query += f"""
+        |> group()
+        |> {spec.aggregate}()
+        """
+        else:
+            query += f"""
+        |> group()
+        |> aggregateWindow(every: {cls.BUCKETS_FLUX[spec.bucket]}, fn: {spec.aggregate}, createEmpty: false)
         """
         return query
-
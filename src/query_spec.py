@@ -0,0 +1,74 @@
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+
+@dataclass(frozen=True)
+class QuerySpec:
+    """
+    Descrição declarativa de uma consulta, independente do dialeto.
+
+    Attributes:
+        label (str): Rótulo da consulta nos arquivos de resultado.
+        aggregate (str): "raw", "mean", "sum", "max", "max_min", "count", "last" (último ponto por sensor)
+            ou uma das consultas de painel: "percentile" (percentil por intervalo), "moving_mean" (média
+            móvel por sensor), "derivative" (taxa de variação por segundo, por sensor), "gap_fill" (média
+            por intervalo sem lacunas, repetindo o último valor) e "pivot" (média de cada sensor em colunas).
+        sensor (str): Filtro de sensor, ou None para todos.
+        start (datetime): Início do intervalo (inclusivo), ou None para sem limite.
+        stop (datetime): Fim do intervalo (exclusivo), ou None para sem limite.
+        bucket (str): Agrupamento temporal ("15min", "hour", "week", "month"), ou None.
+        sensors (tuple): Filtro por um conjunto de sensores, ou None.
+        per_sensor (bool): Agrega por sensor (sem agrupamento temporal); linhas ordenadas pelo sensor.
+        top (int): Mantém só os K sensores com o maior agregado ("mean", "sum" ou "max"), em ordem decrescente.
+        percentile (int): Percentil (1 a 99) da agregação "percentile", pelo posto mais próximo.
+        window (int): Pontos da janela da média móvel.
+    """
+    label: str
+    aggregate: str
+    sensor: str = None
+    start: datetime = None
+    stop: datetime = None
+    bucket: str = None
+    sensors: tuple = None
+    per_sensor: bool = False
+    top: int = None
+    percentile: int = None
+    window: int = None
+
+    def __post_init__(self):
+        if self.per_sensor and self.bucket is not None:
+            raise ValueError(f"{self.label}: agregação por sensor não aceita agrupamento temporal")
+        if self.aggregate == "last" and not self.per_sensor:
+            raise ValueError(f"{self.label}: 'last' é sempre por sensor (per_sensor=True)")
+        if self.top is not None and (not self.per_sensor or self.aggregate not in ("mean", "sum", "max")):
+            raise ValueError(f"{self.label}: top exige per_sensor e agregação mean, sum ou max")
+        if self.aggregate == "percentile" and (self.bucket is None or not 1 <= (self.percentile or 0) <= 99):
+            raise ValueError(f"{self.label}: 'percentile' exige agrupamento temporal e percentil entre 1 e 99")
+        if self.aggregate == "moving_mean" and (self.window or 0) < 2:
+            raise ValueError(f"{self.label}: 'moving_mean' exige janela de pelo menos 2 pontos")
+        if self.aggregate in ("moving_mean", "derivative") and (self.bucket is not None or self.per_sensor):
+            raise ValueError(f"{self.label}: '{self.aggregate}' é calculada sobre os pontos de cada sensor, sem agrupamento")
+        if self.aggregate == "gap_fill" and (self.bucket not in self.FIXED_BUCKETS or self.start is None or self.stop is None):
+            raise ValueError(f"{self.label}: 'gap_fill' exige intervalo fechado e agrupamento de largura fixa {list(self.FIXED_BUCKETS)}")
+        if self.aggregate == "pivot" and (self.bucket is None or not self.sensors):
+            raise ValueError(f"{self.label}: 'pivot' exige agrupamento temporal e o conjunto de sensores (colunas)")
+
+    # Largura em segundos dos agrupamentos de tamanho fixo (o preenchimento de lacunas só usa estes)
+    FIXED_BUCKETS = {"15min": 900, "hour": 3600}
+
+    def with_range(self, start: datetime, stop: datetime, sensor: str = None) -> "QuerySpec":
+        """Retorna uma cópia da consulta com outro intervalo (e, opcionalmente, outro sensor)."""
+        return replace(self, start=start, stop=stop, sensor=sensor if sensor is not None else self.sensor)
+
+    @staticmethod
+    def align(timestamp: datetime, bucket: str) -> datetime:
+        """Arredonda o timestamp para baixo até a fronteira do agrupamento (dia, se não houver agrupamento)."""
+        if bucket == "15min":
+            return timestamp.replace(minute=timestamp.minute - timestamp.minute % 15, second=0, microsecond=0)
+        if bucket == "hour":
+            return timestamp.replace(minute=0, second=0, microsecond=0)
+        if bucket == "week":
+            monday = timestamp - timedelta(days=timestamp.weekday())
+            return monday.replace(hour=0, minute=0, second=0, microsecond=0)
+        if bucket == "month":
+            return timestamp.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
@@ -0,0 +1,308 @@
+import csv
+import math
+import os
+import shutil
+import statistics
+from collections import defaultdict
+
+class RegressionCheck:
+    """
+    Compara uma execução com uma linha de base gravada e aponta regressões e melhorias significativas.
+
+    As linhas dos CSVs de tempos são agrupadas por banco, tipo e semana:
+        consultas: (banco, rótulo da consulta, ""), com as rodadas como amostras; consultas respondidas
+            pelo cache ganham o status no rótulo (ex.: "1_day_full:hit").
+        inserção: (banco, "insertion", "all") com as semanas presentes nas duas execuções pareadas, e
+            (banco, "insertion", semana) quando a semana tem amostras suficientes dos dois lados (várias
+            rodadas gravadas no mesmo CSV).
+
+    Grupos independentes usam o teste de Mann-Whitney; as semanas pareadas, o de postos com sinal de
+    Wilcoxon (as semanas têm volumes diferentes, então o pareamento tira essa variação). Os dois são
+    exatos em amostras pequenas sem empates e usam a aproximação normal, com correção de empates, nas demais.
+    Um grupo só é regressão (ou melhoria) se o teste for significativo e a razão das medianas passar do limite.
+    """
+
+    HEADER_REGRESSION = [
+        "table_name", "query_type", "week", "test", "baseline_samples", "current_samples",
+        "baseline_median", "current_median", "ratio", "statistic", "p_value", "verdict"
+    ]
+    RUN_FILES = {"insertion": "insertion_times.csv", "query": "query_times.csv"}
+
+    # Limites das distribuições exatas (acima disso a aproximação normal já é boa)
+    EXACT_MANN_WHITNEY = 20
+    EXACT_WILCOXON = 25
+
+    @staticmethod
+    def ranks(values: list) -> tuple:
+        """
+        Postos (1 a n) com média nos empates.
+
+        Returns:
+            tuple: (postos na ordem de `values`, soma de t³ - t dos grupos empatados).
+        """
+        order = sorted(range(len(values)), key=lambda i: values[i])
+        ranks = [0.0] * len(values)
+        ties = 0
+        start = 0
+        while start < len(order):
+            end = start
+            while end + 1 < len(order) and values[order[end + 1]] == values[order[start]]:
+                end += 1
+            for position in range(start, end + 1):
+                ranks[order[position]] = (start + end) / 2 + 1
+            size = end - start + 1
+            ties += size ** 3 - size
+            start = end + 1
+        return ranks, ties
+
+    @staticmethod
+    def normal_p_value(statistic: float, mean: float, variance: float) -> float:
+        """p bilateral da aproximação normal, com correção de continuidade."""
+        if variance <= 0:
+            return 1.0
+        z = max(abs(statistic - mean) - 0.5, 0) / math.sqrt(variance)
+        return math.erfc(z / math.sqrt(2))
+
+    @classmethod
+    def mann_whitney(cls, baseline: list, current: list) -> tuple:
+        """
+        Teste de Mann-Whitney bilateral.
+
+        Returns:
+            tuple: (U da execução atual, p).
+        """
+        n1, n2 = len(current), len(baseline)
+        ranks, ties = cls.ranks(list(current) + list(baseline))
+        u = sum(ranks[:n1]) - n1 * (n1 + 1) / 2
+
+        if ties == 0 and max(n1, n2) <= cls.EXACT_MANN_WHITNEY:
+            # counts[i][j][k]: arranjos de i e j elementos com U = k
+            counts = [[[1] if i == 0 or j == 0 else None for j in range(n2 + 1)] for i in range(n1 + 1)]
+            for i in range(1, n1 + 1):
+                for j in range(1, n2 + 1):
+                    size = i * j + 1
+                    left, right = counts[i - 1][j], counts[i][j - 1]
+                    counts[i][j] = [
+                        (left[k - j] if 0 <= k - j < len(left) else 0) + (right[k] if k < len(right) else 0)
+                        for k in range(size)
+                    ]
+            distribution = counts[n1][n2]
+            total = sum(distribution)
+            lower = sum(distribution[:int(u) + 1]) / total
+            upper = sum(distribution[int(u):]) / total
+            return u, min(1.0, 2 * min(lower, upper))
+
+        n = n1 + n2
+        variance = n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1)))
+        return u, cls.normal_p_value(u, n1 * n2 / 2, variance)
+
+    @classmethod
+    def wilcoxon(cls, baseline: list, current: list) -> tuple:
+        """
+        Teste de postos com sinal de Wilcoxon bilateral para amostras pareadas (diferenças nulas descartadas).
+
+        Returns:
+            tuple: (soma dos postos das diferenças positivas, p).
+        """
+        differences = [c - b for b, c in zip(baseline, current) if c != b]
+        n = len(differences)
+        if n == 0:
+            return 0.0, 1.0
+        ranks, ties = cls.ranks([abs(d) for d in differences])
+        w = sum(rank for rank, d in zip(ranks, differences) if d > 0)
+
+        if ties == 0 and n <= cls.EXACT_WILCOXON:
+            # distribution[k]: subconjuntos de {1..n} com soma k
+            distribution = [1] + [0] * (n * (n + 1) // 2)
+            for rank in range(1, n + 1):
+                for k in range(len(distribution) - 1, rank - 1, -1):
+                    distribution[k] += distribution[k - rank]
+            total = 2 ** n
+            lower = sum(distribution[:int(w) + 1]) / total
+            upper = sum(distribution[int(w):]) / total
+            return w, min(1.0, 2 * min(lower, upper))
+
+        variance = n * (n + 1) * (2 * n + 1) / 24 - ties / 48
+        return w, cls.normal_p_value(w, n * (n + 1) / 4, variance)
+
+    @classmethod
+    def load_run(cls, directory: str, table_names: list = None) -> dict:
+        """
+        Lê os CSVs de tempos de uma execução.
+
+        Args:
+            directory (str): Diretório com insertion_times.csv e query_times.csv.
+            table_names (list): Bancos a considerar, ou None para todos.
+
+        Returns:
+            dict: {"insertion": {(banco, semana): [tempos]}, "query": {(banco, consulta): [tempos]}}.
+
+        Raises:
+            FileNotFoundError: Se o diretório ou algum dos CSVs não existir.
+        """
+        if not os.path.isdir(directory):
+            raise FileNotFoundError(f"Diretório não encontrado: {directory}")
+        # Um CSV ausente viraria grupos "missing" (ou nenhum grupo), então é erro de configuração
+        missing = [name for name in cls.RUN_FILES.values() if not os.path.exists(os.path.join(directory, name))]
+        if missing:
+            raise FileNotFoundError(f"Arquivos ausentes em {directory}: {', '.join(missing)}")
+
+        run = {"insertion": defaultdict(list), "query": defaultdict(list)}
+        for kind, file_name in cls.RUN_FILES.items():
+            with open(os.path.join(directory, file_name), newline='') as file:
+                for row in csv.DictReader(file):
+                    if table_names is not None and row["table_name"] not in table_names:
+                        continue
+                    if kind == "insertion":
+                        run[kind][(row["table_name"], row["current_week"])].append(float(row["insertion_time"]))
+                    else:
+                        status = row.get("cache_status") or "uncached"
+                        label = row["query_type"] if status == "uncached" else f"{row['query_type']}:{status}"
+                        run[kind][(row["table_name"], label)].append(float(row["query_time"]))
+        return run
+
+    @staticmethod
+    def verdict(p_value: float, ratio: float, alpha: float, threshold: float) -> str:
+        if p_value >= alpha or ratio is None:
+            return "unchanged"
+        if ratio > 1 + threshold:
+            return "regression"
+        if ratio < 1 - threshold:
+            return "improvement"
+        return "unchanged"
+
+    @classmethod
+    def compare_group(cls, key: tuple, baseline: list, current: list, paired: bool,
+                      alpha: float, threshold: float, min_samples: int) -> dict:
+        """Testa um grupo e monta a linha do relatório."""
+        table_name, query_type, week = key
+        row = {
+            "table_name": table_name, "query_type": query_type, "week": week,
+            "test": "wilcoxon" if paired else "mann_whitney",
+            "baseline_samples": len(baseline), "current_samples": len(current),
+            "baseline_median": statistics.median(baseline) if baseline else None,
+            "current_median": statistics.median(current) if current else None,
+            "ratio": None, "statistic": None, "p_value": None,
+        }
+        if not baseline or not current:
+            row.update(test=None, verdict="new" if current else "missing")
+            return row
+
+        if paired:
+            ratios = [c / b for b, c in zip(baseline, current) if b > 0]
+            row["ratio"] = statistics.median(ratios) if ratios else None
+        elif row["baseline_median"] > 0:
+            row["ratio"] = row["current_median"] / row["baseline_median"]
+
+        if min(len(baseline), len(current)) < min_samples:
+            row["verdict"] = "insufficient"
+            return row
+        test = cls.wilcoxon if paired else cls.mann_whitney
+        row["statistic"], row["p_value"] = test(baseline, current)
+        row["verdict"] = cls.verdict(row["p_value"], row["ratio"], alpha, threshold)
+        return row
+
+    @classmethod
+    def compare(cls, baseline: dict, current: dict, alpha: float, threshold: float, min_samples: int) -> list:
+        """
+        Compara duas execuções lidas por load_run.
+
+        Returns:
+            list: Linhas do relatório, ordenadas por banco, tipo e semana.
+        """
+        rows = []
+        for table_name, label in sorted(set(baseline["query"]) | set(current["query"])):
+            rows.append(cls.compare_group(
+                (table_name, label, ""), baseline["query"].get((table_name, label), []),
+                current["query"].get((table_name, label), []), False, alpha, threshold, min_samples
+            ))
+
+        tables = sorted({table_name for table_name, _ in set(baseline["insertion"]) | set(current["insertion"])})
+        for table_name in tables:
+            weeks_baseline = {week: times for (name, week), times in baseline["insertion"].items() if name == table_name}
+            weeks_current = {week: times for (name, week), times in current["insertion"].items() if name == table_name}
+            common = sorted(set(weeks_baseline) & set(weeks_current))
+            if common:
+                # Semanas pareadas pela mediana das rodadas de cada lado
+                rows.append(cls.compare_group(
+                    (table_name, "insertion", "all"),
+                    [statistics.median(weeks_baseline[week]) for week in common],
+                    [statistics.median(weeks_current[week]) for week in common],
+                    True, alpha, threshold, min_samples
+                ))
+            else:
+                rows.append(cls.compare_group(
+                    (table_name, "insertion", "all"), sum(weeks_baseline.values(), []),
+                    sum(weeks_current.values(), []), False, alpha, threshold, min_samples
+                ))
+            for week in common:
+                if min(len(weeks_baseline[week]), len(weeks_current[week])) >= min_samples:
+                    rows.append(cls.compare_group(
+                        (table_name, "insertion", week), weeks_baseline[week], weeks_current[week],
+                        False, alpha, threshold, min_samples
+                    ))
+        return rows
+
+    @classmethod
+    def save_baseline(cls, current_directory: str, baseline_directory: str) -> list:
+        """
+        Copia os CSVs de tempos da execução atual para o diretório da linha de base.
+
+        Returns:
+            list: Arquivos copiados.
+        """
+        os.makedirs(baseline_directory, exist_ok=True)
+        copied = []
+        for file_name in cls.RUN_FILES.values():
+            source = os.path.join(current_directory, file_name)
+            if os.path.exists(source):
+                copied.append(shutil.copy2(source, os.path.join(baseline_directory, file_name)))
+        return copied
+
+    @classmethod
+    def run(cls,
+            baseline_directory: str,
+            current_directory: str,
+            file_name_regression: str,
+            alpha: float,
+            threshold: float,
+            min_samples: int,
+            table_names: list = None
+        ) -> list:
+        """
+        Compara a execução atual com a linha de base e grava o relatório.
+
+        Args:
+            baseline_directory (str): Diretório com os CSVs da linha de base.
+            current_directory (str): Diretório com os CSVs da execução atual.
+            file_name_regression (str): Nome do arquivo CSV de saída.
+            alpha (float): Nível de significância dos testes.
+            threshold (float): Variação relativa mínima da mediana (0.1 = 10%) para contar como regressão ou melhoria.
+            min_samples (int): Amostras mínimas de cada lado para testar um grupo.
+            table_names (list): Bancos a comparar, ou None para todos.
+
+        Returns:
+            list: Linhas gravadas no CSV.
+
+        Raises:
+            FileNotFoundError: Se faltar o diretório ou um CSV de alguma das execuções (ver load_run).
+        """
+        rows = cls.compare(
+            cls.load_run(baseline_directory, table_names), cls.load_run(current_directory, table_names),
+            alpha, threshold, min_samples
+        )
+        with open(file_name_regression, mode='w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(cls.HEADER_REGRESSION)
+            for row in rows:
+                writer.writerow([row[column] for column in cls.HEADER_REGRESSION])
+
+        for row in rows:
+            if row["verdict"] in ("regression", "improvement"):
+                print(f"{row['verdict']}: {row['table_name']} {row['query_type']} {row['week']} "
+                      f"{row['ratio']:.2f}x (p = {row['p_value']:.4f})")
+            elif row["verdict"] == "missing":
+                print(f"missing: {row['table_name']} {row['query_type']} {row['week']} (ausente na execução atual)")
+        verdicts = [row["verdict"] for row in rows]
+        print(", ".join(f"{verdicts.count(v)} {v}" for v in sorted(set(verdicts))))
+        return rows
@@ -0,0 +1,167 @@
+import csv
+import statistics
+import threading
+import time
+from datetime import datetime, timedelta
+from src.backend import create_backend
+from src.partition_manager import PartitionManager
+from src.query_spec import QuerySpec
+
+class RetentionManager:
+    """
+    Fase de ciclo de vida depois da ingestão: expira as semanas mais antigas com o mecanismo nativo de cada banco.
+
+    Opcionalmente grava antes os agregados de 15 minutos do que vai ser apagado (downsampling). Mede o
+    tempo do delete, as linhas removidas por partições inteiras e por delete linha a linha, o espaço
+    líquido recuperado (medido logo depois e após uma espera, já que vários mecanismos liberam espaço em
+    segundo plano) e a latência de uma consulta de referência rodando ao mesmo tempo.
+
+    O espaço recuperado desconta os agregados gravados: no MariaDB e no SQLite eles ficam no banco medido
+    por encoding_stats; no InfluxDB ficam no bucket de downsampling, somado via Backend.downsample_bytes.
+    """
+
+    HEADER_RETENTION = [
+        "table_name", "method", "cutoff", "weeks_expired", "downsample_time", "delete_time",
+        "points_before", "points_after", "rows_dropped", "rows_deleted", "bytes_before", "bytes_after", "bytes_settled", "reclaimed_bytes",
+        "baseline_query_time", "concurrent_query_time", "concurrent_queries", "query_errors", "latency_ratio"
+    ]
+
+    @staticmethod
+    def cutoff(data_start: datetime, weeks: int, granularities: list = None) -> datetime:
+        """
+        Início da semana ISO seguinte às `weeks` semanas mais antigas dos dados.
+
+        Com bancos particionados (`granularities` das partições), o limite sobe até a próxima fronteira da
+        partição mais larga, para que partições inteiras possam ser apagadas com DROP PARTITION; o mesmo
+        limite vale para todos os bancos, então todos apagam o mesmo intervalo.
+        """
+        cutoff = QuerySpec.align(data_start, "week") + timedelta(weeks=weeks)
+        for granularity in PartitionManager.GRANULARITIES:
+            if granularity in (granularities or []):
+                start = QuerySpec.align(cutoff, granularity)
+                return start if start == cutoff else PartitionManager.next_boundary(start, granularity)
+        return cutoff
+
+    @staticmethod
+    def weeks_before(data_start: datetime, cutoff: datetime) -> float:
+        """Semanas expiradas até `cutoff`, contadas do início da primeira semana ISO dos dados."""
+        return (cutoff - QuerySpec.align(data_start, "week")) / timedelta(weeks=1)
+
+    @staticmethod
+    def query_loop(backend, spec: QuerySpec, rounds: int, measurements: dict, ready: threading.Event, stop: threading.Event) -> None:
+        """
+        Roda a consulta de referência numa conexão própria até `stop` ser sinalizado.
+
+        As primeiras `rounds` execuções, antes de `ready`, formam a linha de base sem concorrência.
+        """
+        backend.connect()
+        try:
+            query = backend.compile_query(spec)
+            measurements["baseline"] = [backend.run_query(spec, query)[1] for _ in range(rounds)]
+            ready.set()
+            while not stop.is_set():
+                try:
+                    measurements["concurrent"].append(backend.run_query(spec, query)[1])
+                except Exception as e:
+                    print(f"Erro na consulta concorrente em {backend.name}: {e}")
+                    measurements["errors"] += 1
+        finally:
+            ready.set()
+            backend.close()
+
+    @classmethod
+    def run(cls,
+            db: dict,
+            weeks: int,
+            cutoff: datetime,
+            spec: QuerySpec,
+            rounds: int,
+            downsample: bool,
+            settle_seconds: float,
+            file_name_retention: str
+        ) -> dict:
+        """
+        Expira os dados anteriores a `cutoff` em um banco e grava o resultado.
+
+        Args:
+            db (dict): Entrada de DATABASES do banco.
+            weeks (float): Semanas expiradas (só para o relatório).
+            cutoff (datetime): Os dados anteriores a este instante são apagados.
+            spec (QuerySpec): Consulta de referência, de preferência fora do intervalo apagado.
+            rounds (int): Execuções da consulta antes do delete (linha de base).
+            downsample (bool): Grava os agregados de 15 minutos antes de apagar.
+            settle_seconds (float): Espera antes da segunda medição do espaço.
+            file_name_retention (str): Nome do arquivo CSV de saída.
+
+        Returns:
+            dict: Linha gravada no CSV.
+        """
+        print(f"----------------------\nRetenção em {db['name']}: apagando antes de {cutoff:%Y-%m-%d}")
+        backend = create_backend(db)
+        before = backend.encoding_stats()
+        downsample_before = backend.downsample_bytes()
+
+        downsample_time = None
+        if downsample:
+            start_time = time.time()
+            if backend.downsample_before(cutoff):
+                downsample_time = time.time() - start_time
+                print(f"Downsampling em {db['name']}: {downsample_time} segundos")
+
+        # A consulta concorrente usa outra instância do backend, com conexão própria
+        measurements = {"baseline": [], "concurrent": [], "errors": 0}
+        ready, stop = threading.Event(), threading.Event()
+        thread = threading.Thread(
+            target=cls.query_loop, args=(create_backend(db), spec, rounds, measurements, ready, stop), daemon=True
+        )
+        thread.start()
+        ready.wait()
+
+        start_time = time.time()
+        try:
+            method, rows_deleted = backend.expire_before(cutoff)
+        finally:
+            delete_time = time.time() - start_time
+            stop.set()
+            thread.join()
+        print(f"Tempo de retenção ({method}) no {db['name']}: {delete_time} segundos")
+
+        after = backend.encoding_stats()
+        time.sleep(settle_seconds)
+        settled = backend.encoding_stats()
+        downsample_settled = backend.downsample_bytes()
+
+        # O que não saiu pelo delete linha a linha saiu com as partições inteiras
+        removed = before["points"] - after["points"]
+        rows_deleted = removed if rows_deleted is None else rows_deleted
+        rows_dropped = removed - rows_deleted if method.startswith("drop_partition") else 0
+
+        baseline = statistics.median(measurements["baseline"]) if measurements["baseline"] else None
+        concurrent = statistics.median(measurements["concurrent"]) if measurements["concurrent"] else None
+        result = {
+            "table_name": db["name"],
+            "method": method,
+            "cutoff": cutoff.strftime("%Y-%m-%d %H:%M:%S"),
+            "weeks_expired": weeks,
+            "downsample_time": downsample_time,
+            "delete_time": delete_time,
+            "points_before": before["points"],
+            "points_after": after["points"],
+            "rows_dropped": rows_dropped,
+            "rows_deleted": rows_deleted,
+            "bytes_before": before["bytes"],
+            "bytes_after": after["bytes"],
+            "bytes_settled": settled["bytes"],
+            "reclaimed_bytes": (before["bytes"] + downsample_before) - (settled["bytes"] + downsample_settled),
+            "baseline_query_time": baseline,
+            "concurrent_query_time": concurrent,
+            "concurrent_queries": len(measurements["concurrent"]),
+            "query_errors": measurements["errors"],
+            "latency_ratio": concurrent / baseline if baseline and concurrent is not None else None,
+        }
+        print(f"{db['name']}: {removed} pontos apagados ({rows_dropped} com partições inteiras, {rows_deleted} por delete), "
+              f"{result['reclaimed_bytes']} bytes recuperados")
+
+        with open(file_name_retention, mode='a', newline='') as file:
+            csv.writer(file).writerow([result[column] for column in cls.HEADER_RETENTION])
+        return result
@@ -0,0 +1,415 @@
+from datetime import datetime, timedelta
+from src.query_database import QueryDatabase
+from src.query_spec import QuerySpec
+
+class RollupManager:
+    """Classe para manter rollups (15 minutos, semana e mês) atualizados incrementalmente e rotear consultas elegíveis."""
+
+    # Variantes de benchmark que mantêm rollups sobre os dados de uma base já existente
+    ROLLUP_VARIANTS = {
+        "mariadb_innodb_rollup": {"base": "mariadb_innodb", "engine": "InnoDB"},
+        "mariadb_myrocks_rollup": {"base": "mariadb_myrocks", "engine": "ROCKSDB"},
+        "influxdb_rollup": {"base": "influxdb", "engine": "InfluxDB"},
+    }
+
+    # Da granularidade mais grossa para a mais fina
+    GRANULARITIES = ["month", "week", "15min"]
+    TABLES = {
+        "15min": "sensor_rollup_15min",
+        "week": "sensor_rollup_week",
+        "month": "sensor_rollup_month",
+    }
+    INFLUX_MEASUREMENT = "sensor_rollup"
+    INFLUX_WINDOWS = {"15min": "15m", "week": "1w", "month": "1mo"}
+
+    # Início do intervalo de 15 minutos em cada dialeto, usado no downsampling antes da retenção
+    DOWNSAMPLE_BUCKET_SQL = {
+        "plain": "FROM_UNIXTIME(FLOOR(UNIX_TIMESTAMP(event_timestamp) / 900) * 900)",
+        "structured": "FROM_UNIXTIME(FLOOR(UNIX_TIMESTAMP(event_timestamp) / 900) * 900)",
+        "compact": "DATE_ADD('1970-01-01', INTERVAL event_timestamp DIV 900 * 900 SECOND)",
+        "sqlite": "datetime(event_timestamp / 900 * 900, 'unixepoch')",
+    }
+
+    # Agregações que podem ser montadas a partir de count/sum/min/max
+    ROUTABLE_AGGREGATES = ["mean", "sum", "max_min", "count"]
+    # No Flux, max_min e count só têm caminho sobre o intervalo inteiro (sem agrupamento temporal)
+    FLUX_BUCKETED_AGGREGATES = ["mean", "sum"]
+
+    @classmethod
+    def base_of(cls, variant_name: str) -> str:
+        """Retorna o banco (ou bucket) cujos dados brutos alimentam a variante de rollup."""
+        return cls.ROLLUP_VARIANTS[variant_name]["base"]
+
+    @classmethod
+    def engine_of_base(cls, base_name: str):
+        """Retorna o engine dos rollups de uma base, ou None se a base não mantém rollups."""
+        for variant in cls.ROLLUP_VARIANTS.values():
+            if variant["base"] == base_name:
+                return variant["engine"]
+        return None
+
+    @staticmethod
+    def influx_rollup_bucket(config) -> str:
+        """Retorna o nome do bucket de downsampling a partir do config.ini."""
+        bucket = config.get("influxdb", "bucket")
+        return config.get("influxdb", "rollup_bucket", fallback=f"{bucket}_rollup")
+
+    @classmethod
+    def bucket_start(cls, granularity: str, timestamp: datetime) -> datetime:
+        """Retorna o início do intervalo de rollup que contém o timestamp."""
+        if granularity not in cls.TABLES:
+            raise ValueError(f"Granularidade de rollup desconhecida: {granularity}")
+        return QuerySpec.align(timestamp, granularity)
+
+    @staticmethod
+    def from_mariadb_rows(rows: list):
+        """Converte as linhas do CSV (timestamp, temperatura, sensor) em tuplas (datetime, sensor, valor)."""
+        for row in rows:
+            yield datetime.strptime(row[0], "%Y-%m-%d %H:%M:%S"), row[2], float(row[1])
+
+    @staticmethod
+    def from_influx_records(records: list):
+        """Converte os registros do InfluxDB em tuplas (datetime, sensor, valor)."""
+        for record in records:
+            timestamp = datetime.fromisoformat(record["time"].rstrip("Z"))
+            yield timestamp, record["tags"]["sensor_name"], float(record["fields"]["temperature"])
+
+    @classmethod
+    def compute_rollups(cls, samples) -> dict:
+        """
+        Agrega um lote de amostras em count/sum/min/max por sensor e intervalo.
+
+        Args:
+            samples: Iterável de tuplas (datetime, sensor, valor).
+
+        Returns:
+            dict: {granularidade: {(sensor, início do intervalo): [count, sum, min, max]}}.
+        """
+        rollups = {granularity: {} for granularity in cls.GRANULARITIES}
+        for timestamp, sensor, value in samples:
+            for granularity, buckets in rollups.items():
+                key = (sensor, cls.bucket_start(granularity, timestamp))
+                stats = buckets.get(key)
+                if stats is None:
+                    buckets[key] = [1, value, value, value]
+                else:
+                    stats[0] += 1
+                    stats[1] += value
+                    if value < stats[2]:
+                        stats[2] = value
+                    if value > stats[3]:
+                        stats[3] = value
+        return rollups
+
+    @classmethod
+    def get_table_schemas(cls, engine: str) -> list:
+        """Retorna o schema SQL das tabelas de rollup para o engine informado."""
+        return [
+            f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    sensor_name VARCHAR(10) NOT NULL,
+                    bucket_start DATETIME NOT NULL,
+                    count_temp BIGINT NOT NULL,
+                    sum_temp DOUBLE NOT NULL,
+                    min_temp FLOAT NOT NULL,
+                    max_temp FLOAT NOT NULL,
+                    PRIMARY KEY (sensor_name, bucket_start)
+                ) ENGINE={engine};
+            """
+            for table in cls.TABLES.values()
+        ]
+
+    @classmethod
+    def update_mariadb(cls, cursor, rollups: dict, batch_size: int) -> None:
+        """Soma os agregados do lote nas tabelas de rollup (upsert incremental)."""
+        for granularity, buckets in rollups.items():
+            rows = [
+                (sensor, start.strftime("%Y-%m-%d %H:%M:%S"), *stats)
+                for (sensor, start), stats in buckets.items()
+            ]
+            for i in range(0, len(rows), batch_size):
+                cursor.executemany(
+                    f"INSERT INTO {cls.TABLES[granularity]} "
+                    f"(sensor_name, bucket_start, count_temp, sum_temp, min_temp, max_temp) "
+                    f"VALUES (%s, %s, %s, %s, %s, %s) "
+                    f"ON DUPLICATE KEY UPDATE "
+                    f"count_temp = count_temp + VALUES(count_temp), "
+                    f"sum_temp = sum_temp + VALUES(sum_temp), "
+                    f"min_temp = LEAST(min_temp, VALUES(min_temp)), "
+                    f"max_temp = GREATEST(max_temp, VALUES(max_temp))",
+                    rows[i:i + batch_size]
+                )
+
+    @classmethod
+    def downsample_sql(cls, dialect: str) -> str:
+        """
+        INSERT ... SELECT que grava na tabela de 15 minutos os agregados dos dados anteriores ao limite.
+
+        O limite é o único parâmetro da consulta. Os intervalos são recalculados a partir dos dados
+        brutos, então substituem o que já existir (inclusive o mantido pelas variantes de rollup).
+
+        Args:
+            dialect (str): "plain", "structured", "compact" ou "sqlite" (ver QueryDatabase.build_sql).
+        """
+        source = "sensor_data JOIN sensors USING (sensor_id)" if dialect == "compact" else "sensor_data"
+        placeholder = "?" if dialect == "sqlite" else "%s"
+        columns = "(sensor_name, bucket_start, count_temp, sum_temp, min_temp, max_temp)"
+        select = (
+            f"SELECT sensor_name, {cls.DOWNSAMPLE_BUCKET_SQL[dialect]} AS bucket_start, "
+            f"COUNT(*), SUM(temperature), MIN(temperature), MAX(temperature) "
+            f"FROM {source} WHERE event_timestamp < {placeholder} "
+            f"GROUP BY sensor_name, bucket_start"
+        )
+        if dialect == "sqlite":
+            return f"INSERT OR REPLACE INTO {cls.TABLES['15min']} {columns} {select}"
+        return (
+            f"INSERT INTO {cls.TABLES['15min']} {columns} {select} "
+            f"ON DUPLICATE KEY UPDATE "
+            f"count_temp = VALUES(count_temp), sum_temp = VALUES(sum_temp), "
+            f"min_temp = VALUES(min_temp), max_temp = VALUES(max_temp)"
+        )
+
+    @classmethod
+    def downsample_flux(cls, bucket: str, rollup_bucket: str, cutoff: datetime) -> str:
+        """
+        Tarefa Flux que grava no bucket de downsampling os agregados de 15 minutos anteriores a `cutoff`.
+
+        Os pontos seguem o formato de to_influx_points (campos count/sum/min/max, tag window, tempo
+        no início do intervalo), então sobrescrevem os intervalos já gravados.
+        """
+        window = cls.INFLUX_WINDOWS["15min"]
+        aggregates = ",\n            ".join(
+            f'data |> aggregateWindow(every: {window}, fn: {function}, createEmpty: false, timeSrc: "_start") '
+            f'|> set(key: "_field", value: "{field}")'
+            for field, function in [("count", "count"), ("sum", "sum"), ("min", "min"), ("max", "max")]
+        )
+        return f"""
+        data = from(bucket: "{bucket}")
+        |> range(start: 0, stop: {cutoff:%Y-%m-%dT%H:%M:%SZ})
+        |> filter(fn: (r) => r._measurement == "sensor_data" and r._field == "temperature")
+        |> group(columns: ["sensor_name"])
+
+        union(tables: [
+            {aggregates}
+        ])
+        |> map(fn: (r) => ({{r with _measurement: "{cls.INFLUX_MEASUREMENT}", window: "{window}"}}))
+        |> to(bucket: "{rollup_bucket}", tagColumns: ["sensor_name", "window"])
+        """
+
+    @classmethod
+    def to_influx_points(cls, rollups: dict) -> list:
+        """
+        Converte os agregados em pontos para o bucket de downsampling.
+
+        O InfluxDB sobrescreve pontos com mesma série e timestamp, então os intervalos já
+        existentes devem ser mesclados antes (ver read_influx_rollups e merge_rollups).
+        """
+        from influxdb_client import Point
+        points = []
+        for granularity, buckets in rollups.items():
+            for (sensor, start), (count, total, minimum, maximum) in buckets.items():
+                points.append(
+                    Point(cls.INFLUX_MEASUREMENT)
+                    .tag("sensor_name", sensor)
+                    .tag("window", cls.INFLUX_WINDOWS[granularity])
+                    .field("count", count)
+                    .field("sum", total)
+                    .field("min", minimum)
+                    .field("max", maximum)
+                    .time(start.isoformat() + "Z")
+                )
+        return points
+
+    @classmethod
+    def read_influx_rollups(cls, query_api, bucket: str, org: str, rollups: dict) -> dict:
+        """Lê do bucket de downsampling os agregados já gravados para os intervalos afetados pelo lote."""
+        previous = {}
+        for granularity, buckets in rollups.items():
+            if not buckets:
+                continue
+            starts = [start for _, start in buckets]
+            query = f"""
+            from(bucket: "{bucket}")
+            |> range(start: {min(starts):%Y-%m-%dT%H:%M:%SZ}, stop: {max(starts) + timedelta(seconds=1):%Y-%m-%dT%H:%M:%SZ})
+            |> filter(fn: (r) => r._measurement == "{cls.INFLUX_MEASUREMENT}" and r.window == "{cls.INFLUX_WINDOWS[granularity]}")
+            |> pivot(rowKey: ["_time", "sensor_name"], columnKey: ["_field"], valueColumn: "_value")
+            """
+            previous[granularity] = {}
+            for table in query_api.query(query=query, org=org):
+                for record in table.records:
+                    key = (record.values["sensor_name"], record.get_time().replace(tzinfo=None))
+                    previous[granularity][key] = [
+                        record.values["count"], record.values["sum"], record.values["min"], record.values["max"]
+                    ]
+        return previous
+
+    @staticmethod
+    def merge_rollups(current: dict, previous: dict) -> None:
+        """Mescla em `current` os agregados já persistidos para os mesmos intervalos."""
+        for granularity, buckets in current.items():
+            for key, stats in buckets.items():
+                old = previous.get(granularity, {}).get(key)
+                if old is None:
+                    continue
+                stats[0] += old[0]
+                stats[1] += old[1]
+                stats[2] = min(stats[2], old[2])
+                stats[3] = max(stats[3], old[3])
+
+    @classmethod
+    def choose_granularity(cls, spec: QuerySpec, dialect: str):
+        """
+        Escolhe o rollup mais grosso capaz de responder à consulta.
+
+        Um rollup é elegível quando o agrupamento pedido pode ser montado a partir dos seus
+        intervalos e os limites do filtro de tempo caem exatamente em fronteiras de intervalo.
+        """
+        for granularity in cls.GRANULARITIES:
+            if spec.bucket is not None and granularity != "15min" and granularity != spec.bucket:
+                continue
+            # aggregateWindow(every: 1w) é alinhado à época (quinta-feira), não à semana ISO
+            if dialect == "flux" and spec.bucket == "week" and granularity == "week":
+                continue
+            aligned = all(
+                limit is None or cls.bucket_start(granularity, limit) == limit
+                for limit in (spec.start, spec.stop)
+            )
+            if aligned:
+                return granularity
+        return None
+
+    @classmethod
+    def route(cls, spec: QuerySpec, dialect: str, bucket: str = None):
+        """
+        Retorna a consulta equivalente sobre os rollups, ou None para usar os dados brutos.
+
+        Args:
+            spec (QuerySpec): Consulta a rotear.
+            dialect (str): "sql" (MariaDB) ou "flux" (InfluxDB).
+            bucket (str): Bucket de downsampling, usado apenas no dialeto Flux.
+        """
+        if spec.aggregate not in cls.ROUTABLE_AGGREGATES or spec.per_sensor or spec.sensors is not None:
+            return None
+        # Só os agrupamentos com coluna (ou janela) nos rollups podem ser montados a partir deles
+        if spec.bucket is not None and spec.bucket not in cls.TABLES:
+            return None
+        if dialect == "flux" and spec.bucket is not None and spec.aggregate not in cls.FLUX_BUCKETED_AGGREGATES:
+            return None
+        granularity = cls.choose_granularity(spec, dialect)
+        if granularity is None:
+            return None
+        if dialect == "flux":
+            return cls.build_flux(spec, granularity, bucket)
+        return cls.build_sql(spec, granularity)
+
+    @classmethod
+    def build_sql(cls, spec: QuerySpec, granularity: str) -> str:
+        """Monta a consulta SQL sobre a tabela de rollup escolhida."""
+        bucket_columns = {
+            "week": ("YEARWEEK(bucket_start, 1)", "week_interval"),
+            "month": ("DATE_FORMAT(bucket_start, '%Y-%m')", "month_start"),
+            "15min": ("bucket_start", "interval_15min"),
+        }
+        aggregates = {
+            "mean": "SUM(sum_temp) / SUM(count_temp) AS avg_temp",
+            "sum": "SUM(sum_temp) AS sum_temperature",
+            "max_min": "MAX(max_temp) AS max_temp, MIN(min_temp) AS min_temp",
+            "count": "SUM(count_temp)",
+        }
+
+        select = [aggregates[spec.aggregate]]
+        conditions = []
+        group_by = ""
+        if spec.bucket is not None:
+            expression, alias = bucket_columns[spec.bucket]
+            select.insert(0, f"{expression} AS {alias}")
+            group_by = f"GROUP BY {alias} ORDER BY {alias}"
+        if spec.sensor is not None:
+            conditions.append(f"sensor_name = {QueryDatabase.format_literal(spec.sensor)}")
+        if spec.start is not None:
+            conditions.append(f"bucket_start >= {QueryDatabase.format_literal(spec.start)}")
+        if spec.stop is not None:
+            conditions.append(f"bucket_start < {QueryDatabase.format_literal(spec.stop)}")
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        return f"""
+            SELECT {', '.join(select)}
+            FROM {cls.TABLES[granularity]}
+            {where}
+            {group_by};
+        """
+
+    @classmethod
+    def build_flux(cls, spec: QuerySpec, granularity: str, bucket: str) -> str:
+        """
+        Monta a consulta Flux sobre o bucket de downsampling.
+
+        Sem agrupamento temporal, as agregações valem para o intervalo inteiro (uma linha, como no SQL);
+        com agrupamento, só mean e sum são suportadas (ver route).
+        """
+        start = f"{spec.start:%Y-%m-%dT%H:%M:%SZ}" if spec.start is not None else "0"
+        stop = f", stop: {spec.stop:%Y-%m-%dT%H:%M:%SZ}" if spec.stop is not None else ""
+        query = f"""
+        from(bucket: "{bucket}")
+        |> range(start: {start}{stop})
+        |> filter(fn: (r) => r._measurement == "{cls.INFLUX_MEASUREMENT}" and r.window == "{cls.INFLUX_WINDOWS[granularity]}")
+        """
+        if spec.sensor is not None:
+            query += f'|> filter(fn: (r) => r.sensor_name == "{spec.sensor}")\n        '
+
+        every = cls.INFLUX_WINDOWS[spec.bucket] if spec.bucket is not None else None
+        if spec.aggregate == "mean" and every is None:
+            query += """
+        |> filter(fn: (r) => r._field == "sum" or r._field == "count")
+        |> toFloat()
+        |> group()
+        |> reduce(
+            identity: {sum: 0.0, count: 0.0},
+            fn: (r, accumulator) => ({
+                sum: if r._field == "sum" then accumulator.sum + r._value else accumulator.sum,
+                count: if r._field == "count" then accumulator.count + r._value else accumulator.count
+            })
+        )
+        |> map(fn: (r) => ({ _value: r.sum / r.count }))
+        """
+        elif spec.aggregate == "mean":
+            query += f"""
+        |> filter(fn: (r) => r._field == "sum" or r._field == "count")
+        |> group(columns: ["_field"])
+        |> aggregateWindow(every: {every}, fn: sum, createEmpty: false)
+        |> pivot(rowKey: ["_time"], columnKey: ["_field"], valueColumn: "_value")
+        |> map(fn: (r) => ({{ _time: r._time, _value: r.sum / float(v: r.count) }}))
+        """
+        elif spec.aggregate == "sum" and every is None:
+            query += """
+        |> filter(fn: (r) => r._field == "sum")
+        |> group()
+        |> sum()
+        """
+        elif spec.aggregate == "sum":
+            query += f"""
+        |> filter(fn: (r) => r._field == "sum")
+        |> group()
+        |> aggregateWindow(every: {every}, fn: sum, createEmpty: false)
+        """
+        elif spec.aggregate == "max_min":
+            query += """
+        |> filter(fn: (r) => r._field == "max" or r._field == "min")
+        |> pivot(rowKey: ["_time", "sensor_name"], columnKey: ["_field"], valueColumn: "_value")
+        |> keep(columns: ["sensor_name", "max", "min"])
+        |> group()
+        |> reduce(
+            identity: {max: float(v: "-inf"), min: float(v: "inf")},
+            fn: (r, accumulator) => ({
+                max: if r.max > accumulator.max then r.max else accumulator.max,
+                min: if r.min < accumulator.min then r.min else accumulator.min
+            })
+        )
+        """
+        elif spec.aggregate == "count":
+            query += """
+        |> filter(fn: (r) => r._field == "count")
+        |> group()
+        |> sum()
+        """
+        return query
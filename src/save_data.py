@@ -1,8 +1,26 @@
 import csv
+import os
 
 class SaveData:
     """Classe para salvar tempos de inserção e consulta em arquivos CSV."""
 
+    @staticmethod
+    def reset_csv(file_name: str, header: list, table_names: list = None) -> None:
+        """
+        Prepara um CSV de resultados para uma nova execução.
+
+        Sem `table_names`, o arquivo é recriado só com o cabeçalho. Com `table_names` (execução de parte
+        dos bancos), só as linhas desses bancos (primeira coluna) são removidas; as dos outros ficam.
+        """
+        rows = []
+        if table_names is not None and os.path.exists(file_name):
+            with open(file_name, newline='') as file:
+                rows = [row for row in list(csv.reader(file))[1:] if row and row[0] not in table_names]
+        with open(file_name, mode='w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(header)
+            writer.writerows(rows)
+
     @staticmethod
     def save_insertion_time_to_csv(
         table_name: str, 
@@ -29,11 +47,97 @@ class SaveData:
         round_number: int, 
         file_name_query: str,
         ram_usage: int,
-        swap_usage: int
+        swap_usage: int,
+        cache_status: str = "uncached"
     ) -> None:
         """
         Salva o tempo de consulta em um arquivo CSV.
         """
         with open(file_name_query, mode='a', newline='') as file:
             writer = csv.writer(file)
-            writer.writerow([table_name, query_time, query_type, round_number, ram_usage, swap_usage])
+            writer.writerow([table_name, query_time, query_type, round_number, ram_usage, swap_usage, cache_status])
+
+    @staticmethod
+    def save_cache_stats_to_csv(cache_name: str, stats: dict, file_name_cache: str) -> None:
+        """
+        Salva os contadores do cache de consultas em um arquivo CSV.
+        """
+        with open(file_name_cache, mode='a', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow([
+                cache_name, stats["hits"], stats["misses"], stats["evictions"],
+                stats["invalidations"], stats["entries"], stats["bytes"]
+            ])
+
+    @staticmethod
+    def save_encoding_stats_to_csv(table_name: str, stats: dict, file_name_encoding: str) -> None:
+        """
+        Salva pontos, cardinalidade de séries e bytes por ponto de um banco em um arquivo CSV.
+        """
+        bytes_per_point = stats["bytes"] / stats["points"] if stats["points"] else 0
+        with open(file_name_encoding, mode='a', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow([table_name, stats["points"], stats["series"], stats["bytes"], bytes_per_point])
+
+    @staticmethod
+    def save_ingest_profile_to_csv(
+        table_name: str,
+        engine: str,
+        profile: str,
+        load_time: float,
+        index_build_time: float,
+        storage_bytes: int,
+        file_name_profile: str
+    ) -> None:
+        """
+        Salva o tempo até os dados estarem prontos para consulta (carga + índices) e o armazenamento final.
+        """
+        with open(file_name_profile, mode='a', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow([table_name, engine, profile, load_time, index_build_time, load_time + index_build_time, storage_bytes])
+
+    @staticmethod
+    def save_scenario_result_to_csv(
+        table_name: str,
+        scenario: str,
+        stats: dict,
+        insertion_time: float,
+        rows_per_second: float,
+        storage_bytes: int,
+        throughput_ratio: float,
+        storage_ratio: float,
+        file_name_scenario: str
+    ) -> None:
+        """
+        Salva a vazão e o armazenamento de um cenário de ingestão, relativos à entrada ordenada.
+        """
+        with open(file_name_scenario, mode='a', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow([
+                table_name, scenario, stats["rows"], stats["batches"], stats["late_batches"], insertion_time,
+                rows_per_second, storage_bytes, throughput_ratio, storage_ratio
+            ])
+
+    @staticmethod
+    def save_cardinality_result_to_csv(
+        table_name: str,
+        sensors: int,
+        rows: int,
+        insertion_time: float,
+        series: int,
+        storage_bytes: int,
+        query_type: str,
+        query_time: float,
+        result_rows: int,
+        file_name_cardinality: str
+    ) -> None:
+        """
+        Salva a ingestão e a latência de uma consulta em um nível de cardinalidade.
+        """
+        rows_per_second = rows / insertion_time if insertion_time else 0
+        with open(file_name_cardinality, mode='a', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow([
+                table_name, sensors, rows, insertion_time, rows_per_second, series, storage_bytes,
+                query_type, query_time, result_rows
+            ])
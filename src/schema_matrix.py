@@ -0,0 +1,293 @@
+import csv
+import re
+import statistics
+from src.backend import create_backend
+from src.table_manager import TableManager
+
+class SchemaMatrix:
+    """
+    Executa a ingestão e as consultas de referência em variantes de schema de um mesmo banco.
+
+    Cada variante recria o banco com o seu CREATE TABLE, insere o conjunto de dados completo e roda
+    as consultas; o resultado traz tempo de ingestão, armazenamento e latência por consulta.
+    """
+
+    HEADER_MATRIX = [
+        "table_name", "variant", "ingest_time", "storage", "data_bytes", "index_bytes", "allocated_bytes",
+        "query_type", "query_time", "index_used"
+    ]
+    HEADER_INDEX_REPORT = ["table_name", "index_name", "ingest_cost", "index_bytes", "query_type", "latency_gain", "used"]
+    HEADER_TRADEOFF = [
+        "table_name", "variant", "rows", "ingest_time", "rows_per_second", "storage", "total_bytes",
+        "query_time", "storage_ratio", "ingest_rate_ratio", "latency_ratio"
+    ]
+
+    @staticmethod
+    def count_rows(file_name: str) -> int:
+        """Número de linhas já gravadas no CSV (0 se o arquivo não existe)."""
+        try:
+            with open(file_name, newline='') as file:
+                return sum(1 for _ in file)
+        except FileNotFoundError:
+            return 0
+
+    @staticmethod
+    def ingest_time(file_name_insertion: str, db_name: str, skip_rows: int) -> float:
+        """Soma os tempos de inserção gravados por db_name depois das primeiras skip_rows linhas."""
+        with open(file_name_insertion, newline='') as file:
+            rows = list(csv.reader(file))[skip_rows:]
+        return sum(float(row[1]) for row in rows if row and row[0] == db_name)
+
+    @staticmethod
+    def flush_to_disk(cursor, engine: str, column_families: list) -> None:
+        """
+        Grava em disco o que ainda está só na memória, para que o tamanho medido reflita a compressão.
+
+        No InnoDB a compressão de página só acontece quando a página é gravada, então as páginas sujas
+        da tabela são descarregadas (FLUSH TABLES ... FOR EXPORT). No MyRocks os memtables são gravados
+        e as column families da variante compactadas, senão os dados ficam no memtable ou no L0 e as
+        opções de compressão por nível não aparecem no tamanho.
+        """
+        if engine == "InnoDB":
+            cursor.execute("FLUSH TABLES sensor_data FOR EXPORT")
+            cursor.execute("UNLOCK TABLES")
+        elif engine == "ROCKSDB":
+            cursor.execute("SET GLOBAL rocksdb_force_flush_memtable_now = 1")
+            for column_family in column_families:
+                cursor.execute("SET GLOBAL rocksdb_compact_cf = %s", (column_family,))
+
+    @classmethod
+    def table_sizes(cls, cursor, db_name: str, engine: str, column_families: list = None) -> dict:
+        """
+        Tamanho dos dados e dos índices de sensor_data segundo o próprio servidor.
+
+        O DATA_LENGTH/INDEX_LENGTH do InnoDB conta páginas lógicas e não enxerga os buracos abertos pela
+        compressão de página (PAGE_COMPRESSED); por isso o InnoDB também informa allocated_bytes, os blocos
+        realmente ocupados pelos tablespaces da tabela (INNODB_SYS_TABLESPACES.ALLOCATED_SIZE).
+
+        Args:
+            column_families (list): Column families do MyRocks a compactar antes da medição (padrão: "default").
+
+        Returns:
+            dict: data_bytes, index_bytes, allocated_bytes (None fora do InnoDB) e indexes ({índice: bytes},
+            quando o mecanismo informa).
+        """
+        cls.flush_to_disk(cursor, engine, column_families or ["default"])
+        cursor.execute("ANALYZE TABLE sensor_data")
+        cursor.fetchall()
+        cursor.execute(
+            "SELECT COALESCE(SUM(DATA_LENGTH), 0), COALESCE(SUM(INDEX_LENGTH), 0) FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = %s AND TABLE_NAME = 'sensor_data'",
+            (db_name,)
+        )
+        data_bytes, index_bytes = cursor.fetchone()
+        allocated_bytes = None
+
+        if engine == "InnoDB":
+            # Um tablespace por tabela ou por partição (sensor_data#P#<partição>)
+            cursor.execute(
+                "SELECT COALESCE(SUM(ALLOCATED_SIZE), 0) FROM information_schema.INNODB_SYS_TABLESPACES "
+                "WHERE NAME = %s OR NAME LIKE %s",
+                (f"{db_name}/sensor_data", f"{db_name}/sensor\\_data#%")
+            )
+            allocated_bytes = int(cursor.fetchone()[0])
+            # Tabelas particionadas aparecem como sensor_data#P#<partição>
+            cursor.execute(
+                "SELECT index_name, SUM(stat_value) * @@innodb_page_size FROM mysql.innodb_index_stats "
+                "WHERE database_name = %s AND table_name LIKE 'sensor_data%%' AND stat_name = 'size' "
+                "GROUP BY index_name",
+                (db_name,)
+            )
+        elif engine == "ROCKSDB":
+            # Só considera o que já foi gravado em SST
+            cursor.execute(
+                "SELECT d.INDEX_NAME, SUM(f.DATA_SIZE) FROM information_schema.ROCKSDB_DDL d "
+                "JOIN information_schema.ROCKSDB_INDEX_FILE_MAP f "
+                "ON d.COLUMN_FAMILY = f.COLUMN_FAMILY AND d.INDEX_NUMBER = f.INDEX_NUMBER "
+                "WHERE d.TABLE_SCHEMA = %s AND d.TABLE_NAME LIKE 'sensor_data%%' "
+                "GROUP BY d.INDEX_NAME",
+                (db_name,)
+            )
+        elif engine == "ColumnStore":
+            # O information_schema.TABLES não informa o tamanho; soma os arquivos das colunas e dos dicionários
+            cursor.execute(
+                "SELECT COALESCE(SUM(COALESCE(f.COMPRESSED_DATA_SIZE, f.FILE_SIZE)), 0) "
+                "FROM information_schema.COLUMNSTORE_COLUMNS c JOIN information_schema.COLUMNSTORE_FILES f "
+                "ON f.OBJECT_ID IN (c.OBJECT_ID, c.DICTIONARY_OBJECT_ID) "
+                "WHERE c.TABLE_SCHEMA = %s AND c.TABLE_NAME = 'sensor_data'",
+                (db_name,)
+            )
+            return {"data_bytes": int(cursor.fetchone()[0]), "index_bytes": 0, "allocated_bytes": None, "indexes": {}}
+        else:
+            return {"data_bytes": int(data_bytes), "index_bytes": int(index_bytes), "allocated_bytes": None, "indexes": {}}
+
+        indexes = {name: int(size) for name, size in cursor.fetchall()}
+        return {"data_bytes": int(data_bytes), "index_bytes": int(index_bytes), "allocated_bytes": allocated_bytes, "indexes": indexes}
+
+    @staticmethod
+    def index_used(cursor, query: str) -> str:
+        """Índices escolhidos pelo otimizador para a consulta (coluna key do EXPLAIN)."""
+        cursor.execute("EXPLAIN " + query)
+        columns = [column[0] for column in cursor.description]
+        keys = [row[columns.index("key")] for row in cursor.fetchall()]
+        return " ".join(key for key in keys if key)
+
+    @classmethod
+    def run_variant(cls,
+            db: dict,
+            variant: str,
+            schema: str,
+            insert_function,
+            specs: list,
+            rounds: int,
+            file_name_matrix: str,
+            file_name_insertion: str
+        ) -> dict:
+        """
+        Recria o banco com o schema da variante, insere os dados e roda as consultas.
+
+        Args:
+            db (dict): Entrada de DATABASES do banco.
+            variant (str): Nome da variante.
+            schema (str | list): CREATE TABLE da variante (ou lista de comandos, ver TableManager.create_table).
+            insert_function: Função que insere o conjunto de dados (backend, arquivo de inserção) e
+                retorna as estatísticas da inserção (com "rows"), como main.insert_data.
+            specs (list): Consultas (QuerySpec) a medir.
+            rounds (int): Repetições de cada consulta; grava-se a mediana.
+            file_name_matrix (str): Nome do arquivo CSV da matriz.
+            file_name_insertion (str): Nome do arquivo CSV com os tempos de inserção das variantes.
+
+        Returns:
+            dict: Resultado da variante (tempos, tamanhos e mediana/índice usado por consulta).
+
+        Raises:
+            pymysql.MySQLError: Se o servidor recusar algum comando do schema da variante.
+        """
+        print(f"----------------------\nVariante {variant} em {db['name']}")
+        backend = create_backend(db)
+        TableManager().create_table(backend.database(), schema=schema, port=backend.port, raise_errors=True)
+        statements = schema if isinstance(schema, list) else [schema]
+        column_families = re.findall(r"cfname=(\w+)", " ".join(statements))
+
+        skip_rows = cls.count_rows(file_name_insertion)
+        stats = insert_function(backend, file_name_insertion)
+        ingest_time = cls.ingest_time(file_name_insertion, backend.name, skip_rows)
+
+        backend.connect()
+        try:
+            sizes = cls.table_sizes(backend.cursor, backend.database(), backend.engine, sorted(set(column_families)))
+            queries = {}
+            for spec in specs:
+                query = backend.compile_query(spec)
+                times = [backend.run_query(spec, query)[1] for _ in range(rounds)]
+                queries[spec.label] = (statistics.median(times), cls.index_used(backend.cursor, query))
+        finally:
+            backend.close()
+        storage = backend.storage_size()
+
+        with open(file_name_matrix, mode='a', newline='') as file:
+            writer = csv.writer(file)
+            for label, (query_time, index_used) in queries.items():
+                writer.writerow([
+                    backend.name, variant, ingest_time, storage, sizes["data_bytes"], sizes["index_bytes"],
+                    sizes["allocated_bytes"], label, query_time, index_used
+                ])
+
+        print(f"{variant}: ingestão {ingest_time:.2f} s, dados {sizes['data_bytes']} B, índices {sizes['index_bytes']} B")
+        return {
+            "variant": variant, "rows": stats["rows"], "ingest_time": ingest_time, "storage": storage, **sizes, "queries": queries
+        }
+
+    @classmethod
+    def run(cls, db: dict, variants: list, insert_function, specs: list, rounds: int, file_name_matrix: str, file_name_insertion: str) -> list:
+        """
+        Roda todas as variantes (nome, CREATE TABLE) de um banco.
+
+        Uma variante cujo schema o servidor recusa fica fora dos resultados, em vez de ser medida com a
+        configuração padrão sob o nome dela.
+
+        Returns:
+            list: Resultados de run_variant das variantes que rodaram, na ordem das variantes.
+        """
+        results = []
+        for variant, schema in variants:
+            try:
+                results.append(cls.run_variant(db, variant, schema, insert_function, specs, rounds, file_name_matrix, file_name_insertion))
+            except Exception as e:
+                print(f"Variante {variant} em {db['name']} falhou e fica fora do relatório: {e}")
+        return results
+
+    @classmethod
+    def index_report(cls, db_name: str, results: list, file_name_report: str) -> list:
+        """
+        Compara cada variante "pk_plus_<índice>" com "pk_only" e grava o custo e o ganho do índice.
+
+        O custo é o tempo extra de ingestão e o tamanho do índice; o ganho é a redução da mediana de
+        cada consulta. Um índice entra no conjunto mínimo se o otimizador o usa em alguma consulta e
+        ela fica mais rápida.
+
+        Returns:
+            list: Conjunto mínimo sugerido de índices.
+        """
+        by_variant = {result["variant"]: result for result in results}
+        if "pk_only" not in by_variant:
+            print(f"Sem a variante pk_only em {db_name}; relatório de índices não gerado.")
+            return []
+        baseline = by_variant["pk_only"]
+        minimal = []
+
+        with open(file_name_report, mode='a', newline='') as file:
+            writer = csv.writer(file)
+            for variant, result in by_variant.items():
+                if not variant.startswith("pk_plus_"):
+                    continue
+                index = variant[len("pk_plus_"):]
+                ingest_cost = result["ingest_time"] - baseline["ingest_time"]
+                index_bytes = result["indexes"].get(index, result["index_bytes"] - baseline["index_bytes"])
+
+                for label, (query_time, index_used) in result["queries"].items():
+                    latency_gain = baseline["queries"][label][0] - query_time
+                    used = index in index_used.split()
+                    writer.writerow([db_name, index, ingest_cost, index_bytes, label, latency_gain, used])
+                    if used and latency_gain > 0 and index not in minimal:
+                        minimal.append(index)
+
+        print(f"Conjunto mínimo de índices sugerido para {db_name}: {minimal or 'somente a chave primária'}")
+        return minimal
+
+    @classmethod
+    def tradeoff_report(cls, db_name: str, results: list, file_name_tradeoff: str, baseline_variant: str = "default") -> None:
+        """
+        Resume cada variante em armazenamento x vazão de ingestão x latência, relativos à variante de referência.
+
+        A latência da variante é a média geométrica das medianas das consultas, para que a consulta
+        mais lenta não domine a comparação. O armazenamento é o espaço alocado em disco quando o mecanismo
+        informa (InnoDB, onde a compressão de página só aparece assim), senão dados + índices.
+        """
+        def summary(result):
+            if result.get("allocated_bytes") is not None:
+                total_bytes = result["allocated_bytes"]
+            else:
+                total_bytes = result["data_bytes"] + result["index_bytes"]
+            rows_per_second = result["rows"] / result["ingest_time"] if result["ingest_time"] else 0
+            query_time = statistics.geometric_mean(max(time, 1e-9) for time, _ in result["queries"].values())
+            return total_bytes, rows_per_second, query_time
+
+        by_variant = {result["variant"]: result for result in results}
+        if baseline_variant not in by_variant:
+            print(f"Sem a variante {baseline_variant} em {db_name}; tabela de compromissos não gerada.")
+            return
+        base_bytes, base_rate, base_query = summary(by_variant[baseline_variant])
+
+        with open(file_name_tradeoff, mode='a', newline='') as file:
+            writer = csv.writer(file)
+            for variant, result in by_variant.items():
+                total_bytes, rows_per_second, query_time = summary(result)
+                writer.writerow([
+                    db_name, variant, result["rows"], result["ingest_time"], rows_per_second, result["storage"],
+                    total_bytes, query_time,
+                    total_bytes / base_bytes if base_bytes else None,
+                    rows_per_second / base_rate if base_rate else None,
+                    query_time / base_query,
+                ])
+                print(f"{db_name} {variant}: {total_bytes} B, {rows_per_second:.0f} linhas/s, consultas {query_time:.4f} s")
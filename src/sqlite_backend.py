@@ -0,0 +1,170 @@
+import configparser
+import os
+import sqlite3
+import time
+from datetime import datetime
+import psutil
+from src.backend import Backend
+from src.insert_database import InsertDatabase
+from src.query_cache import QueryCache
+from src.query_database import QueryDatabase
+from src.rollup_manager import RollupManager
+from src.save_data import SaveData
+
+class SQLiteBackend(Backend):
+    """
+    Backend SQLite embarcado, usado como linha de base sem infraestrutura (roda sem Docker).
+
+    A tabela é WITHOUT ROWID com chave primária (event_timestamp, sensor_name), então a árvore
+    B fica agrupada pela ordem do tempo; o arquivo usa journal em modo WAL. Linhas repetidas (mesmo
+    instante e sensor, ou a mesma semana inserida de novo sem recriar o banco) substituem a anterior,
+    como os pontos de mesma série e instante no InfluxDB.
+    """
+
+    query_language = "sqlite"
+
+    SCHEMA = [
+        """
+            CREATE TABLE IF NOT EXISTS sensor_data (
+                event_timestamp INTEGER NOT NULL,
+                temperature REAL NOT NULL,
+                sensor_name TEXT NOT NULL,
+                PRIMARY KEY (event_timestamp, sensor_name)
+            ) WITHOUT ROWID;
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_sensor_event ON sensor_data (sensor_name, event_timestamp);",
+    ]
+
+    # Tabela de agregados de 15 minutos gravada pelo downsampling antes da retenção (ver RollupManager)
+    ROLLUP_SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sensor_rollup_15min (
+            sensor_name TEXT NOT NULL,
+            bucket_start TEXT NOT NULL,
+            count_temp INTEGER NOT NULL,
+            sum_temp REAL NOT NULL,
+            min_temp REAL NOT NULL,
+            max_temp REAL NOT NULL,
+            PRIMARY KEY (sensor_name, bucket_start)
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, name, engine, port=None, **options):
+        super().__init__(name, engine, port, **options)
+        config = configparser.ConfigParser()
+        config.read('config.ini')
+        self.path = options.get("path") or config.get("sqlite", "path", fallback=f"output/{name}.db")
+
+    def open_connection(self) -> sqlite3.Connection:
+        """Abre o arquivo do banco com as configurações de escrita do benchmark."""
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def create_schema(self) -> None:
+        print(f"----------------------\nCriando {self.name}")
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        for suffix in ["", "-wal", "-shm"]:
+            if os.path.exists(self.path + suffix):
+                print(f"Arquivo '{self.path + suffix}' já existe. Apagando...")
+                os.remove(self.path + suffix)
+
+        conn = self.open_connection()
+        for statement in self.SCHEMA:
+            conn.execute(statement)
+        conn.commit()
+        conn.close()
+        print(f"Tabela 'sensor_data' criada em {self.path}.")
+
+    def ingest_week(self, rows, current_week, round_number, batch_size, file_name_insertion) -> None:
+        data_to_insert = [
+            (QueryDatabase.to_epoch(datetime.strptime(row[0], "%Y-%m-%d %H:%M:%S")), float(row[1]), row[2])
+            for row in rows
+        ]
+
+        conn = self.open_connection()
+        start_time = time.time()
+        for i in range(0, len(data_to_insert), batch_size):
+            conn.executemany(
+                "INSERT OR REPLACE INTO sensor_data (event_timestamp, temperature, sensor_name) VALUES (?, ?, ?)",
+                data_to_insert[i:i + batch_size]
+            )
+            conn.commit()
+
+        end_time = time.time()
+        insertion_time = end_time - start_time
+        print(f"Tempo de inserção no SQLite: {insertion_time} segundos")
+        conn.close()
+
+        storage = self.storage_size()
+        memory_info = psutil.virtual_memory()
+        swap_info = psutil.swap_memory()
+
+        ram_usage = memory_info.used / (1024 ** 3)  # Converte para GB
+        swap_usage = swap_info.used / (1024 ** 3)  # Converte para GB
+
+        SaveData.save_insertion_time_to_csv(self.name, insertion_time, current_week, round_number, ram_usage, swap_usage, storage, file_name_insertion)
+        QueryCache.publish_week_changed(self.name, {row[2] for row in rows}, current_week)
+
+    def connect(self) -> None:
+        self.conn = self.open_connection()
+
+    def close(self) -> None:
+        if getattr(self, "conn", None) is not None:
+            self.conn.close()
+            self.conn = None
+
+    def compile_query(self, spec) -> str:
+        return QueryDatabase.to_sqlite(spec)
+
+    def run_query(self, spec, query) -> tuple:
+        # O sqlite3 mantém um cache de statements preparados por conexão
+        template, params = QueryDatabase.build_sql(spec, "sqlite", placeholders=True)
+        start_time = time.time()
+        results = self.conn.execute(template, params).fetchall()
+        query_time = time.time() - start_time
+        return results, query_time
+
+    def run_raw(self, query) -> tuple:
+        start_time = time.time()
+        results = self.conn.execute(query).fetchall()
+        query_time = time.time() - start_time
+        return results, query_time
+
+    def storage_size(self) -> str:
+        total_size = sum(
+            os.path.getsize(self.path + suffix)
+            for suffix in ["", "-wal", "-shm"]
+            if os.path.exists(self.path + suffix)
+        )
+        return InsertDatabase.convert_size(total_size)
+
+    def downsample_before(self, cutoff) -> bool:
+        conn = self.open_connection()
+        conn.execute(self.ROLLUP_SCHEMA)
+        conn.execute(RollupManager.downsample_sql("sqlite"), (QueryDatabase.to_epoch(cutoff),))
+        conn.commit()
+        conn.close()
+        return True
+
+    def expire_before(self, cutoff) -> tuple:
+        # As páginas liberadas voltam para a lista livre do arquivo; só um VACUUM encolheria o arquivo
+        conn = self.open_connection()
+        deleted = conn.execute("DELETE FROM sensor_data WHERE event_timestamp < ?", (QueryDatabase.to_epoch(cutoff),)).rowcount
+        conn.commit()
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.close()
+        return "delete", deleted
+
+    def encoding_stats(self) -> dict:
+        conn = self.open_connection()
+        points, series = conn.execute("SELECT COUNT(*), COUNT(DISTINCT sensor_name) FROM sensor_data").fetchone()
+        conn.close()
+        total_size = sum(
+            os.path.getsize(self.path + suffix)
+            for suffix in ["", "-wal", "-shm"]
+            if os.path.exists(self.path + suffix)
+        )
+        return {"points": points, "series": series, "bytes": total_size}
@@ -1,11 +1,58 @@
 import subprocess
-import pymysql
-from influxdb_client import InfluxDBClient, BucketsApi
 import configparser
 import csv
 import json
+from src.partition_manager import PartitionManager
+from src.rollup_manager import RollupManager
 
 class TableManager:
+    # Índices secundários disponíveis no schema estruturado (nome -> definição)
+    STRUCTURED_INDEXES = {
+        "idx_sensor": "INDEX idx_sensor (sensor_name)",
+        "idx_event_timestamp": "INDEX idx_event_timestamp (event_timestamp)",
+        "idx_year": "INDEX idx_year (year_number)",
+        "idx_sensor_event": "INDEX idx_sensor_event (sensor_name, event_timestamp)",
+        "idx_year_sensor_event_timestamp": "INDEX idx_year_sensor_event_timestamp (year_number, sensor_name, event_timestamp)",
+    }
+    # Chave primária com year_number e event_timestamp para evitar erro 1503 com o particionamento
+    STRUCTURED_PRIMARY_KEY = "PRIMARY KEY (year_number, sensor_name, event_timestamp)"
+
+    # Conjuntos de índices nomeados; "full" é o schema usado no benchmark principal
+    INDEX_SETS = {
+        "full": list(STRUCTURED_INDEXES),
+        "pk_only": [],
+    }
+
+    # Variantes de compressão por mecanismo (nome -> opções). InnoDB e ColumnStore recebem opções da
+    # tabela; no MyRocks cada variante usa uma column family própria com as opções informadas
+    COMPRESSION_VARIANTS = {
+        "InnoDB": {
+            "default": "",
+            "row_compressed_kbs2": "ROW_FORMAT=COMPRESSED KEY_BLOCK_SIZE=2",
+            "row_compressed_kbs4": "ROW_FORMAT=COMPRESSED KEY_BLOCK_SIZE=4",
+            "row_compressed_kbs8": "ROW_FORMAT=COMPRESSED KEY_BLOCK_SIZE=8",
+            # O algoritmo da compressão de página é global (innodb_compression_algorithm); varia o nível
+            "page_compressed_l1": "PAGE_COMPRESSED=1 PAGE_COMPRESSION_LEVEL=1",
+            "page_compressed_l6": "PAGE_COMPRESSED=1 PAGE_COMPRESSION_LEVEL=6",
+            "page_compressed_l9": "PAGE_COMPRESSED=1 PAGE_COMPRESSION_LEVEL=9",
+        },
+        "ROCKSDB": {
+            "default": "",
+            "none": "compression=kNoCompression;bottommost_compression=kNoCompression",
+            "lz4": "compression=kLZ4Compression;bottommost_compression=kLZ4Compression",
+            "zstd": "compression=kZSTD;bottommost_compression=kZSTD",
+            # Níveis de cima (dados quentes, reescritos pela compactação) sem compressão, LZ4 no meio e ZSTD no último
+            "per_level_lz4_zstd": (
+                "compression_per_level=kNoCompression:kNoCompression:kLZ4Compression:kLZ4Compression:"
+                "kLZ4Compression:kLZ4Compression:kLZ4Compression;bottommost_compression=kZSTD"
+            ),
+        },
+        "ColumnStore": {
+            "default": "",
+            "uncompressed": "COMMENT='compression=0'",
+        },
+    }
+
     def __init__(self):
         config = configparser.ConfigParser()
         config.read('config.ini')
@@ -23,12 +70,14 @@ class TableManager:
             ]
         }
 
+        self.host = config.get("database", "host", fallback="localhost")
         self.user = config.get("database", "user")
         self.password = config.get("database", "password")
         self.influx_url = config.get("influxdb", "url")
         self.influx_token = config.get("influxdb", "token")
         self.influx_org = config.get("influxdb", "org")
         self.influx_bucket = config.get("influxdb", "bucket")
+        self.influx_rollup_bucket = RollupManager.influx_rollup_bucket(config)
 
     def create_all_tables(self):
         """Cria todas as tabelas e salva registros no arquivo CSV."""
@@ -42,12 +91,23 @@ class TableManager:
         for db_name in self.credentials.keys():
             self.create_table(db_name)
 
-    def create_table(self, db_name):
-        """Cria um banco de dados e sua tabela associada."""
+    def create_table(self, db_name, schema=None, port=None, raise_errors=False):
+        """
+        Cria um banco de dados e sua tabela associada.
+
+        Args:
+            db_name (str): Nome do banco.
+            schema (str | list): CREATE TABLE (ou lista de comandos) a usar no lugar do schema padrão (variantes das matrizes).
+            port (int): Porta do container, para variantes que não têm entrada própria no config.ini.
+            raise_errors (bool): Repassa o erro do servidor em vez de só registrá-lo (variantes das matrizes, em
+                que um comando recusado, como o SET GLOBAL das opções do MyRocks, invalidaria a variante).
+        """
         print(f"----------------------\nCriando {db_name}")
+        # Importado aqui para que os builders de schema (usados pelas matrizes) não carreguem o cliente
+        import pymysql
 
         try:
-            creds = self.credentials[db_name]
+            creds = self.credentials[db_name] if port is None else {"host": self.host, "port": port}
             with pymysql.connect(host=creds["host"], port=creds["port"], user=self.user, password=self.password) as conn:
                 with conn.cursor() as cursor:
                     cursor.execute(f"SHOW DATABASES LIKE '{db_name}'")
@@ -60,102 +120,186 @@ class TableManager:
             with pymysql.connect(host=creds["host"], port=creds["port"], user=self.user, password=self.password, database=db_name) as conn:
                 with conn.cursor() as cursor:
                     print(f"Tentando criar a tabela 'sensor_data' em {db_name}...")
-                    cursor.execute(self.get_table_schema(db_name))
+                    for statement in schema if isinstance(schema, list) else [schema or self.get_table_schema(db_name)]:
+                        cursor.execute(statement)
                     print("Tabela 'sensor_data' criada ou já existia.")
 
+                    rollup_engine = RollupManager.engine_of_base(db_name)
+                    if rollup_engine:
+                        for rollup_schema in RollupManager.get_table_schemas(rollup_engine):
+                            cursor.execute(rollup_schema)
+                        print(f"Tabelas de rollup criadas em {db_name}.")
+
             size = self.get_docker_volume_size_by_container(db_name)
             print(f"*********************\n{db_name} {size}\n*********************")
 
         except pymysql.MySQLError as e:
             print(f"Erro ao criar banco de dados ou tabela {db_name}: {e}")
+            if raise_errors:
+                raise
 
     def get_table_schema(self, db_name):
-        """Retorna o schema SQL adequado para cada banco."""
+        """
+        Retorna o schema SQL adequado para cada banco.
+
+        As tabelas estruturadas nascem só com a partição pMax; as partições de tempo são criadas
+        antes de cada semana pela PartitionManager.
+        """
 
         if db_name == "mariadb_columnstore":
-            return """
-                CREATE TABLE sensor_data (
-                    event_timestamp TIMESTAMP NOT NULL,
-                    temperature FLOAT(4) NOT NULL,
-                    sensor_name VARCHAR(10) NOT NULL
-                ) ENGINE=ColumnStore;
-            """
+            return self.get_plain_schema("ColumnStore")
 
         elif db_name == "mariadb_innodb":
-            return """
-                CREATE TABLE IF NOT EXISTS sensor_data (
-                    event_timestamp TIMESTAMP NOT NULL,
-                    temperature FLOAT(4) NOT NULL,
-                    sensor_name VARCHAR(10) NOT NULL
-                ) ENGINE=InnoDB;
-            """
+            return self.get_plain_schema("InnoDB")
 
         elif db_name == "mariadb_innodb_optimized":
-            return """
-                CREATE TABLE sensor_data (
-                    event_timestamp TIMESTAMP NOT NULL,
-                    temperature FLOAT(4) NOT NULL,
-                    sensor_name VARCHAR(10) NOT NULL,
-                    year_number INT NOT NULL,
-
-                    -- Índices para acelerar buscas
-                    INDEX idx_sensor (sensor_name),
-                    INDEX idx_event_timestamp(event_timestamp),
-                    INDEX idx_year (year_number),
-                    INDEX idx_sensor_event (sensor_name, event_timestamp),
-                    INDEX idx_year_sensor_event_timestamp (year_number, sensor_name, event_timestamp),
-
-                    -- Chave primária para evitar erro 1503
-                    PRIMARY KEY (year_number, sensor_name, event_timestamp)
-                ) ENGINE=InnoDB
-                PARTITION BY RANGE (year_number) (
-                    PARTITION p2022 VALUES LESS THAN (2023),
-                    PARTITION p2023 VALUES LESS THAN (2024),
-                    PARTITION p2024 VALUES LESS THAN (2025),
-                    PARTITION pMax VALUES LESS THAN MAXVALUE
-                );
-            """
+            return self.get_structured_schema("InnoDB", self.INDEX_SETS["full"])
 
         elif db_name == "mariadb_myrocks":
-            return """
+            return self.get_structured_schema("ROCKSDB", self.INDEX_SETS["full"])
+
+    @staticmethod
+    def get_plain_schema(engine, table_options=""):
+        """
+        Schema simples (sem chave nem particionamento), usado pelo InnoDB padrão e pelo ColumnStore.
+
+        Args:
+            engine (str): Mecanismo de armazenamento.
+            table_options (str): Opções extras da tabela (ex.: compressão).
+
+        Returns:
+            str: Comando CREATE TABLE.
+        """
+        return f"""
                 CREATE TABLE sensor_data (
                     event_timestamp TIMESTAMP NOT NULL,
                     temperature FLOAT(4) NOT NULL,
+                    sensor_name VARCHAR(10) NOT NULL
+                ) ENGINE={engine} {table_options}""".rstrip() + ";"
+
+    @classmethod
+    def get_structured_schema(cls, engine, indexes, table_options="", key_comment=""):
+        """
+        Monta o schema estruturado com o conjunto de índices secundários informado.
+
+        Args:
+            engine (str): Mecanismo de armazenamento (InnoDB ou ROCKSDB).
+            indexes (list): Nomes dos índices de STRUCTURED_INDEXES a criar.
+            table_options (str): Opções extras da tabela (ex.: ROW_FORMAT, compressão).
+            key_comment (str): Comentário de cada chave (no MyRocks, "cfname=<column family>").
+
+        Returns:
+            str: Comando CREATE TABLE.
+        """
+        columns = [
+            "event_timestamp TIMESTAMP NOT NULL",
+            "temperature FLOAT(4) NOT NULL",
+            "sensor_name VARCHAR(10) NOT NULL",
+            "year_number INT NOT NULL",
+        ]
+        keys = [cls.STRUCTURED_INDEXES[index] for index in indexes] + [cls.STRUCTURED_PRIMARY_KEY]
+        if key_comment:
+            keys = [f"{key} COMMENT '{key_comment}'" for key in keys]
+        definitions = columns + keys
+        body = ",\n                    ".join(definitions)
+        return f"""
+                CREATE TABLE sensor_data (
+                    {body}
+                ) ENGINE={engine} {table_options}""".rstrip() + PartitionManager.partition_clause() + ";"
+
+    @staticmethod
+    def get_compact_schemas(engine):
+        """
+        Schema compacto: sensor como SMALLINT com tabela de dicionário e timestamp como inteiro (UTC).
+
+        Returns:
+            list: Comandos CREATE TABLE (dicionário de sensores e sensor_data).
+        """
+        return [
+            f"""
+                CREATE TABLE sensors (
+                    sensor_id SMALLINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
                     sensor_name VARCHAR(10) NOT NULL,
-                    year_number INT NOT NULL,
-
-                    -- Índices individuais e compostos
-                    INDEX idx_sensor (sensor_name),
-                    INDEX idx_event_timestamp(event_timestamp),
-                    INDEX idx_year (year_number),
-                    INDEX idx_sensor_event (sensor_name, event_timestamp),
-                    INDEX idx_year_sensor_event_timestamp (year_number, sensor_name, event_timestamp),
-
-                    -- Chave primária para evitar erro 1503
-                    PRIMARY KEY (year_number, sensor_name, event_timestamp)
-                ) ENGINE=ROCKSDB
-                PARTITION BY RANGE (year_number) (
-                    PARTITION p2022 VALUES LESS THAN (2023),
-                    PARTITION p2023 VALUES LESS THAN (2024),
-                    PARTITION p2024 VALUES LESS THAN (2025),
-                    PARTITION pMax VALUES LESS THAN MAXVALUE
-                );
-            """
-    def create_influx_database(self):
-        """Cria um bucket no InfluxDB."""
+                    UNIQUE KEY idx_sensor_name (sensor_name)
+                ) ENGINE={engine};
+            """,
+            f"""
+                CREATE TABLE sensor_data (
+                    event_timestamp INT UNSIGNED NOT NULL,
+                    temperature FLOAT(4) NOT NULL,
+                    sensor_id SMALLINT UNSIGNED NOT NULL,
+                    INDEX idx_event_timestamp (event_timestamp),
+                    PRIMARY KEY (sensor_id, event_timestamp)
+                ) ENGINE={engine};
+            """,
+        ]
+
+    @classmethod
+    def index_variants(cls, engine):
+        """
+        Variantes do schema estruturado para a matriz de índices.
+
+        Além dos conjuntos de INDEX_SETS, gera uma variante "pk_plus_<índice>" para cada índice,
+        o que permite medir o custo e o ganho de cada um em relação à chave primária sozinha.
+
+        Returns:
+            list: Tuplas (nome da variante, índices, CREATE TABLE).
+        """
+        variants = [(name, indexes) for name, indexes in cls.INDEX_SETS.items()]
+        variants += [(f"pk_plus_{index}", [index]) for index in cls.STRUCTURED_INDEXES]
+        return [(name, indexes, cls.get_structured_schema(engine, indexes)) for name, indexes in variants]
+
+    @classmethod
+    def compression_variants(cls, engine, structured=True):
+        """
+        Variantes de compressão de COMPRESSION_VARIANTS para a matriz de compressão.
+
+        Args:
+            engine (str): Mecanismo de armazenamento (InnoDB, ROCKSDB ou ColumnStore).
+            structured (bool): Usa o schema estruturado com todos os índices; senão o schema simples.
+
+        Returns:
+            list: Tuplas (nome da variante, comandos); no MyRocks, o CREATE TABLE é seguido do
+            SET GLOBAL que aplica as opções à column family da variante.
+        """
+        variants = []
+        for name, options in cls.COMPRESSION_VARIANTS[engine].items():
+            if not structured:
+                variants.append((name, [cls.get_plain_schema(engine, options)]))
+            elif engine != "ROCKSDB":
+                variants.append((name, [cls.get_structured_schema(engine, cls.INDEX_SETS["full"], options)]))
+            elif not options:
+                variants.append((name, [cls.get_structured_schema(engine, cls.INDEX_SETS["full"])]))
+            else:
+                column_family = f"cf_sensor_{name}"
+                variants.append((name, [
+                    cls.get_structured_schema(engine, cls.INDEX_SETS["full"], key_comment=f"cfname={column_family}"),
+                    f"SET GLOBAL rocksdb_update_cf_options = '{column_family}={{{options}}}'",
+                ]))
+        return variants
+
+    def create_influx_database(self, buckets=None):
+        """
+        Cria os buckets no InfluxDB (padrão: o principal e o de downsampling).
+
+        Args:
+            buckets (list): Buckets a recriar no lugar dos padrões (variantes com bucket próprio).
+        """
         print("----------------------\nCriando InfluxDB")
         try:
+            from influxdb_client import InfluxDBClient
             client = InfluxDBClient(url=self.influx_url, token=self.influx_token, org=self.influx_org)
             buckets_api = client.buckets_api()
 
-            existing_bucket = buckets_api.find_bucket_by_name(self.influx_bucket)
-            if existing_bucket:
-                print(f"Bucket '{self.influx_bucket}' já existe. Excluindo...")
-                buckets_api.delete_bucket(existing_bucket.id)
+            for bucket_name in buckets or [self.influx_bucket, self.influx_rollup_bucket]:
+                existing_bucket = buckets_api.find_bucket_by_name(bucket_name)
+                if existing_bucket:
+                    print(f"Bucket '{bucket_name}' já existe. Excluindo...")
+                    buckets_api.delete_bucket(existing_bucket.id)
 
-            print(f"Criando bucket '{self.influx_bucket}'...")
-            buckets_api.create_bucket(bucket_name=self.influx_bucket, org=self.influx_org)
-            print(f"Bucket '{self.influx_bucket}' criado com sucesso.")
+                print(f"Criando bucket '{bucket_name}'...")
+                buckets_api.create_bucket(bucket_name=bucket_name, org=self.influx_org)
+                print(f"Bucket '{bucket_name}' criado com sucesso.")
             client.close()
 
         except Exception as e:
@@ -0,0 +1,266 @@
+import csv
+import json
+import statistics
+import threading
+import time
+from dataclasses import dataclass, fields, replace
+from datetime import datetime
+from src.backend import create_backend
+from src.query_database import QueryDatabase
+from src.query_spec import QuerySpec
+
+@dataclass(frozen=True)
+class TraceRequest:
+    """
+    Uma requisição do trace.
+
+    Attributes:
+        index (int): Posição no trace (linha de dados, a partir de 0).
+        timestamp (float): Instante original em segundos desde a época.
+        client_id (str): Cliente que enviou a requisição.
+        spec (QuerySpec): Consulta neutra, ou None quando a requisição é uma consulta nativa.
+        language (str): Linguagem da consulta nativa ("mariadb", "sqlite", "flux").
+        query (str): Texto da consulta nativa.
+    """
+    index: int
+    timestamp: float
+    client_id: str
+    spec: QuerySpec = None
+    language: str = None
+    query: str = None
+
+    @property
+    def label(self) -> str:
+        return self.spec.label if self.spec is not None else f"raw_{self.language}"
+
+class TraceReplay:
+    """
+    Reenvia um trace de consultas de produção a um banco, mantendo os intervalos originais entre as chegadas.
+
+    O trace é um CSV com as colunas timestamp (segundos desde a época ou ISO 8601, UTC), client_id e, em
+    cada linha, uma consulta neutra em `spec` ou uma consulta nativa em `query` com a linguagem em
+    `language`. Em `spec` vai o rótulo de uma consulta de QueryDatabase.SPECS ou um objeto JSON com os
+    campos de QuerySpec; com "query_type" no JSON, os campos sobrescrevem a consulta com esse rótulo
+    (ex.: {"query_type": "1_day_full", "start": "2023-03-01", "stop": "2023-03-02"}).
+
+    Cada cliente do trace fica sempre no mesmo trabalhador (uma thread com conexão própria), então a ordem
+    das requisições de um cliente se mantém. Uma requisição sai no instante original dividido por `speedup`;
+    se o trabalhador ainda está ocupado, ela sai atrasada e o atraso vai para a coluna `lag`.
+    """
+
+    HEADER_REPLAY = [
+        "table_name", "request_index", "client_id", "worker", "query_type", "trace_timestamp", "scheduled_offset",
+        "start_offset", "lag", "query_time", "latency", "rows", "in_flight", "status", "error"
+    ]
+
+    @staticmethod
+    def parse_timestamp(text: str) -> float:
+        """Segundos desde a época a partir de um número ou de uma data ISO 8601 (sem fuso, UTC)."""
+        try:
+            return float(text)
+        except ValueError:
+            timestamp = datetime.fromisoformat(text)
+            if timestamp.tzinfo is not None:
+                return timestamp.timestamp()
+            return QueryDatabase.to_epoch(timestamp) + timestamp.microsecond / 1e6
+
+    @staticmethod
+    def parse_spec(text: str, specs: list) -> QuerySpec:
+        """QuerySpec a partir de um rótulo de `specs` ou de um objeto JSON com os campos (ver a classe)."""
+        by_label = {spec.label: spec for spec in specs}
+        if not text.lstrip().startswith("{"):
+            if text not in by_label:
+                raise ValueError(f"consulta desconhecida: {text}")
+            return by_label[text]
+
+        values = json.loads(text)
+        unknown = set(values) - {field.name for field in fields(QuerySpec)} - {"query_type"}
+        if unknown:
+            raise ValueError(f"campos desconhecidos na consulta: {sorted(unknown)}")
+        for key in ("start", "stop"):
+            if values.get(key) is not None:
+                values[key] = datetime.fromisoformat(values[key])
+        if values.get("sensors") is not None:
+            values["sensors"] = tuple(values["sensors"])
+
+        base = values.pop("query_type", None)
+        if base is not None:
+            if base not in by_label:
+                raise ValueError(f"consulta desconhecida: {base}")
+            return replace(by_label[base], **values)
+        values.setdefault("label", "trace")
+        return QuerySpec(**values)
+
+    @classmethod
+    def load(cls, file_name_trace: str, specs: list = None) -> list:
+        """
+        Lê o trace e ordena as requisições pelo instante original (empates mantêm a ordem do arquivo).
+
+        Args:
+            file_name_trace (str): Caminho do CSV do trace.
+            specs (list): Consultas que podem ser citadas pelo rótulo; por padrão, QueryDatabase.SPECS.
+
+        Returns:
+            list: Requisições (TraceRequest).
+        """
+        specs = specs if specs is not None else QueryDatabase.SPECS
+        requests = []
+        with open(file_name_trace, newline='') as file:
+            for index, row in enumerate(csv.DictReader(file)):
+                line = index + 2
+                try:
+                    timestamp = cls.parse_timestamp(row["timestamp"])
+                    client_id = row.get("client_id") or "0"
+                    if row.get("query"):
+                        if not row.get("language"):
+                            raise ValueError("consulta nativa sem a coluna language")
+                        requests.append(TraceRequest(index, timestamp, client_id, language=row["language"], query=row["query"]))
+                    elif row.get("spec"):
+                        requests.append(TraceRequest(index, timestamp, client_id, spec=cls.parse_spec(row["spec"], specs)))
+                    else:
+                        raise ValueError("linha sem spec nem query")
+                except (KeyError, ValueError, TypeError) as e:
+                    raise ValueError(f"{file_name_trace}, linha {line}: {e}") from e
+        return sorted(requests, key=lambda request: request.timestamp)
+
+    @staticmethod
+    def assign_workers(requests: list, clients: int = None) -> dict:
+        """
+        Distribui os clientes do trace entre os trabalhadores, na ordem em que aparecem.
+
+        Args:
+            requests (list): Requisições ordenadas pelo instante.
+            clients (int): Tamanho do grupo de trabalhadores; None usa um por cliente do trace.
+
+        Returns:
+            dict: client_id -> número do trabalhador.
+        """
+        workers = {}
+        for request in requests:
+            if request.client_id not in workers:
+                workers[request.client_id] = len(workers) if clients is None else len(workers) % clients
+        return workers
+
+    @classmethod
+    def worker(cls, db: dict, worker: int, requests: list, schedule: dict, state: dict) -> None:
+        """
+        Envia as requisições de um trabalhador, cada uma no seu instante, por uma conexão própria.
+
+        As requisições que o banco não consegue executar (consulta nativa em outra linguagem) ficam como
+        "skipped"; erros de uma requisição não interrompem as seguintes.
+        """
+        backend = None
+        try:
+            backend = create_backend(db)
+            backend.connect()
+            connect_error = None
+        except Exception as e:
+            connect_error = e
+        # A última thread a chegar marca o início do relógio do replay
+        state["ready"].wait()
+        try:
+            for request in requests:
+                result = {
+                    "table_name": db["name"], "request_index": request.index, "client_id": request.client_id,
+                    "worker": worker, "query_type": request.label, "trace_timestamp": request.timestamp,
+                    "scheduled_offset": schedule[request.index], "start_offset": None, "lag": None,
+                    "query_time": None, "latency": None, "rows": None, "in_flight": None, "status": "ok", "error": None,
+                }
+                if connect_error is not None:
+                    result.update(status="error", error=f"conexão: {connect_error}")
+                elif request.spec is None and request.language != backend.query_language:
+                    result.update(status="skipped", error=f"{db['name']} não executa consultas {request.language}")
+                else:
+                    delay = state["start"] + schedule[request.index] - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    cls.execute(backend, request, result, state)
+                with state["lock"]:
+                    state["results"].append(result)
+        finally:
+            if backend is not None:
+                backend.close()
+
+    @staticmethod
+    def execute(backend, request: TraceRequest, result: dict, state: dict) -> None:
+        """Executa uma requisição e preenche os tempos, o atraso e as requisições em andamento na saída."""
+        with state["lock"]:
+            state["in_flight"] += 1
+            in_flight = state["in_flight"]
+        start = time.perf_counter()
+        try:
+            if request.spec is not None:
+                results, query_time = backend.run_query(request.spec, backend.compile_query(request.spec))
+            else:
+                results, query_time = backend.run_raw(request.query)
+            result.update(query_time=query_time, rows=len(results))
+        except Exception as e:
+            result.update(status="error", error=str(e))
+        finally:
+            end = time.perf_counter()
+            with state["lock"]:
+                state["in_flight"] -= 1
+        result.update(
+            start_offset=start - state["start"],
+            lag=start - state["start"] - result["scheduled_offset"],
+            latency=end - start,
+            in_flight=in_flight,
+        )
+
+    @classmethod
+    def run(cls, db: dict, requests: list, speedup: float, clients: int, file_name_replay: str) -> list:
+        """
+        Reenvia o trace a um banco e grava uma linha por requisição.
+
+        Args:
+            db (dict): Entrada de DATABASES do banco.
+            requests (list): Requisições (ver load).
+            speedup (float): Fator de aceleração dos intervalos (2 reenvia o trace na metade do tempo).
+            clients (int): Trabalhadores concorrentes; None usa um por cliente do trace.
+            file_name_replay (str): Nome do arquivo CSV de saída.
+
+        Returns:
+            list: Linhas gravadas no CSV, na ordem do trace.
+        """
+        if speedup <= 0:
+            raise ValueError("O fator de aceleração deve ser positivo")
+        if not requests:
+            return []
+        print(f"----------------------\nReplay de {len(requests)} requisições em {db['name']} (aceleração {speedup}x)")
+
+        first = requests[0].timestamp
+        schedule = {request.index: (request.timestamp - first) / speedup for request in requests}
+        assignment = cls.assign_workers(requests, clients)
+        queues = {}
+        for request in requests:
+            queues.setdefault(assignment[request.client_id], []).append(request)
+
+        # Todos os trabalhadores conectam antes de o relógio do replay começar
+        state = {"lock": threading.Lock(), "results": [], "in_flight": 0, "start": None}
+        state["ready"] = threading.Barrier(len(queues), action=lambda: state.update(start=time.perf_counter()))
+        threads = [
+            threading.Thread(target=cls.worker, args=(db, worker, queue, schedule, state), daemon=True)
+            for worker, queue in sorted(queues.items())
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        results = sorted(state["results"], key=lambda result: result["request_index"])
+        with open(file_name_replay, mode='a', newline='') as file:
+            writer = csv.writer(file)
+            for result in results:
+                writer.writerow([result[column] for column in cls.HEADER_REPLAY])
+
+        latencies = sorted(result["latency"] for result in results if result["status"] == "ok")
+        lags = [result["lag"] for result in results if result["lag"] is not None]
+        errors = sum(result["status"] == "error" for result in results)
+        skipped = sum(result["status"] == "skipped" for result in results)
+        if latencies:
+            p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+            print(f"{db['name']}: {len(latencies)} requisições, latência mediana {statistics.median(latencies):.4f} s, "
+                  f"p95 {p95:.4f} s, atraso máximo {max(lags):.4f} s")
+        if errors or skipped:
+            print(f"{db['name']}: {errors} erros, {skipped} ignoradas")
+        return results
@@ -0,0 +1,48 @@
+import random
+from datetime import datetime
+from src.query_database import QueryDatabase
+from src.query_spec import QuerySpec
+
+class WorkloadGenerator:
+    """Sorteia, de forma reproduzível, os intervalos e sensores das consultas de cada rodada."""
+
+    def __init__(self, seed: int, data_start: datetime, data_stop: datetime, sensors: list, specs: list = None):
+        """
+        Args:
+            seed (int): Semente do sorteio; a mesma semente gera a mesma carga.
+            data_start (datetime): Início dos dados inseridos.
+            data_stop (datetime): Fim (exclusivo) dos dados inseridos.
+            sensors (list): Sensores que podem ser sorteados.
+            specs (list): Consultas base; por padrão, QueryDatabase.SPECS.
+        """
+        self.seed = seed
+        self.data_start = data_start
+        self.data_stop = data_stop
+        self.sensors = sensors
+        self.specs = specs if specs is not None else QueryDatabase.SPECS
+
+    def randomize(self, spec: QuerySpec, rng: random.Random) -> QuerySpec:
+        """
+        Sorteia um novo intervalo com a mesma duração da consulta base, alinhado ao seu agrupamento.
+
+        Consultas sem intervalo (histórico completo) mantêm o intervalo e só sorteiam o sensor.
+        """
+        sensor = rng.choice(self.sensors) if spec.sensor is not None else None
+        if spec.start is None or spec.stop is None:
+            return spec.with_range(spec.start, spec.stop, sensor)
+
+        duration = spec.stop - spec.start
+        latest_start = self.data_stop - duration
+        if latest_start <= self.data_start:
+            return spec.with_range(spec.start, spec.stop, sensor)
+
+        offset = rng.random() * (latest_start - self.data_start)
+        start = QuerySpec.align(self.data_start + offset, spec.bucket)
+        if start < self.data_start:
+            start = self.data_start
+        return spec.with_range(start, start + duration, sensor)
+
+    def specs_for_round(self, round_number: int) -> list:
+        """Retorna as consultas da rodada; depende apenas da semente e do número da rodada."""
+        rng = random.Random(f"{self.seed}-{round_number}")
+        return [self.randomize(spec, rng) for spec in self.specs]
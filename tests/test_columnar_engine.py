@@ -0,0 +1,95 @@
+import random
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime
+import numpy as np
+from src.columnar_engine import ColumnarEngine
+from src.equivalence_check import EquivalenceCheck
+from src.query_database import QueryDatabase
+from src.query_spec import QuerySpec
+from src.sqlite_backend import SQLiteBackend
+
+class TestColumnarEngine(unittest.TestCase):
+    """
+    Os kernels do motor colunar devolvem o mesmo que o SQL do SQLite sobre os mesmos dados, como no
+    subcomando `check` (as semanas e os meses são rotulados de outro jeito no SQLite e ficam de fora).
+    """
+
+    SPECS = [spec for spec in QueryDatabase.SPECS if spec.bucket not in ("week", "month")] + [
+        QuerySpec("top_mean_day", "mean", None, datetime(2023, 1, 3), datetime(2023, 1, 4), per_sensor=True, top=2),
+        QuerySpec("max_hour_b", "max", "Sensor B", datetime(2023, 1, 4), datetime(2023, 1, 5), "hour"),
+        QuerySpec("sum_15min_full", "sum", None, datetime(2023, 1, 6), datetime(2023, 1, 7), "15min"),
+    ]
+
+    @classmethod
+    def setUpClass(cls):
+        rng = random.Random(5)
+        start = QueryDatabase.to_epoch(datetime(2022, 12, 28))
+        rows = []
+        for index in range(6000):
+            for sensor in ("Sensor A", "Sensor B", "Sensor C"):
+                # Lacunas de algumas horas no Sensor A, para o preenchimento ter o que repetir
+                if sensor == "Sensor A" and 1700 <= index % 2000 < 1760:
+                    continue
+                value = float(np.float32(round(rng.uniform(-5, 35), 2)))
+                rows.append((start + 300 * index + rng.randrange(60), value, sensor))
+
+        cls.conn = sqlite3.connect(":memory:")
+        for statement in SQLiteBackend.SCHEMA:
+            cls.conn.execute(statement)
+        cls.conn.executemany("INSERT INTO sensor_data (event_timestamp, temperature, sensor_name) VALUES (?, ?, ?)", rows)
+
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.engine = ColumnarEngine(cls.directory.name)
+        cls.engine.reset()
+        # O segundo lote é mais antigo que o primeiro: os segmentos são reordenados
+        middle = len(rows) // 2
+        for batch in (rows[middle:], rows[:middle]):
+            cls.engine.append(
+                np.array([row[2] for row in batch], dtype=object),
+                np.array([row[0] for row in batch], dtype=np.int64),
+                np.array([row[1] for row in batch], dtype=np.float32),
+            )
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.conn.close()
+        cls.directory.cleanup()
+
+    def columnar(self, engine: ColumnarEngine, spec: QuerySpec) -> list:
+        start = QueryDatabase.to_epoch(spec.start) if spec.start is not None else None
+        stop = QueryDatabase.to_epoch(spec.stop) if spec.stop is not None else None
+        return EquivalenceCheck.rows(spec, engine.query(spec, start, stop))
+
+    def assertMatchesSQLite(self, engine: ColumnarEngine):
+        for spec in self.SPECS:
+            with self.subTest(spec.label):
+                query, params = QueryDatabase.build_sql(spec, "sqlite", placeholders=True)
+                expected = EquivalenceCheck.rows(spec, self.conn.execute(query, params).fetchall())
+                self.assertTrue(expected, "consulta sem linhas não testa nada")
+                difference = EquivalenceCheck.compare(expected, self.columnar(engine, spec), 1e-5, 1e-6)
+                self.assertIsNone(difference)
+
+    def test_queries_match_sqlite(self):
+        self.assertMatchesSQLite(self.engine)
+
+    def test_reloaded_segments_match_sqlite(self):
+        engine = ColumnarEngine(self.directory.name)
+        engine.load()
+        self.assertMatchesSQLite(engine)
+
+    def test_expire_before(self):
+        with tempfile.TemporaryDirectory() as directory:
+            engine = ColumnarEngine(directory, compress=True)
+            engine.reset()
+            timestamps = np.arange(0, 86400, 600, dtype=np.int64)
+            engine.append(np.array(["Sensor A"] * len(timestamps), dtype=object), timestamps,
+                          np.ones(len(timestamps), dtype=np.float32))
+            self.assertEqual(engine.expire_before(43200), 72)
+            engine.load()
+            self.assertEqual(engine.query(QuerySpec("count", "count")), [(72,)])
+            self.assertEqual(engine.query(QuerySpec("count", "count"), stop=43200), [(0,)])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+from datetime import datetime, timedelta
+from src.ingest_scenario import IngestScenario, WeekBatcher
+
+def event(timestamp: datetime, sensor: str = "Sensor A") -> tuple:
+    return timestamp, [f"{timestamp:%Y-%m-%d %H:%M:%S}", 20.0, sensor]
+
+class TestWeekBatcher(unittest.TestCase):
+    """Marca d'água, lotes atrasados e ordem de entrega do WeekBatcher."""
+
+    def test_week_closes_when_watermark_reaches_its_end(self):
+        batcher = WeekBatcher()
+        self.assertEqual(batcher.add(*event(datetime(2023, 1, 2))), [])
+        self.assertEqual(batcher.add(*event(datetime(2023, 1, 8, 23, 59, 59))), [])
+        batches = batcher.add(*event(datetime(2023, 1, 9)))
+        self.assertEqual([(week, len(rows)) for week, rows in batches], [((2023, 1), 2)])
+        self.assertEqual([(week, len(rows)) for week, rows in batcher.flush()], [((2023, 2), 1)])
+
+    def test_late_rows_are_delivered_with_the_next_closed_week(self):
+        batcher = WeekBatcher()
+        batcher.add(*event(datetime(2023, 1, 2)))
+        batcher.add(*event(datetime(2023, 1, 9)))
+        # Semana 1 já entregue: a linha fica guardada até a próxima semana fechar
+        self.assertEqual(batcher.add(*event(datetime(2023, 1, 5))), [])
+        batches = batcher.add(*event(datetime(2023, 1, 16)))
+        self.assertEqual([(week, len(rows)) for week, rows in batches], [((2023, 1), 1), ((2023, 2), 1)])
+        self.assertEqual(batcher.late_batches, 1)
+
+    def test_allowed_lateness_keeps_the_week_open(self):
+        batcher = WeekBatcher(allowed_lateness=timedelta(days=1))
+        batcher.add(*event(datetime(2023, 1, 2)))
+        self.assertEqual(batcher.add(*event(datetime(2023, 1, 9))), [])
+        self.assertEqual(batcher.add(*event(datetime(2023, 1, 5))), [])
+        batches = batcher.add(*event(datetime(2023, 1, 10)))
+        self.assertEqual([(week, len(rows)) for week, rows in batches], [((2023, 1), 2)])
+        self.assertEqual(batcher.late_batches, 0)
+
+    def test_flush_emits_open_weeks_in_order(self):
+        batcher = WeekBatcher(allowed_lateness=timedelta(weeks=4))
+        for timestamp in (datetime(2023, 1, 16), datetime(2023, 1, 2), datetime(2023, 1, 9)):
+            batcher.add(*event(timestamp))
+        self.assertEqual([week for week, _ in batcher.flush()], [(2023, 1), (2023, 2), (2023, 3)])
+
+class TestIngestScenario(unittest.TestCase):
+    """Os cenários só reordenam: toda linha chega uma vez, e a mesma semente repete a ordem."""
+
+    def setUp(self):
+        start = datetime(2023, 1, 2)
+        self.events = [
+            event(start + timedelta(minutes=5 * index), sensor)
+            for index in range(200) for sensor in ("Sensor A", "Sensor B")
+        ]
+
+    def arrivals(self, name: str, seed: int = 7) -> list:
+        return [row for _, row in IngestScenario.from_name(name, seed).apply(iter(self.events))]
+
+    def test_scenarios_preserve_rows(self):
+        expected = sorted(map(tuple, (row for _, row in self.events)))
+        for name in IngestScenario.SCENARIOS:
+            with self.subTest(name):
+                self.assertEqual(sorted(map(tuple, self.arrivals(name))), expected)
+
+    def test_same_seed_same_order(self):
+        self.assertEqual(self.arrivals("jitter"), self.arrivals("jitter"))
+        self.assertNotEqual(self.arrivals("shuffled", 1), self.arrivals("shuffled", 2))
+
+    def test_late_sensor_arrives_after_its_delay(self):
+        self.assertEqual(self.arrivals("ordered"), [row for _, row in self.events])
+        arrivals = self.arrivals("late_sensor")
+        # 200 leituras de 5 em 5 minutos cobrem menos de 36 horas: o Sensor B só chega no fim
+        self.assertEqual({row[2] for row in arrivals[:200]}, {"Sensor A"})
+        self.assertEqual({row[2] for row in arrivals[200:]}, {"Sensor B"})
+
+if __name__ == "__main__":
+    unittest.main()
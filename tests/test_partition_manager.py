@@ -0,0 +1,46 @@
+import unittest
+from datetime import datetime
+from src.partition_manager import PartitionManager
+
+class TestRequiredPartitions(unittest.TestCase):
+    """Partições que cobrem [start, stop) mais as de antecedência, nas fronteiras de mês e de semana ISO."""
+
+    def names(self, start: datetime, stop: datetime, granularity: str, lookahead: int) -> list:
+        return [name for name, _, _ in PartitionManager.required_partitions(start, stop, granularity, lookahead)]
+
+    def test_month_stop_on_boundary_is_exclusive(self):
+        self.assertEqual(
+            self.names(datetime(2023, 1, 15), datetime(2023, 3, 1), "month", 1),
+            ["p202301", "p202302", "p202303"],
+        )
+        self.assertEqual(
+            self.names(datetime(2023, 1, 15), datetime(2023, 3, 1, 0, 0, 1), "month", 1),
+            ["p202301", "p202302", "p202303", "p202304"],
+        )
+
+    def test_month_bounds_cross_the_year(self):
+        partitions = PartitionManager.required_partitions(datetime(2022, 12, 10), datetime(2023, 1, 1), "month", 1)
+        self.assertEqual(partitions, [
+            ("p202212", datetime(2022, 12, 1), datetime(2023, 1, 1)),
+            ("p202301", datetime(2023, 1, 1), datetime(2023, 2, 1)),
+        ])
+
+    def test_weeks_use_the_iso_year(self):
+        # 2023-01-01 é domingo, ainda na semana 52 de 2022
+        partitions = PartitionManager.required_partitions(datetime(2023, 1, 1), datetime(2023, 1, 9), "week", 0)
+        self.assertEqual(partitions, [
+            ("p2022w52", datetime(2022, 12, 26), datetime(2023, 1, 2)),
+            ("p2023w01", datetime(2023, 1, 2), datetime(2023, 1, 9)),
+        ])
+        self.assertEqual(self.names(datetime(2020, 12, 31), datetime(2021, 1, 1), "week", 0), ["p2020w53"])
+
+    def test_empty_range_only_creates_lookahead(self):
+        self.assertEqual(self.names(datetime(2023, 1, 1), datetime(2023, 1, 1), "month", 2), ["p202301", "p202302"])
+        self.assertEqual(self.names(datetime(2023, 1, 1), datetime(2023, 1, 1), "month", 0), [])
+
+    def test_unknown_granularity(self):
+        with self.assertRaises(ValueError):
+            PartitionManager.required_partitions(datetime(2023, 1, 1), datetime(2023, 2, 1), "day", 0)
+
+if __name__ == "__main__":
+    unittest.main()
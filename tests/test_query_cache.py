@@ -0,0 +1,63 @@
+import gc
+import unittest
+from datetime import datetime
+from src.query_cache import QueryCache
+
+class TestQueryCache(unittest.TestCase):
+    """Invalidação pelas semanas inseridas: só caem as entradas do mesmo banco, sensor e intervalo."""
+
+    def setUp(self):
+        self.cache = QueryCache(max_entries=16)
+        scopes = {
+            "week_a": {"sensor": "Sensor A", "start": datetime(2023, 1, 2), "stop": datetime(2023, 1, 9)},
+            "next_week_a": {"sensor": "Sensor A", "start": datetime(2023, 1, 9), "stop": datetime(2023, 1, 16)},
+            "week_b": {"sensor": "Sensor B", "start": datetime(2023, 1, 2), "stop": datetime(2023, 1, 9)},
+            "all_sensors": {"sensor": None, "start": datetime(2023, 1, 1), "stop": datetime(2023, 1, 3)},
+            "unbounded": {"sensor": None, "start": None, "stop": None},
+        }
+        for name, scope in scopes.items():
+            self.cache.put(QueryCache.make_key("sqlite", name), [(1,)], scope)
+        self.cache.put(QueryCache.make_key("columnar_numpy", "week_a"), [(1,)], scopes["week_a"])
+
+    def remaining(self) -> set:
+        return set(self.cache.entries)
+
+    def test_week_changed_invalidates_overlapping_entries(self):
+        # Semana ISO 2023-01: [2023-01-02, 2023-01-09)
+        QueryCache.publish_week_changed("sqlite", {"Sensor A"}, (2023, 1))
+        self.assertEqual(self.remaining(), {
+            ("sqlite", "next_week_a"), ("sqlite", "week_b"), ("columnar_numpy", "week_a"),
+        })
+        self.assertEqual(self.cache.stats()["invalidations"], 3)
+
+    def test_week_boundaries_are_half_open(self):
+        # Semana ISO 2022-52: [2022-12-26, 2023-01-02); só as entradas que começam antes de 01-02 cruzam
+        QueryCache.publish_week_changed("sqlite", {"Sensor A", "Sensor B"}, (2022, 52))
+        self.assertEqual(self.remaining(), {
+            ("sqlite", "week_a"), ("sqlite", "next_week_a"), ("sqlite", "week_b"), ("columnar_numpy", "week_a"),
+        })
+
+    def test_other_database_is_untouched(self):
+        QueryCache.publish_week_changed("mariadb_innodb", {"Sensor A", "Sensor B"}, (2023, 1))
+        self.assertEqual(len(self.cache.entries), 6)
+
+    def test_lru_eviction_keeps_recent_entries(self):
+        cache = QueryCache(max_entries=2)
+        scope = {"sensor": None, "start": None, "stop": None}
+        for name in ("a", "b"):
+            cache.put(("sqlite", name), [(1,)], scope)
+        cache.get(("sqlite", "a"))
+        cache.put(("sqlite", "c"), [(1,)], scope)
+        self.assertEqual(set(cache.entries), {("sqlite", "a"), ("sqlite", "c")})
+        self.assertEqual(cache.evictions, 1)
+
+    def test_discarded_cache_is_not_kept_subscribed(self):
+        cache = QueryCache()
+        self.assertIn(cache, QueryCache._subscribers)
+        count = len(QueryCache._subscribers)
+        del cache
+        gc.collect()
+        self.assertEqual(len(QueryCache._subscribers), count - 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+import csv
+import os
+import tempfile
+import unittest
+from src.regression_check import RegressionCheck
+
+class TestRegressionCheck(unittest.TestCase):
+    """p-valores exatos calculados à mão e os casos que decidem o código de saída do compare."""
+
+    def test_mann_whitney_exact(self):
+        # Grupos totalmente separados: 2 dos C(6, 3) = 20 e dos C(10, 5) = 252 arranjos são tão extremos
+        self.assertEqual(RegressionCheck.mann_whitney([1, 2, 3], [4, 5, 6]), (9.0, 0.1))
+        u, p = RegressionCheck.mann_whitney([1, 2, 3, 4, 5], [6, 7, 8, 9, 10])
+        self.assertEqual(u, 25.0)
+        self.assertAlmostEqual(p, 2 / 252)
+
+    def test_wilcoxon_exact(self):
+        # Postos positivos {1, 3}: W = 4, e 7 dos 2^5 = 32 subconjuntos somam no máximo 4
+        self.assertEqual(RegressionCheck.wilcoxon([0] * 5, [1, -2, 3, -4, -5]), (4.0, 0.4375))
+
+    def test_missing_group_verdict(self):
+        row = RegressionCheck.compare_group(("sqlite", "1_day_full", ""), [1.0] * 5, [], False, 0.05, 0.1, 5)
+        self.assertEqual(row["verdict"], "missing")
+
+    def test_load_run_missing_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, RegressionCheck.RUN_FILES["query"]), mode='w', newline='') as file:
+                csv.writer(file).writerow(["table_name", "query_type", "query_time"])
+            with self.assertRaises(FileNotFoundError):
+                RegressionCheck.load_run(directory)
+            with self.assertRaises(FileNotFoundError):
+                RegressionCheck.load_run(os.path.join(directory, "missing"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+import math
+import random
+import sqlite3
+import unittest
+from datetime import datetime, timedelta
+from src.query_spec import QuerySpec
+from src.rollup_manager import RollupManager
+
+class TestRollupRouting(unittest.TestCase):
+    """Escolha do rollup pelo alinhamento do intervalo e consultas que o roteador aceita ou recusa."""
+
+    def granularity(self, start, stop, bucket=None, dialect="sql"):
+        return RollupManager.choose_granularity(QuerySpec("q", "mean", "Sensor A", start, stop, bucket), dialect)
+
+    def test_coarsest_aligned_granularity(self):
+        self.assertEqual(self.granularity(datetime(2023, 1, 1), datetime(2023, 3, 1)), "month")
+        # 2023-01-02 e 2023-01-16 são segundas-feiras, mas não começo de mês
+        self.assertEqual(self.granularity(datetime(2023, 1, 2), datetime(2023, 1, 16)), "week")
+        self.assertEqual(self.granularity(datetime(2023, 1, 2, 10, 15), datetime(2023, 1, 3)), "15min")
+        self.assertIsNone(self.granularity(datetime(2023, 1, 2, 10, 7), datetime(2023, 1, 3)))
+        self.assertEqual(self.granularity(None, None), "month")
+
+    def test_bucket_limits_granularity(self):
+        self.assertEqual(self.granularity(datetime(2023, 1, 1), datetime(2023, 3, 1), "week"), "15min")
+        self.assertEqual(self.granularity(datetime(2023, 1, 2), datetime(2023, 1, 16), "week"), "week")
+        # No Flux, a janela de uma semana começa na quinta-feira
+        self.assertEqual(self.granularity(datetime(2023, 1, 2), datetime(2023, 1, 16), "week", "flux"), "15min")
+        self.assertEqual(self.granularity(datetime(2023, 1, 2), datetime(2023, 2, 1), "month"), "15min")
+
+    def test_route_rejects_unsupported_specs(self):
+        rejected = [
+            (QuerySpec("q", "raw", "Sensor A"), "sql"),
+            (QuerySpec("q", "mean", per_sensor=True), "sql"),
+            (QuerySpec("q", "mean", sensors=("Sensor A", "Sensor B"), bucket="hour"), "sql"),
+            (QuerySpec("q", "mean", "Sensor A", bucket="hour"), "sql"),
+            (QuerySpec("q", "mean", "Sensor A", bucket="hour"), "flux"),
+            (QuerySpec("q", "count", bucket="month"), "flux"),
+            (QuerySpec("q", "max_min", bucket="15min"), "flux"),
+        ]
+        for spec, dialect in rejected:
+            with self.subTest(spec=spec, dialect=dialect):
+                self.assertIsNone(RollupManager.route(spec, dialect, "rollup"))
+
+    def test_flux_whole_range_paths(self):
+        for aggregate in ("mean", "sum", "count"):
+            with self.subTest(aggregate):
+                query = RollupManager.route(QuerySpec("q", aggregate, "Sensor A"), "flux", "rollup")
+                self.assertNotIn("aggregateWindow", query)
+                self.assertNotIn("None", query)
+        query = RollupManager.route(QuerySpec("q", "max_min"), "flux", "rollup")
+        self.assertLess(query.index("|> group()"), query.index("|> reduce("))
+
+    def test_sql_literals_are_escaped(self):
+        query = RollupManager.route(QuerySpec("q", "sum", "O'Brien"), "sql")
+        self.assertIn("sensor_name = 'O''Brien'", query)
+
+class TestRollupsAgainstSQLite(unittest.TestCase):
+    """As consultas roteadas sobre os rollups devolvem o mesmo que as agregações sobre os dados brutos."""
+
+    @classmethod
+    def setUpClass(cls):
+        rng = random.Random(3)
+        start = datetime(2022, 12, 20)
+        samples = [
+            (start + timedelta(minutes=7 * index), sensor, round(rng.uniform(-10, 40), 2))
+            for index in range(8000) for sensor in ("Sensor A", "Sensor B")
+        ]
+        cls.conn = sqlite3.connect(":memory:")
+        cls.conn.execute("CREATE TABLE sensor_data (event_timestamp TEXT, sensor_name TEXT, temperature REAL)")
+        cls.conn.executemany(
+            "INSERT INTO sensor_data VALUES (?, ?, ?)",
+            [(f"{timestamp:%Y-%m-%d %H:%M:%S}", sensor, value) for timestamp, sensor, value in samples]
+        )
+        # Dois lotes, para exercitar a soma incremental dos agregados
+        half = len(samples) // 2
+        for batch in (samples[:half], samples[half:]):
+            for granularity, buckets in RollupManager.compute_rollups(batch).items():
+                table = RollupManager.TABLES[granularity]
+                cls.conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} (sensor_name TEXT, bucket_start TEXT, count_temp INTEGER, "
+                    f"sum_temp REAL, min_temp REAL, max_temp REAL, PRIMARY KEY (sensor_name, bucket_start))"
+                )
+                cls.conn.executemany(
+                    f"INSERT INTO {table} VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (sensor_name, bucket_start) DO UPDATE SET "
+                    f"count_temp = count_temp + excluded.count_temp, sum_temp = sum_temp + excluded.sum_temp, "
+                    f"min_temp = MIN(min_temp, excluded.min_temp), max_temp = MAX(max_temp, excluded.max_temp)",
+                    [(sensor, f"{bucket:%Y-%m-%d %H:%M:%S}", *stats) for (sensor, bucket), stats in buckets.items()]
+                )
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.conn.close()
+
+    def raw(self, spec: QuerySpec) -> list:
+        aggregates = {
+            "mean": "AVG(temperature)", "sum": "SUM(temperature)", "count": "COUNT(*)",
+            "max_min": "MAX(temperature), MIN(temperature)",
+        }
+        conditions, params = [], []
+        for condition, value in (("sensor_name = ?", spec.sensor), ("event_timestamp >= ?", spec.start), ("event_timestamp < ?", spec.stop)):
+            if value is not None:
+                conditions.append(condition)
+                params.append(f"{value:%Y-%m-%d %H:%M:%S}" if isinstance(value, datetime) else value)
+        columns = aggregates[spec.aggregate]
+        group_by = ""
+        if spec.bucket == "15min":
+            columns = f"strftime('%Y-%m-%d %H:', event_timestamp) || printf('%02d', strftime('%M', event_timestamp) / 15 * 15) || ':00' AS b, {columns}"
+            group_by = " GROUP BY b ORDER BY b"
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self.conn.execute(f"SELECT {columns} FROM sensor_data{where}{group_by}", params).fetchall()
+
+    def assertSameRows(self, rows: list, expected: list):
+        self.assertEqual(len(rows), len(expected))
+        for row, expected_row in zip(rows, expected):
+            self.assertEqual(len(row), len(expected_row))
+            for value, expected_value in zip(row, expected_row):
+                if isinstance(expected_value, float):
+                    self.assertTrue(math.isclose(value, expected_value, rel_tol=1e-9, abs_tol=1e-9), (row, expected_row))
+                else:
+                    self.assertEqual(value, expected_value)
+
+    def test_routed_queries_match_raw_data(self):
+        specs = [
+            QuerySpec("month", "mean", "Sensor A", datetime(2023, 1, 1), datetime(2023, 2, 1)),
+            QuerySpec("week", "sum", "Sensor B", datetime(2023, 1, 2), datetime(2023, 1, 16)),
+            QuerySpec("15min", "max_min", None, datetime(2023, 1, 3, 6, 45), datetime(2023, 1, 20, 12)),
+            QuerySpec("all", "count"),
+            QuerySpec("bucketed", "mean", "Sensor A", datetime(2023, 1, 5), datetime(2023, 1, 6), "15min"),
+        ]
+        for spec in specs:
+            with self.subTest(spec.label):
+                query = RollupManager.route(spec, "sql")
+                self.assertIsNotNone(query)
+                self.assertSameRows(self.conn.execute(query).fetchall(), self.raw(spec))
+
+if __name__ == "__main__":
+    unittest.main()